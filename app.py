@@ -1,5 +1,3 @@
-import pandas as pd
-import chromadb
 import streamlit as st
 import os
 from datetime import datetime, time as dt_time
@@ -23,7 +21,12 @@ if IS_STREAMLIT_CLOUD:
         os.makedirs('/tmp/.wdm_cache', exist_ok=True)
     except:
         pass
-    
+
+@st.cache_resource(show_spinner="Preparando ChromeDriver...")
+def preparar_chromedriver():
+    """Instala un ChromeDriver compatible en Streamlit Cloud (se difiere hasta la primera descarga)."""
+    if not IS_STREAMLIT_CLOUD:
+        return True
     try:
         import subprocess
         import sys
@@ -32,10 +35,11 @@ if IS_STREAMLIT_CLOUD:
                               capture_output=True, text=True, timeout=60)
         if result.returncode == 0:
             print("✅ ChromeDriver preparado para Streamlit Cloud")
-        else:
-            print(f"⚠️ Warning en fix_chromedriver: {result.stderr[:200]}")
+            return True
+        print(f"⚠️ Warning en fix_chromedriver: {result.stderr[:200]}")
     except Exception as e:
         print(f"⚠️ No se pudo ejecutar fix_chromedriver.py: {e}")
+    return False
 
 # Configuración
 st.set_page_config(
@@ -448,73 +452,93 @@ st.markdown("""
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 1-4. Cargar y preparar datos, embeddings y vector store (cacheado)
-@st.cache_resource(show_spinner="Cargando base de datos de propiedades...")
-def cargar_sistema():
+# 1-4. Cargar y preparar datos, embeddings y vector store (en segundo plano, ver iniciar_carga_sistema)
+def cargar_sistema(reportar=lambda etapa: None):
     """Carga propiedades, genera embeddings y crea el vector store."""
+    import chromadb
+    import pandas as pd
     from src.scrapers import PropertyDatabase
-    from sentence_transformers import SentenceTransformer
-    
-    # Cargar desde SQLite
-    db = PropertyDatabase(db_path="data/properties.db")
-    df = db.obtener_df()
+    from src.config import EMBEDDINGS_MODEL
+    from src.embedding_cache import EmbeddingCache
+    from src.search_index import construir_indice_ids
+    from src.embedding_backends import identificador_modelo
+    from src.embedding_service import obtener_modelo_embeddings
+    from src.reranker import MatrizFeatures
+    from src.search_system import SistemaBusqueda
+    from src.snapshot import cargar_snapshot, guardar_snapshot, huella_bd
+    from src.vector_sync import (COLECCION, construir_textos, filtrar_ids_validos, huella_sincronizada,
+                                 marcar_sincronizada, sincronizar_coleccion)
+    
+    # Arranque en caliente: snapshot vigente para esta BD y este modelo (sin leer ni procesar la BD)
+    db_path = "data/properties.db"
+    modelo_id = identificador_modelo(EMBEDDINGS_MODEL)
+    huella = huella_bd(db_path)
+    snapshot = cargar_snapshot(huella, modelo_id)
+    if snapshot is not None and not snapshot.df.empty:
+        df, indice_ids, features = snapshot.df, snapshot.indice, snapshot.features
+    else:
+        snapshot = None
+        # Cargar desde SQLite
+        reportar("Leyendo base de datos de propiedades...")
+        db = PropertyDatabase(db_path=db_path)
+        # La huella sale de la misma lectura que el df: es la que se guarda en el snapshot
+        df, huella = db.obtener_df_con_huella()
+    
+        if df.empty:
+            logger.warning("Base de datos vacía - lista para descargar propiedades desde Internet")
+            # Intentar cargar desde CSV si existe
+            csv_files = ['data/properties_expanded.csv', 'data/properties.csv']
+            for csv_file in csv_files:
+                try:
+                    if os.path.exists(csv_file):
+                        # Insertar en BD y volver a leer: el df y su huella quedan iguales a lo guardado
+                        db.agregar_propiedades(pd.read_csv(csv_file).to_dict('records'))
+                        df, huella = db.obtener_df_con_huella()
+                        logger.info(f"Cargadas {len(df)} propiedades desde {csv_file}")
+                        break
+                except Exception as e:
+                    logger.warning(f"Error cargando {csv_file}: {e}")
+                    continue
     
-    if df.empty:
-        logger.warning("Base de datos vacía - lista para descargar propiedades desde Internet")
-        # Intentar cargar desde CSV si existe
-        csv_files = ['data/properties_expanded.csv', 'data/properties.csv']
-        for csv_file in csv_files:
+        # Si sigue vacía, devolver setup inicial vacío pero funcional
+        if df.empty:
+            logger.info("Inicializando sistema con BD vacía - usuario puede descargar propiedades")
+            # Crear estructura mínima pero válida
+            model = obtener_modelo_embeddings(EMBEDDINGS_MODEL)
+            # Usar cliente en memoria en Streamlit Cloud, persistente en local
+            if IS_STREAMLIT_CLOUD:
+                logger.info("Detectado Streamlit Cloud - usando ChromaDB en memoria")
+                chroma_client = chromadb.EphemeralClient()
+            else:
+                chroma_client = chromadb.PersistentClient(path="data/chroma_data")
+            # Crear colección vacía
             try:
-                if os.path.exists(csv_file):
-                    df = pd.read_csv(csv_file)
-                    # Insertar en BD
-                    db.agregar_propiedades(df.to_dict('records'))
-                    logger.info(f"Cargadas {len(df)} propiedades desde {csv_file}")
-                    break
-            except Exception as e:
-                logger.warning(f"Error cargando {csv_file}: {e}")
-                continue
-    
-    # Si sigue vacía, devolver setup inicial vacío pero funcional
-    if df.empty:
-        logger.info("Inicializando sistema con BD vacía - usuario puede descargar propiedades")
-        # Crear estructura mínima pero válida
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        # Usar cliente en memoria en Streamlit Cloud, persistente en local
-        if IS_STREAMLIT_CLOUD:
-            logger.info("Detectado Streamlit Cloud - usando ChromaDB en memoria")
-            chroma_client = chromadb.EphemeralClient()
-        else:
-            chroma_client = chromadb.PersistentClient(path="data/chroma_data")
-        # Crear colección vacía
-        try:
-            chroma_client.delete_collection("propiedades")
-        except:
-            pass
-        collection = chroma_client.create_collection(name="propiedades")
-        return model, collection, pd.DataFrame()  # Retorna DataFrame vacío pero válido
-    
-    # Filtrar filas con ID vacío o inválido
-    df = df[df['id'].notna() & (df['id'].astype(str).str.len() > 0)]
-    df = df.reset_index(drop=True)
-    
-    if df.empty:
-        logger.warning("No se encontraron propiedades válidas. Inicializando con BD vacía")
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        # Retornar sin colección si la BD está vacía
-        return model, None, pd.DataFrame()
-    
-    logger.info(f"Cargadas {len(df)} propiedades de BD SQLite")
-    
-    def make_text(row):
-        desc = row.get('descripcion', '') if isinstance(row, dict) else row['descripcion']
-        return f"{row['tipo']} en {row['zona']}. {desc}"
-    
-    df['text'] = df.apply(make_text, axis=1)
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(df['text'].tolist())
+                chroma_client.delete_collection("propiedades")
+            except:
+                pass
+            collection = chroma_client.create_collection(name="propiedades")
+            # Retorna DataFrame vacío pero válido (las descargas se aplican desde esta huella)
+            return SistemaBusqueda(model, collection, pd.DataFrame(), db_path=db_path, modelo_id=modelo_id,
+                                   huella=huella)
+    
+        # Filtrar filas con ID vacío o inválido
+        df = filtrar_ids_validos(df)
+    
+        if df.empty:
+            logger.warning("No se encontraron propiedades válidas. Inicializando con BD vacía")
+            model = obtener_modelo_embeddings(EMBEDDINGS_MODEL)
+            # Retornar sin colección si la BD está vacía
+            return SistemaBusqueda(model, None, pd.DataFrame(), db_path=db_path, modelo_id=modelo_id, huella=huella)
+    
+        logger.info(f"Cargadas {len(df)} propiedades de BD SQLite")
+    
+        df['text'] = construir_textos(df)
+        indice_ids = construir_indice_ids(df)
+        reportar("Preparando features de búsqueda...")
+        features = MatrizFeatures(df)
+    
+    reportar("Cargando modelo de embeddings...")
+    model = obtener_modelo_embeddings(EMBEDDINGS_MODEL)
     
     # Usar cliente en memoria en Streamlit Cloud, persistente en local
     if IS_STREAMLIT_CLOUD:
@@ -523,81 +547,59 @@ def cargar_sistema():
     else:
         chroma_client = chromadb.PersistentClient(path="data/chroma_data")
     
-    # Intentar obtener la colección existente
+    # Sincronización incremental: solo se embeben propiedades nuevas o modificadas
+    reportar("Sincronizando base vectorial...")
     try:
-        collection = chroma_client.get_collection("propiedades")
-        docs_existentes = collection.count()
-        logger.info(f"Colección existente encontrada con {docs_existentes} documentos")
-        
-        # IMPORTANTE: Si tiene menos documentos que la BD actual, regenerar
-        # Comparar con el número real de propiedades en el CSV
-        if docs_existentes == len(df):  # Solo usar si tiene EXACTAMENTE el mismo número
-            logger.info(f"ChromaDB actualizado y sincronizado ({docs_existentes} docs)")
-            return model, collection, df
+        collection = chroma_client.get_or_create_collection(COLECCION)
+        logger.info(f"Colección encontrada con {collection.count()} documentos. Sincronizando con BD ({len(df)} propiedades)...")
+        # Los textos ya embebidos se leen del snapshot o del cache en disco (no se recalculan)
+        cache_embeddings = EmbeddingCache(modelo=modelo_id)
+        modelo_sync = cache_embeddings.envolver(model)
+        if snapshot is not None:
+            modelo_sync = snapshot.envolver(modelo_sync)
+        if snapshot is not None and huella_sincronizada(collection) == huella:
+            # La colección ya quedó al día con esta misma BD: no hace falta recorrerla
+            logger.info("⚡ Colección al día con la huella del snapshot, no se sincroniza")
         else:
-            logger.warning(f"Discrepancia detectada: ChromaDB tiene {docs_existentes} docs pero CSV tiene {len(df)}. Regenerando...")
-    except:
-        pass
-    
-    # Si no existe o está vacía, crearla
-    logger.info("Preparando colección ChromaDB...")
-    
-    collection = None
-    # Intentar crear colección de forma simple
-    try:
-        # Primero intentar obtener la existente
-        try:
-            collection = chroma_client.get_collection("propiedades")
-            logger.info("Usando colección existente")
-        except:
-            # Si no existe, crear nueva
-            collection = chroma_client.create_collection("propiedades")
-            logger.info("Colección nueva creada")
-        
-        # Si la colección existe pero está vacía o desincronizada, agregar documentos
-        if collection:
-            logger.info(f"Agregando {len(df)} propiedades a ChromaDB...")
-            
-            for i, row in df.iterrows():
-                # Validar ID
-                row_id = str(row['id']).strip() if row['id'] else None
-                if not row_id or row_id == "nan" or row_id == "None":
-                    continue
-                
-                # Limpiar metadatos
-                metadata = row.to_dict()
-                for key in metadata:
-                    if metadata[key] is None or (isinstance(metadata[key], float) and pd.isna(metadata[key])):
-                        metadata[key] = ""
-                
-                try:
-                    collection.add(
-                        documents=[row['text']],
-                        embeddings=[embeddings[i]],
-                        metadatas=[metadata],
-                        ids=[row_id]
-                    )
-                except:
-                    # Si falla al agregar un documento, continuar
-                    continue
-            
-            logger.info(f"✅ ChromaDB procesado")
-            return model, collection, df
+            stats_sync = sincronizar_coleccion(collection, df, modelo_sync)
+            if not stats_sync["errores"]:
+                marcar_sincronizada(collection, huella)
+        if snapshot is None:
+            guardar_snapshot(df, cache_embeddings.codificar(df['text'].tolist(), model), features, huella, modelo_id)
+        return SistemaBusqueda(model, collection, df, indice_ids, features, modelo_sync=modelo_sync,
+                               db_path=db_path, modelo_id=modelo_id, huella=huella)
     except Exception as e:
         logger.error(f"Error crítico con ChromaDB: {e}. Continuando sin ChromaDB...")
-        # Si ChromaDB falla completamente, crear un stub que no lance errores
-        collection = None
-    
-    # Si no tenemos colección, crear un mock para que no falle
-    if collection is None:
-        logger.warning("ChromaDB no disponible, usando fallback")
         # Retornar con colección None - manejaremos esto en las funciones de búsqueda
-        return model, None, df
-    
-    # Fallback final (nunca debería llegar aquí, pero por si acaso)
-    return model, collection, df
+        return SistemaBusqueda(model, None, df, indice_ids, features, db_path=db_path, modelo_id=modelo_id,
+                               huella=huella)
+
+@st.cache_resource(show_spinner=False)
+def iniciar_carga_sistema():
+    """Lanza cargar_sistema() en un thread una vez por proceso (o tras limpiar el cache)."""
+    from src.background_loader import CargaEnSegundoPlano
+    return CargaEnSegundoPlano(cargar_sistema)
+
+carga_sistema = iniciar_carga_sistema()
 
-model, collection, df_propiedades = cargar_sistema()
+# Mientras carga el modelo y la base vectorial se muestra la cáscara de la UI con el estado
+if not carga_sistema.listo:
+    st.header("🏠 Agente RAG Inmobiliario")
+    st.info(f"⏳ Preparando el buscador: {carga_sistema.etapa}")
+    carga_sistema.esperar(timeout=1.0)
+    st.rerun()
+
+if carga_sistema.error is not None:
+    st.error(f"❌ Error cargando el sistema: {carga_sistema.error}")
+    # La carga fallida no queda cacheada: el próximo rerun vuelve a intentar
+    iniciar_carga_sistema.clear()
+    if st.button("🔄 Reintentar"):
+        st.rerun()
+    st.stop()
+
+# Cada rerun toma una versión consistente del sistema (las descargas lo actualizan en el lugar)
+sistema_busqueda = carga_sistema.resultado
+model, collection, df_propiedades, indice_ids, features_reranking = sistema_busqueda.estado()
 
 # Validar que se cargó correctamente - solo model es crítico
 if model is None:
@@ -606,6 +608,7 @@ if model is None:
 
 # df_propiedades puede estar vacío inicialmente (usuario descargará propiedades después)
 if df_propiedades is None:
+    import pandas as pd
     df_propiedades = pd.DataFrame()
 
 bd_vacia = df_propiedades.empty
@@ -618,100 +621,93 @@ if not bd_vacia and collection is not None:
         
         # Log de sincronización
         if docs_chroma != docs_csv:
-            logger.warning(f"⚠️ SYNC ERROR: ChromaDB tiene {docs_chroma} docs pero CSV tiene {docs_csv}. Regenerando...")
-            # Regenerar ChromaDB completo
+            logger.warning(f"⚠️ SYNC ERROR: ChromaDB tiene {docs_chroma} docs pero CSV tiene {docs_csv}. Sincronizando diferencias...")
             try:
-                # Usar cliente en memoria en Streamlit Cloud, persistente en local
-                if IS_STREAMLIT_CLOUD:
-                    chroma_client = chromadb.EphemeralClient()
-                else:
-                    chroma_client = chromadb.PersistentClient(path="data/chroma_data")
-                try:
-                    chroma_client.delete_collection("propiedades")
-                except:
-                    pass
-                
-                # Reconstruir embeddings
-                from sentence_transformers import SentenceTransformer
-                def make_text(row):
-                    desc = row.get('descripcion', '') if isinstance(row, dict) else row['descripcion']
-                    return f"{row['tipo']} en {row['zona']}. {desc}"
-                
-                df_propiedades['text'] = df_propiedades.apply(make_text, axis=1)
-                embeddings = model.encode(df_propiedades['text'].tolist())
-                
-                # Crear colección con reintentos
-                for intento in range(3):
-                    try:
-                        collection = chroma_client.create_collection("propiedades")
-                        break
-                    except Exception as e:
-                        logger.debug(f"Intento {intento+1} de crear colección falló: {e}")
-                        if intento == 2:
-                            raise
-                
-                logger.info(f"Agregando {len(df_propiedades)} propiedades a ChromaDB...")
-                
-                for i, row in df_propiedades.iterrows():
-                    row_id = str(row['id']).strip() if row['id'] else None
-                    if not row_id or row_id == "nan" or row_id == "None":
-                        continue
-                    
-                    metadata = row.to_dict()
-                    for key in metadata:
-                        if metadata[key] is None or (isinstance(metadata[key], float) and pd.isna(metadata[key])):
-                            metadata[key] = ""
-                    
-                    try:
-                        collection.add(
-                            documents=[row['text']],
-                            embeddings=[embeddings[i]],
-                            metadatas=[metadata],
-                            ids=[row_id]
-                        )
-                    except:
-                        continue
-                
-                try:
-                    docs_count = collection.count()
-                    logger.info(f"✅ ChromaDB regenerado con {docs_count} documentos")
-                except:
-                    logger.info(f"✅ ChromaDB regenerado")
+                from src.config import EMBEDDINGS_MODEL
+                from src.embedding_backends import identificador_modelo
+                from src.embedding_cache import EmbeddingCache
+                from src.vector_sync import sincronizar_coleccion
+                sincronizar_coleccion(collection, df_propiedades, EmbeddingCache(modelo=identificador_modelo(EMBEDDINGS_MODEL)).envolver(model))
             except Exception as e:
-                logger.error(f"Error regenerando ChromaDB: {e}")
+                logger.error(f"Error sincronizando ChromaDB: {e}")
         else:
             logger.info(f"✅ ChromaDB sincronizado: {docs_chroma} documentos")
     except Exception as e:
         logger.warning(f"Error en sincronización de ChromaDB: {e}")
 
 # Funciones de búsqueda
+def obtener_zonas_conocidas():
+    """Zonas presentes en la BD, normalizadas (se detectan en la query aunque no estén en ZONAS_MAPPING)."""
+    return sistema_busqueda.zonas_conocidas
+
+@st.cache_resource(show_spinner=False)
+def obtener_codificador_queries():
+    """Encode de queries con cache LRU y micro-lotes, compartido por todas las sesiones."""
+    from src.query_embeddings import CodificadorQueries
+    return CodificadorQueries(model)
+
 def buscar_propiedades(query, k=5):
     """Búsqueda RAG semántica mejorada con procesamiento inteligente sin API."""
     # Si la BD está vacía, no hay nada que buscar
     if bd_vacia or collection is None:
         return [], "Base de datos vacía. Descarga propiedades primero desde 'Descargar de Internet'"
     
+    from src.query_parser import expandir_query, parsear_query
+    from src.hybrid_search import fusionar_resultados
+    from src.query_cache import clave_query, obtener_cache_queries
+    from src.search_filters import consultar_con_filtros
+    from src.search_index import registros_desde_metadatos
+    
     try:
+        # Una sola pasada sobre la query: criterios para el pre-filtrado y expansiones semánticas
+        criterios = parsear_query(query, obtener_zonas_conocidas())
+        
+        # Queries repetidas (en esta u otras sesiones) se resuelven desde el cache del proceso
+        cache = obtener_cache_queries()
+        clave = clave_query(query, criterios, k=k)
+        cacheadas = cache.obtener(clave)
+        if cacheadas is not None:
+            return list(cacheadas), None
+        
         # Procesar la query para entender mejor la intención
-        search_query = mejorar_query(query)
+        search_query = expandir_query(query, criterios)
         
-        # Búsqueda semántica (pedir más para paginación)
+        # Búsqueda semántica pre-filtrada (pedir más para paginación)
         k_expanded = min(max(k, 50), len(df_propiedades))  # Mínimo 50 para mejor cobertura de zonas
-        query_emb = model.encode([search_query])
-        results = collection.query(query_embeddings=query_emb.tolist(), n_results=k_expanded)
+        codificador = obtener_codificador_queries()
+        query_emb = codificador.encode([search_query])
+        logger.debug(f"Embeddings de queries: {codificador.estadisticas()}")
+        # Se relaja solo si los filtros no alcanzan para las k que se muestran (k_expanded es el tamaño del pedido)
+        results = consultar_con_filtros(collection, query_emb.tolist(), criterios, n_results=k_expanded,
+                                        min_resultados=k)
+        
+        # Registros armados desde los metadatos de Chroma (el DataFrame solo completa columnas faltantes)
+        registros_vectoriales = registros_desde_metadatos(
+            results['ids'][0],
+            results['metadatas'][0],
+            results['distances'][0],
+            columnas=df_propiedades.columns,
+            df=df_propiedades,
+            indice=indice_ids,
+        )
         
-        # Retornar registros completos de BD
-        propiedades_recomendadas = []
-        for result_id in results['ids'][0]:
-            if result_id in df_propiedades['id'].astype(str).values:
-                # Obtener el registro completo de la BD
-                prop_row = df_propiedades[df_propiedades['id'].astype(str) == result_id].iloc[0]
-                propiedades_recomendadas.append(prop_row.to_dict())
+        # Búsqueda por palabras (BM25) fusionada por ranking: calles, "cochera", etc. aparecen aunque
+        # el índice vectorial no los traiga. Se filtra con los mismos criterios que Chroma
+        db = sistema_busqueda.db
+        hits_bm25 = db.buscar_bm25(query, limit=k_expanded, criterios=criterios) if db is not None else []
+        propiedades_recomendadas = fusionar_resultados(
+            registros_vectoriales,
+            [doc_id for doc_id, _ in hits_bm25],
+            n_results=k_expanded,
+            df=df_propiedades,
+            indice=indice_ids,
+        )
         
         if not propiedades_recomendadas:
             return [], "No hay propiedades que combinen con tu búsqueda. Intenta con otros criterios."
         
-        return propiedades_recomendadas, None
+        cache.guardar(clave, propiedades_recomendadas)
+        return list(propiedades_recomendadas), None
     except Exception as e:
         logger.warning(f"Error en búsqueda RAG: {e}")
         return [], f"Error en búsqueda: {str(e)}"
@@ -721,55 +717,10 @@ def mejorar_query(query):
     if not query:
         return query
     
-    query_lower = query.lower()
-    
-    # Diccionario de expansiones semánticas para criterios comunes
-    expansiones = {
-        'moderno': ['nuevo', 'renovado', 'contemporáneo', 'actualizado'],
-        'luminoso': ['luz', 'iluminado', 'ventanas'],
-        'amplio': ['espacioso', 'grande', 'tamaño', 'metros'],
-        'tranquilo': ['paz', 'quieto', 'residencial', 'alejado'],
-        'céntrico': ['centro', 'central', 'ubicación', 'acceso'],
-        'familia': ['habitaciones', 'dormitorios', 'niños', 'personas'],
-        'campo': ['rural', 'chacra', 'terreno', 'naturales'],
-        'ciudad': ['urbano', 'zona', 'barrio', 'localidad'],
-        'pequeño': ['compacto', 'estudio', 'monoambiente', 'reducido'],
-        'balcón': ['terraza', 'vista', 'aire libre'],
-        'jardin': ['patio', 'verde', 'exterior', 'plantas'],
-        'piscina': ['pileta', 'natatorio', 'agua'],
-        'seguridad': ['vigilancia', 'alarma', 'portero', 'cerradura'],
-        'cocina': ['cocina equipada', 'amoblada', 'electrodomésticos'],
-        'baño': ['baños', 'toilette', 'espacio sanitario'],
-        'parking': ['cochera', 'garaje', 'estacionamiento', 'auto'],
-    }
-    
-    # Expandir query con sinónimos relevantes
-    query_expandida = query
-    for palabra_clave, sinonimos in expansiones.items():
-        if palabra_clave in query_lower:
-            # Agregar sinónimos para mejor búsqueda semántica
-            query_expandida += " " + " ".join(sinonimos)
-    
-    # Detectar intenciones específicas y agregar contexto
-    intenciones = {
-        'número en familia': ['personas', 'miembros', 'tamaño familia'],
-        'presupuesto': ['máximo', 'mínimo', 'precio', 'renta', 'valor'],
-        'superficie': ['m2', 'metros', 'tamaño', 'superficie'],
-        'época': ['ahora', 'pronto', 'urgente', 'inmediato'],
-        'característica especial': ['con', 'tiene', 'debe', 'necesita'],
-    }
-    
-    # Agregar palabras de contexto según lo que detectemos
-    if any(x in query_lower for x in ['cuántas', 'cuantas', 'cantidad', 'número', 'personas']):
-        query_expandida += " tamaño distribución espacial dormitorios"
-    
-    if any(x in query_lower for x in ['cuánto', 'cuanto', 'precio', 'costo', 'valor']):
-        query_expandida += " precio valor inversión"
+    from src.query_parser import expandir_query, parsear_query
     
-    if any(x in query_lower for x in ['dónde', 'donde', 'zona', 'ubicación', 'barrio']):
-        query_expandida += " localidad ubicación zona área"
-    
-    return query_expandida
+    # Sinónimos y contexto de intención salen del mismo parser compilado que usa el pre-filtrado
+    return expandir_query(query, parsear_query(query, obtener_zonas_conocidas()))
 
 def reranquear_propiedades_localmente(query, propiedades):
     """
@@ -780,167 +731,14 @@ def reranquear_propiedades_localmente(query, propiedades):
     if not propiedades:
         return []
     
-    import re
-    query_lower = query.lower()
-    
-    # DICCIONARIO DE AMENITIES - Mapear palabras clave a campos reales
-    amenities_mapping = {
-        'pileta': ['pileta', 'piscina', 'natatorio'],
-        'piscina': ['pileta', 'piscina', 'natatorio'],
-        'jardín': ['jardín', 'patio', 'parque', 'verde'],
-        'patio': ['jardín', 'patio', 'parque'],
-        'aire': ['aire', 'clima', 'acondicionado'],
-        'gas': ['gas', 'calefacción'],
-        'garage': ['garage', 'cochera', 'estacionamiento', 'parking', 'auto'],
-        'cochera': ['garage', 'cochera', 'estacionamiento', 'parking'],
-        'terraza': ['terraza', 'balcón', 'vista'],
-        'balcón': ['terraza', 'balcón', 'vista'],
-        'cocina': ['cocina'],
-        'nuevo': ['nuevo', 'renovado', 'moderno', 'recién'],
-        'renovado': ['renovado', 'nuevo', 'moderno'],
-        'moderno': ['moderno', 'nuevo', 'renovado', 'contemporáneo'],
-        'seguridad': ['seguridad', 'vigilancia', 'alarma', 'portero'],
-        'luminoso': ['luz', 'iluminado', 'ventanas'],
-        'amplio': ['amplio', 'espacioso', 'grande'],
-    }
-    
-    # DICCIONARIO DE ZONAS
-    zonas_mapping = {
-        'san isidro': ['san isidro', 'isidro'],
-        'palermo': ['palermo', 'soho', 'hollywood', 'chico'],
-        'recoleta': ['recoleta'],
-        'belgrano': ['belgrano'],
-        'caballito': ['caballito', 'primera junta'],
-        'flores': ['flores', 'parque chacabuco'],
-        'puerto madero': ['puerto madero', 'madero'],
-        'la boca': ['la boca', 'boca'],
-        'san nicolás': ['san nicolás', 'nicolás'],
-        'centro': ['centro', 'retiro', 'microcentro'],
-        'caba': ['caba', 'buenos aires'],
-    }
-    
-    # EXTRAER LO QUE EL USUARIO BUSCA
-    criterios_buscados = {
-        'amenities': [],
-        'zona': None,
-        'tipo': None,
-        'habitaciones': None,
-        'precio_aprox': None,
-    }
+    from src.query_parser import parsear_query
+    from src.reranker import reranquear
     
-    # 1. Detectar amenities buscados
-    for amenity, keywords in amenities_mapping.items():
-        for kw in keywords:
-            if kw in query_lower:
-                if amenity not in criterios_buscados['amenities']:
-                    criterios_buscados['amenities'].append(amenity)
-                break
-    
-    # 2. Detectar zona buscada
-    for zona_key, zona_keywords in zonas_mapping.items():
-        for kw in zona_keywords:
-            if kw in query_lower:
-                criterios_buscados['zona'] = zona_key
-                break
-        if criterios_buscados['zona']:
-            break
-    
-    # 3. Detectar tipo
-    tipos_search = ['casa', 'departamento', 'dpto', 'apt', 'apartamento', 'piso', 'loft', 'estudio', 'monoambiente']
-    for tipo in tipos_search:
-        if tipo in query_lower:
-            criterios_buscados['tipo'] = tipo
-            break
-    
-    # 4. Detectar número de habitaciones
-    numeros_query = re.findall(r'\d+', query)
-    for num_str in numeros_query:
-        num = int(num_str)
-        if 2 <= num <= 8:  # Probablemente habitaciones
-            criterios_buscados['habitaciones'] = num
-            break
-        elif num > 100000:  # Probablemente precio
-            criterios_buscados['precio_aprox'] = num
-            break
-    
-    # SCORING: Dar puntos según coincidencias, SIN descartar nada
-    scores = []
-    
-    for prop in propiedades:
-        score = 0
-        desc = str(prop.get('descripcion', '')).lower()
-        amenities = str(prop.get('amenities', '')).lower()
-        zona_prop = str(prop.get('zona', '')).lower()
-        tipo_prop = str(prop.get('tipo', '')).lower()
-        hab_prop = prop.get('habitaciones', '')
-        
-        # ZONA: Máxima prioridad si se especificó
-        if criterios_buscados['zona']:
-            zona_key = criterios_buscados['zona']
-            zona_keywords = zonas_mapping[zona_key]
-            zona_match = any(kw in zona_prop for kw in zona_keywords)
-            if zona_match:
-                score += 500  # Coincidencia exacta de zona = PRIORIDAD MÁXIMA
-            else:
-                # Penalidad leve si buscó zona específica pero no coincide
-                score -= 50
-        
-        # AMENITIES: Puntos por cada uno encontrado
-        for amenity in criterios_buscados['amenities']:
-            keywords = amenities_mapping.get(amenity, [])
-            amenity_found = False
-            
-            # Verificar en campo específico si existe (ej: pileta)
-            if amenity == 'pileta':
-                if prop.get('pileta') or any(kw in amenities for kw in keywords):
-                    score += 100
-                    amenity_found = True
-            else:
-                # Verificar en amenities o descripción
-                if any(kw in amenities for kw in keywords) or any(kw in desc for kw in keywords):
-                    score += 80
-                    amenity_found = True
-            
-            if not amenity_found:
-                # Penalidad menor si buscó algo específico pero no está
-                score -= 20
-        
-        # TIPO: Bonificación si coincide
-        if criterios_buscados['tipo']:
-            if criterios_buscados['tipo'] in tipo_prop:
-                score += 150
-            else:
-                score -= 30
-        
-        # HABITACIONES: Exacta es mejor, pero acepta >= buscado
-        if criterios_buscados['habitaciones']:
-            try:
-                hab_int = int(hab_prop) if hab_prop else 0
-                if hab_int == criterios_buscados['habitaciones']:
-                    score += 200  # Coincidencia exacta
-                elif hab_int >= criterios_buscados['habitaciones']:
-                    score += 100  # Tiene al menos las buscadas
-                else:
-                    score -= 40   # Tiene menos que lo buscado
-            except:
-                pass
-        
-        # BONIFICACIÓN GENERAL: Palabras del query en descripción
-        keywords_query = [kw.strip() for kw in query_lower.split() if len(kw.strip()) > 2]
-        for kw in keywords_query:
-            if kw not in ['san', 'isidro', 'palermo', 'recoleta']:  # Evitar duplicar zona
-                if kw in desc:
-                    score += 10
-                if kw in amenities:
-                    score += 8
-        
-        scores.append((prop, score))
+    # EXTRAER LO QUE EL USUARIO BUSCA (mismo parser cacheado que usa el pre-filtrado)
+    criterios_buscados = parsear_query(query, obtener_zonas_conocidas())
     
-    # Ordenar por score descendente
-    propiedades_ranked = sorted(scores, key=lambda x: x[1], reverse=True)
-    
-    # Retornar todas pero ordenadas por relevancia
-    return [prop for prop, score in propiedades_ranked]
+    # SCORING vectorizado sobre las features precalculadas, SIN descartar nada
+    return reranquear(query, criterios_buscados, propiedades, features_reranking, indice_ids)
 
 def extraer_palabras_clave(texto):
     """Extrae palabras clave de un texto."""
@@ -1393,6 +1191,45 @@ st.sidebar.markdown("---")
 # with st.sidebar.expander("Gestionar BD", expanded=False):
 #     # [TODO: Sección de gestión de BD - 285 líneas comentadas]
 
+def descargar_zonas(zonas, tipo_prop, limite, progress_container, details_container, stats_container):
+    """
+    Descarga las zonas en paralelo con el orquestador (un único escritor a la BD)
+    y muestra el progreso por zona. Devuelve (evento final, si se detuvo).
+    """
+    from src.orchestrator import OrquestadorScraping
+
+    # El botón de detener corta la descarga a través de este Event
+    detener = threading.Event()
+    st.session_state.scraper_detener = detener
+    orquestador = OrquestadorScraping(zonas, tipo=tipo_prop.lower(), limite=limite, detener=detener, debug=True)
+
+    final = None
+    for evento in orquestador.ejecutar():
+        if evento.tipo == "inicio_zona":
+            details_container.info(f"⏳ Buscando propiedades de {evento.zona}...")
+        elif evento.tipo == "zona_completa":
+            stats_container.metric(f"🏠 {evento.zona}", f"{evento.encontradas} propiedades encontradas")
+            details_container.success(
+                f"✓ {evento.zona}: "
+                f"**{evento.encontradas}** encontradas → "
+                f"**{evento.insertadas}** nuevas agregadas | "
+                f"Total acumulado: **{evento.total_insertadas}**"
+            )
+        elif evento.tipo == "error_zona":
+            details_container.warning(f"⚠️ {evento.zona}: {evento.error}")
+        elif evento.tipo == "error_escritura":
+            details_container.error(f"❌ Error guardando en la base de datos: {evento.error}")
+        elif evento.tipo == "fin":
+            final = evento
+            continue
+        progress_container.progress(
+            evento.progreso,
+            text=f"✅ **{evento.total_encontradas}** propiedades descargadas "
+                 f"({evento.zonas_completadas}/{evento.total_zonas} zonas, {evento.propiedades_por_segundo:.1f} props/s)"
+        )
+    return final, detener.is_set()
+
+
 st.sidebar.markdown("## 📥 Descarga de Propiedades")
 
 with st.sidebar.expander("Descargar de Internet", expanded=False):
@@ -1449,6 +1286,8 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
         
         if stop_download:
             st.session_state.scraper_stop_flag = True
+            if st.session_state.get("scraper_detener") is not None:
+                st.session_state.scraper_detener.set()
             st.session_state.scraper_running = False
             st.warning("⏹️ Detención solicitada... por favor espera")
         
@@ -1467,6 +1306,7 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
                 # Intentar importar scrapers
                 try:
                     from src.scrapers import ArgenpropScraper, BuscadorPropScraper, PropertyDatabase
+                    preparar_chromedriver()
                 except ImportError as ie:
                     status_container.error(f"❌ Error de importación: {ie}")
                     logger.error(f"Error importando scrapers: {ie}")
@@ -1474,59 +1314,28 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
                     st.stop()
                 
                 db = PropertyDatabase()
-                total_nuevas = 0
-                total_descargadas = 0
-                # Calcular total esperado de propiedades a descargar
-                total_esperado = limite * len(localidades_seleccionadas)
-                
-                for idx, localidad in enumerate(localidades_seleccionadas):
-                    # Verificar si se solicitó detener
-                    if st.session_state.scraper_stop_flag:
-                        status_container.warning(f"❌ Descarga detenida en {localidad}. {total_nuevas} propiedades agregadas")
-                        st.session_state.scraper_running = False
-                        break
-                    
-                    # Mostrar progreso de zona (antes de descargar)
-                    porcentaje_zona = (idx / len(localidades_seleccionadas)) * 100
-                    progress_container.progress(porcentaje_zona / 100.0, text=f"📍 Descargando **{localidad}**... ({idx + 1}/{len(localidades_seleccionadas)} zonas)")
-                    details_container.info(f"⏳ Buscando propiedades de {localidad}...")
-                    
-                    try:
-                        # Descargar propiedades
-                        logger.info(f"Iniciando descarga de {localidad}")
-                        props = BuscadorPropScraper.buscar_propiedades(zona=localidad, tipo=tipo_prop.lower(), limit=limite, debug=True, stop_flag=st.session_state)
-                        logger.info(f"Descargadas {len(props)} propiedades de {localidad}")
-                        
-                        # Mostrar contador durante descarga
-                        props_encontradas = len(props)
-                        total_descargadas += props_encontradas
-                        
-                        stats_container.metric(
-                            f"🏠 {localidad}",
-                            f"{props_encontradas} propiedades encontradas"
-                        )
-                        
-                        nuevas = db.agregar_propiedades(props)
-                        total_nuevas += nuevas
-                        
-                        # Actualizar detalles con información detallada
-                        details_container.success(
-                            f"✓ {localidad}: "
-                            f"**{props_encontradas}** encontradas → "
-                            f"**{nuevas}** nuevas agregadas | "
-                            f"Total acumulado: **{total_nuevas}**"
-                        )
-                    except Exception as zone_error:
-                        logger.error(f"Error descargando {localidad}: {zone_error}")
-                        details_container.warning(f"⚠️ {localidad}: {str(zone_error)}")
-                    
-                    # Actualizar barra DESPUÉS de descargar esta zona
-                    porcentaje_completado = ((idx + 1) / len(localidades_seleccionadas)) * 100
-                    progress_container.progress(porcentaje_completado / 100.0, text=f"✅ **{total_descargadas}** propiedades descargadas ({int(porcentaje_completado)}%)")
+                # Zonas en paralelo con un único escritor a la BD (ver src/orchestrator.py)
+                final, detenida = descargar_zonas(
+                    localidades_seleccionadas, tipo_prop, limite, progress_container, details_container, stats_container
+                )
+                total_nuevas = final.total_insertadas if final else 0
+                ids_descargados = final.ids if final else []
+                # Las zonas terminadas ya están en la BD aunque se haya detenido la descarga:
+                # se aplican al sistema en memoria (sin recargar modelo ni vector store) en ambos casos
+                if ids_descargados:
+                    sistema_busqueda.aplicar_cambios_bd(ids_descargados)
+                if final is not None and final.error:
+                    status_container.error(f"❌ Error guardando propiedades: {final.error}")
+                if detenida:
+                    st.session_state.scraper_stop_flag = True
+                    status_container.warning(f"❌ Descarga detenida. {total_nuevas} propiedades agregadas")
+                    st.session_state.scraper_running = False
                 
                 if not st.session_state.scraper_stop_flag:
                     status_container.success(f"✅ ¡Descarga completada!")
-                    db.guardar_csv("data/properties_expanded.csv")
+                    # Export incremental del CSV en un thread para no frenar la UI
+                    from src.export import exportar_en_segundo_plano
+                    exportar_en_segundo_plano(db.db_path, "data/properties_expanded.csv", incremental=True)
                     stats = db.obtener_estadisticas()
                     
                     # Mostrar resumen final
@@ -1540,9 +1349,6 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
                     
                     details_container.empty()
                     progress_container.progress(1.0)
-                    
-                    # Limpiar caché para recargar datos
-                    st.cache_resource.clear()
                     st.rerun()
                 
                 st.session_state.scraper_running = False
@@ -1585,6 +1391,8 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
         
         if stop_download_fb:
             st.session_state.scraper_stop_flag = True
+            if st.session_state.get("scraper_detener") is not None:
+                st.session_state.scraper_detener.set()
             st.session_state.scraper_running = False
             st.warning("⏹️ Detención solicitada... por favor espera")
         
@@ -1601,57 +1409,30 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
             
             try:
                 from src.scrapers import ArgenpropScraper, BuscadorPropScraper, PropertyDatabase
+                preparar_chromedriver()
                 db = PropertyDatabase()
-                total_nuevas = 0
-                total_descargadas = 0
-                # Calcular total esperado de propiedades a descargar
-                total_esperado = limite * len(zonas_seleccionadas)
-                
-                for idx, zona in enumerate(zonas_seleccionadas):
-                    # Verificar si se solicitó detener
-                    if st.session_state.scraper_stop_flag:
-                        status_container.warning(f"❌ Descarga detenida en {zona}. {total_nuevas} propiedades agregadas")
-                        st.session_state.scraper_running = False
-                        break
-                    
-                    # Mostrar progreso de zona (antes de descargar)
-                    porcentaje_zona = (idx / len(zonas_seleccionadas)) * 100
-                    progress_container.progress(porcentaje_zona / 100.0, text=f"📍 Descargando **{zona}**... ({idx + 1}/{len(zonas_seleccionadas)} zonas)")
-                    details_container.info(f"⏳ Buscando propiedades de {zona}...")
-                    
-                    try:
-                        # Descargar propiedades
-                        props = BuscadorPropScraper.buscar_propiedades(zona=zona, tipo=tipo_prop.lower(), limit=limite, debug=True, stop_flag=st.session_state)
-                        
-                        # Mostrar contador durante descarga
-                        props_encontradas = len(props)
-                        total_descargadas += props_encontradas
-                        
-                        stats_container.metric(
-                            f"🏠 {zona}",
-                            f"{props_encontradas} propiedades encontradas"
-                        )
-                        
-                        nuevas = db.agregar_propiedades(props)
-                        total_nuevas += nuevas
-                        
-                        # Actualizar detalles con información detallada
-                        details_container.success(
-                            f"✓ {zona}: "
-                            f"**{props_encontradas}** encontradas → "
-                            f"**{nuevas}** nuevas agregadas | "
-                            f"Total acumulado: **{total_nuevas}**"
-                        )
-                    except Exception as zone_error:
-                        details_container.warning(f"⚠️ {zona}: {str(zone_error)}")
-                    
-                    # Actualizar barra DESPUÉS de descargar esta zona
-                    porcentaje_completado = ((idx + 1) / len(zonas_seleccionadas)) * 100
-                    progress_container.progress(porcentaje_completado / 100.0, text=f"✅ **{total_descargadas}** propiedades descargadas ({int(porcentaje_completado)}%)")
+                # Zonas en paralelo con un único escritor a la BD (ver src/orchestrator.py)
+                final, detenida = descargar_zonas(
+                    zonas_seleccionadas, tipo_prop, limite, progress_container, details_container, stats_container
+                )
+                total_nuevas = final.total_insertadas if final else 0
+                ids_descargados = final.ids if final else []
+                # Las zonas terminadas ya están en la BD aunque se haya detenido la descarga:
+                # se aplican al sistema en memoria (sin recargar modelo ni vector store) en ambos casos
+                if ids_descargados:
+                    sistema_busqueda.aplicar_cambios_bd(ids_descargados)
+                if final is not None and final.error:
+                    status_container.error(f"❌ Error guardando propiedades: {final.error}")
+                if detenida:
+                    st.session_state.scraper_stop_flag = True
+                    status_container.warning(f"❌ Descarga detenida. {total_nuevas} propiedades agregadas")
+                    st.session_state.scraper_running = False
                 
                 if not st.session_state.scraper_stop_flag:
                     status_container.success(f"✅ ¡Descarga completada!")
-                    db.guardar_csv("data/properties_expanded.csv")
+                    # Export incremental del CSV en un thread para no frenar la UI
+                    from src.export import exportar_en_segundo_plano
+                    exportar_en_segundo_plano(db.db_path, "data/properties_expanded.csv", incremental=True)
                     stats = db.obtener_estadisticas()
                     
                     # Mostrar resumen final
@@ -1665,9 +1446,6 @@ with st.sidebar.expander("Descargar de Internet", expanded=False):
                     
                     details_container.empty()
                     progress_container.progress(1.0)
-                    
-                    # Limpiar caché para recargar datos
-                    st.cache_resource.clear()
                     st.rerun()
                 
                 st.session_state.scraper_running = False
@@ -1703,6 +1481,7 @@ with st.sidebar.expander("Ver Propiedades Marcadas", expanded=False):
         st.metric("👎 No Me Interesa", len(negativos))
     
     # Mostrar detalles de propiedades marcadas
+    from src.search_index import hidratar
     if positivos or negativos:
         st.markdown("### 👍 Propiedades de Interés")
         if positivos:
@@ -1712,9 +1491,9 @@ with st.sidebar.expander("Ver Propiedades Marcadas", expanded=False):
                 try:
                     # Obtener info de la propiedad desde el DataFrame
                     if not df_propiedades.empty:
-                        prop_info = df_propiedades[df_propiedades['id'] == prop_id]
-                        if not prop_info.empty:
-                            prop = prop_info.iloc[0]
+                        prop_info = hidratar(df_propiedades, indice_ids, [prop_id])
+                        if prop_info:
+                            prop = prop_info[0]
                             st.caption(f"🏠 **{prop.get('tipo', 'Propiedad')}** - {prop.get('zona', 'N/A')}")
                             st.caption(f"💰 {prop.get('precio', 'N/A')}")
                 except:
@@ -1729,9 +1508,9 @@ with st.sidebar.expander("Ver Propiedades Marcadas", expanded=False):
                 prop_id = fb.get('propiedad_id')
                 try:
                     if not df_propiedades.empty:
-                        prop_info = df_propiedades[df_propiedades['id'] == prop_id]
-                        if not prop_info.empty:
-                            prop = prop_info.iloc[0]
+                        prop_info = hidratar(df_propiedades, indice_ids, [prop_id])
+                        if prop_info:
+                            prop = prop_info[0]
                             st.caption(f"🏠 **{prop.get('tipo', 'Propiedad')}** - {prop.get('zona', 'N/A')}")
                             st.caption(f"💰 {prop.get('precio', 'N/A')}")
                 except:
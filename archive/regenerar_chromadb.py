@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 """Regenera ChromaDB con las propiedades normalizadas de la BD"""
 
+import os
+import sys
+
 import chromadb
 import sqlite3
-from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.config import EMBEDDINGS_MODEL
+from src.embedding_backends import cargar_modelo, identificador_modelo
+from src.embedding_cache import EmbeddingCache
 
 def main():
     # Conectar a ChromaDB con almacenamiento persistente
@@ -40,7 +47,7 @@ def main():
     
     # Crear colección y cargar embeddings
     collection = client.get_or_create_collection("propiedades")
-    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+    model = cargar_modelo(EMBEDDINGS_MODEL)
     
     ids = []
     documents = []
@@ -61,11 +68,13 @@ def main():
             "url": url
         })
     
-    # Agregar a ChromaDB
+    # Agregar a ChromaDB (los textos ya embebidos se leen del cache en disco)
     print("Generando embeddings...")
+    embeddings = EmbeddingCache(modelo=identificador_modelo(EMBEDDINGS_MODEL)).codificar(documents, model)
     collection.add(
         ids=ids,
         documents=documents,
+        embeddings=embeddings.tolist(),
         metadatas=metadatas
     )
     
@@ -87,7 +96,7 @@ def main():
         print("-" * 70)
         
         results = collection.query(
-            query_texts=[query],
+            query_embeddings=model.encode([query]).tolist(),
             n_results=3
         )
         
@@ -0,0 +1,53 @@
+"""
+background_loader.py - Ejecución de una carga pesada en un thread con estado consultable
+La UI se dibuja enseguida y consulta `listo` / `etapa` en cada rerun en lugar de
+bloquear el primer render esperando el modelo y la base vectorial.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CargaEnSegundoPlano:
+    """
+    Corre `funcion(reportar)` en un thread daemon.
+
+    `funcion` recibe un callback `reportar(etapa)` para informar en qué paso
+    está; el resultado (o la excepción) queda disponible al terminar.
+    """
+
+    def __init__(self, funcion: Callable[[Callable[[str], None]], Any], nombre: str = "carga-sistema"):
+        self.etapa = "Iniciando..."
+        self.resultado: Any = None
+        self.error: Optional[BaseException] = None
+        self.inicio = time.monotonic()
+        self.duracion: Optional[float] = None
+        self._terminado = threading.Event()
+        self._thread = threading.Thread(target=self._correr, args=(funcion,), name=nombre, daemon=True)
+        self._thread.start()
+
+    @property
+    def listo(self) -> bool:
+        return self._terminado.is_set()
+
+    def reportar(self, etapa: str) -> None:
+        self.etapa = etapa
+        logger.info(f"⏳ {etapa}")
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que termine (o venza `timeout`); devuelve si terminó."""
+        return self._terminado.wait(timeout)
+
+    def _correr(self, funcion):
+        try:
+            self.resultado = funcion(self.reportar)
+        except BaseException as e:
+            logger.error(f"Error en carga en segundo plano: {e}", exc_info=True)
+            self.error = e
+        finally:
+            self.duracion = time.monotonic() - self.inicio
+            self._terminado.set()
@@ -24,12 +24,31 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama2")
 # ==================== CONFIGURACIÓN RAG ====================
 VECTOR_DB_TYPE = "chromadb"  # Futuro: "milvus", "pinecone"
 EMBEDDINGS_MODEL = "all-MiniLM-L6-v2"  # sentence-transformers
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "torch")  # torch | onnx | int8 (ver src/embedding_backends.py)
 K_RETRIEVAL = 3  # Número de documentos a recuperar
+CHROMA_BATCH_SIZE = int(os.getenv("CHROMA_BATCH_SIZE", "1000"))  # Documentos por add/upsert en ChromaDB
+EMBEDDINGS_CACHE_PATH = os.getenv("EMBEDDINGS_CACHE_PATH", "./data/embeddings_cache")  # Cache de embeddings en disco
+EMBEDDINGS_CACHE_MAX = int(os.getenv("EMBEDDINGS_CACHE_MAX", "200000"))  # Vectores por modelo antes de compactar
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "./data/snapshot")  # Snapshot del sistema cargado (arranque en caliente)
+FILTRO_MIN_RESULTADOS = int(os.getenv("FILTRO_MIN_RESULTADOS", "5"))  # Hits con todos los filtros antes de relajarlos
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))  # Queries con resultados cacheados
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "900"))  # Segundos de vida de cada entrada
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))  # Embeddings de queries en memoria
+ENCODE_BATCH_WINDOW_MS = float(os.getenv("ENCODE_BATCH_WINDOW_MS", "5"))  # Ventana para agrupar queries concurrentes
+EMBEDDINGS_SERVICE_URL = os.getenv("EMBEDDINGS_SERVICE_URL", "")  # Servicio de embeddings compartido (vacío = modelo local)
 
 # ==================== CONFIGURACIÓN DE DATOS ====================
 DATA_PATH = "properties.csv"
 VECTOR_STORE_PATH = "./data/vector_store"
 
+# ==================== CONFIGURACIÓN DE SCRAPING ====================
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))  # Navegadores headless reutilizados por los scrapers
+DRIVER_MAX_PAGINAS = int(os.getenv("DRIVER_MAX_PAGINAS", "50"))  # Usos antes de reciclar un navegador
+DETALLES_WORKERS = int(os.getenv("DETALLES_WORKERS", str(DRIVER_POOL_SIZE)))  # Páginas de detalle en paralelo
+RATE_LIMIT_POR_HOST = float(os.getenv("RATE_LIMIT_POR_HOST", "1.0"))  # Pedidos por segundo a cada portal
+RATE_LIMIT_RAFAGA = int(os.getenv("RATE_LIMIT_RAFAGA", "2"))  # Pedidos seguidos permitidos antes de espaciar
+ORQUESTADOR_WORKERS = int(os.getenv("ORQUESTADOR_WORKERS", "3"))  # Zonas descargadas en paralelo
+
 # ==================== CONFIGURACIÓN DE APIs EXTERNAS ====================
 # Para Fase 3: Tool Use
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
@@ -0,0 +1,209 @@
+"""
+driver_pool.py - Pool de navegadores Chrome headless compartido por los scrapers
+Arrancar Chrome (y resolver el ChromeDriver) tarda varios segundos; el pool
+mantiene hasta DRIVER_POOL_SIZE drivers vivos y los presta con un context manager.
+Un driver se recicla después de DRIVER_MAX_PAGINAS usos o si deja de responder.
+
+Uso:
+    with obtener_pool().driver() as driver:
+        driver.get(url)
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from src.config import DRIVER_MAX_PAGINAS, DRIVER_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Chromium del sistema (Streamlit Cloud y otros entornos sin Chrome)
+CHROMIUM_PATHS = [
+    "/usr/bin/chromium-browser",  # Streamlit Cloud (antiguo)
+    "/usr/bin/chromium",          # Streamlit Cloud (actual)
+    "/snap/bin/chromium",
+    "/Applications/Chromium.app/Contents/MacOS/Chromium",  # macOS
+    "C:\\Program Files\\Chromium\\Application\\chrome.exe",  # Windows
+]
+
+
+def _binario_chromium() -> Optional[str]:
+    for path in CHROMIUM_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def opciones_chrome(user_agent: Optional[str] = None):
+    """Opciones headless comunes a todos los scrapers."""
+    from selenium.webdriver.chrome.options import Options
+
+    from src.scrapers import USER_AGENTS
+
+    opts = Options()
+    opts.add_argument("--headless")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--window-size=1920,1080")
+    opts.add_argument("--disable-blink-features=AutomationControlled")  # Evitar detección de version en Chrome
+    opts.add_argument("user-agent=" + (user_agent or random.choice(USER_AGENTS)))
+    chromium_binary = _binario_chromium()
+    if chromium_binary:
+        logger.debug(f"Detectado Chromium en: {chromium_binary}")
+        opts.binary_location = chromium_binary
+    return opts
+
+
+@lru_cache(maxsize=1)
+def _ruta_chromedriver() -> str:
+    """ChromeDriver de webdriver-manager, resuelto una sola vez por proceso."""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    ruta = ChromeDriverManager().install()
+    logger.debug(f"ChromeDriver instalado en: {ruta}")
+    return ruta
+
+
+def crear_driver(user_agent: Optional[str] = None):
+    """
+    Inicia un Chrome headless. Primero sin webdriver-manager (más rápido, evita
+    version mismatch) y si falla con el ChromeDriver que descarga el manager.
+    """
+    from selenium import webdriver
+
+    opts = opciones_chrome(user_agent)
+    try:
+        return webdriver.Chrome(options=opts)
+    except Exception as direct_error:
+        logger.debug(f"Chrome directo falló ({str(direct_error)[:100]}), intentando con webdriver-manager...")
+        from selenium.webdriver.chrome.service import Service
+
+        return webdriver.Chrome(service=Service(_ruta_chromedriver()), options=opts)
+
+
+def _responde(driver) -> bool:
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _cerrar(driver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class _DriverEnPool:
+    def __init__(self, driver):
+        self.driver = driver
+        self.usos = 0
+
+
+class PoolDrivers:
+    """
+    Pool acotado de drivers. Se crean a demanda hasta `tamano` y se reutilizan;
+    si están todos prestados, driver() espera a que se libere uno.
+    """
+
+    def __init__(self, tamano: int = DRIVER_POOL_SIZE, max_paginas: int = DRIVER_MAX_PAGINAS,
+                 fabrica: Optional[Callable] = None):
+        self.tamano = max(1, tamano)
+        self.max_paginas = max(1, max_paginas)
+        self._fabrica = fabrica or crear_driver
+        self._libres: List[_DriverEnPool] = []
+        self._creados = 0
+        self._cerrado = False
+        self._cond = threading.Condition()
+        self.creados = self.reciclados = self.descartados = self.usos = 0
+
+    def _tomar(self, timeout: Optional[float]) -> _DriverEnPool:
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise RuntimeError("El pool de drivers está cerrado")
+                if self._libres:
+                    return self._libres.pop()
+                if self._creados < self.tamano:
+                    self._creados += 1
+                    break
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("No se liberó ningún driver del pool a tiempo")
+        # Chrome se inicia fuera del lock para no frenar a los que devuelven drivers
+        try:
+            entrada = _DriverEnPool(self._fabrica())
+        except BaseException:
+            with self._cond:
+                self._creados -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.creados += 1
+        logger.info(f"🌐 Driver de Chrome iniciado ({self._creados}/{self.tamano} en el pool)")
+        return entrada
+
+    def _devolver(self, entrada: _DriverEnPool) -> None:
+        entrada.usos += 1
+        sano = _responde(entrada.driver)
+        with self._cond:
+            self.usos += 1
+            conservar = sano and not self._cerrado and entrada.usos < self.max_paginas
+            if conservar:
+                self._libres.append(entrada)
+            else:
+                self._creados -= 1
+                if sano:
+                    self.reciclados += 1
+                else:
+                    self.descartados += 1
+            self._cond.notify()
+        if not conservar:
+            if not sano:
+                logger.warning("Driver de Chrome sin respuesta, se descarta")
+            _cerrar(entrada.driver)
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """Presta un driver; al salir vuelve al pool (o se cierra si se cayó o llegó al máximo de usos)."""
+        entrada = self._tomar(timeout)
+        try:
+            yield entrada.driver
+        finally:
+            self._devolver(entrada)
+
+    def cerrar(self) -> None:
+        """Cierra los drivers libres; los prestados se cierran al devolverse."""
+        with self._cond:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+            self._creados -= len(libres)
+            self._cond.notify_all()
+        for entrada in libres:
+            _cerrar(entrada.driver)
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._cond:
+            return {"vivos": self._creados, "libres": len(self._libres), "creados": self.creados,
+                    "reciclados": self.reciclados, "descartados": self.descartados, "usos": self.usos}
+
+
+_pool: Optional[PoolDrivers] = None
+_lock_pool = threading.Lock()
+
+
+def obtener_pool() -> PoolDrivers:
+    """Pool compartido del proceso (se cierra al salir)."""
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = PoolDrivers()
+            atexit.register(_pool.cerrar)
+        return _pool
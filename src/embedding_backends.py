@@ -0,0 +1,70 @@
+"""
+embedding_backends.py - Backends de inferencia para el modelo de embeddings
+Se elige con EMBEDDINGS_BACKEND en config:
+    torch -> SentenceTransformer en PyTorch float32 (referencia)
+    onnx  -> SentenceTransformer sobre ONNX Runtime (requiere requirements-onnx.txt)
+    int8  -> PyTorch con cuantización dinámica int8 de las capas Linear (solo CPU)
+"""
+
+import logging
+
+import numpy as np
+
+from src.config import EMBEDDINGS_BACKEND, EMBEDDINGS_MODEL
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "int8")
+
+
+def identificador_modelo(modelo: str = EMBEDDINGS_MODEL, backend: str = EMBEDDINGS_BACKEND) -> str:
+    """
+    Nombre para el cache de embeddings: cada backend produce vectores levemente
+    distintos, así que no comparten cache con el de referencia.
+    """
+    return modelo if backend == "torch" else f"{modelo}@{backend}"
+
+
+def cargar_modelo(modelo: str = EMBEDDINGS_MODEL, backend: str = EMBEDDINGS_BACKEND):
+    """
+    Carga el modelo con el backend pedido. Si ese backend no está disponible se
+    lanza el error en lugar de usar otro: identificador_modelo(modelo, backend)
+    tiene que describir los vectores que realmente produce el modelo.
+    El backend cargado queda en `model.backend_embeddings`.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embeddings desconocido '{backend}' (opciones: {', '.join(BACKENDS)})")
+
+    if backend == "onnx":
+        try:
+            model = SentenceTransformer(modelo, backend="onnx")
+        except Exception as e:
+            raise RuntimeError(
+                f"No se pudo cargar {modelo} con ONNX ({e}). Instalá requirements-onnx.txt "
+                f"(sentence-transformers[onnx]) o usá EMBEDDINGS_BACKEND=torch"
+            ) from e
+        logger.info(f"✅ Modelo {modelo} cargado con ONNX Runtime")
+    else:
+        model = SentenceTransformer(modelo, device="cpu" if backend == "int8" else None)
+
+    if backend == "int8":
+        try:
+            import torch
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            raise RuntimeError(f"No se pudo cuantizar {modelo} a int8 ({e}). Usá EMBEDDINGS_BACKEND=torch") from e
+        logger.info(f"✅ Modelo {modelo} cuantizado a int8 (dinámico)")
+
+    model.backend_embeddings = backend
+    return model
+
+
+def similitud_coseno(a, b) -> np.ndarray:
+    """Similitud coseno fila a fila entre dos matrices de embeddings."""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    normas = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.sum(a * b, axis=1) / np.maximum(normas, 1e-12)
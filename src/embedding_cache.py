@@ -0,0 +1,225 @@
+"""
+embedding_cache.py - Cache persistente de embeddings direccionado por contenido
+Clave: (modelo, sha1 del texto). Cada texto se embebe una sola vez por modelo.
+
+Estructura en disco (un directorio por modelo):
+    meta.json       -> {"modelo": ..., "dim": ...}
+    hashes.txt      -> un hash por línea, en el orden de las filas de la matriz
+    embeddings.f32  -> matriz float32 (n x dim), se lee con np.memmap
+    cache.lock      -> flock compartido entre procesos (réplicas de la app)
+    compactando     -> existe solo mientras se reescriben matriz e índice
+
+Las escrituras toman el flock exclusivo y releen el estado del disco antes de
+agregar, así varios procesos pueden compartir el mismo cache. Al superar
+EMBEDDINGS_CACHE_MAX vectores se compacta conservando los más recientes.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import EMBEDDINGS_CACHE_MAX, EMBEDDINGS_CACHE_PATH, EMBEDDINGS_MODEL
+from src.vector_sync import hash_texto
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se sincronizan los threads del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Cache de embeddings en disco (matriz float32 memory-mapped + índice de hashes)."""
+
+    def __init__(self, directorio: str = EMBEDDINGS_CACHE_PATH, modelo: str = EMBEDDINGS_MODEL,
+                 max_entradas: int = EMBEDDINGS_CACHE_MAX):
+        self.modelo = modelo
+        self.max_entradas = max(1, max_entradas)
+        self.directorio = os.path.join(directorio, re.sub(r"[^A-Za-z0-9_.-]+", "_", modelo))
+        self._ruta_meta = os.path.join(self.directorio, "meta.json")
+        self._ruta_hashes = os.path.join(self.directorio, "hashes.txt")
+        self._ruta_matriz = os.path.join(self.directorio, "embeddings.f32")
+        self._ruta_lock = os.path.join(self.directorio, "cache.lock")
+        self._ruta_compactando = os.path.join(self.directorio, "compactando")
+        self._lock = threading.Lock()
+        self._posiciones: Dict[str, int] = {}
+        self._dim = None
+        self._matriz = None
+        self._cargar()
+
+    def __len__(self) -> int:
+        return len(self._posiciones)
+
+    @contextmanager
+    def _lock_archivo(self, exclusivo: bool):
+        """flock sobre cache.lock: compartido para leer, exclusivo para escribir."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self._ruta_lock, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _cargar(self):
+        """Carga el índice y mapea la matriz (tolera escrituras interrumpidas)."""
+        if not os.path.exists(self._ruta_meta):
+            return
+        with self._lock_archivo(exclusivo=False):
+            self._leer_disco()
+        if self._posiciones:
+            logger.info(f"Cache de embeddings cargado: {len(self._posiciones)} vectores ({self.modelo})")
+
+    def _leer_disco(self):
+        """Estado del cache según el disco (con el flock tomado)."""
+        try:
+            if os.path.exists(self._ruta_compactando):
+                raise ValueError("compactación interrumpida")
+            if not os.path.exists(self._ruta_meta):
+                self._posiciones, self._matriz = {}, None
+                return
+            with open(self._ruta_meta, encoding="utf-8") as f:
+                self._dim = int(json.load(f)["dim"])
+            hashes = []
+            if os.path.exists(self._ruta_hashes):
+                with open(self._ruta_hashes, encoding="utf-8") as f:
+                    hashes = f.read().split()
+            filas = os.path.getsize(self._ruta_matriz) // (4 * self._dim) if os.path.exists(self._ruta_matriz) else 0
+            hashes = hashes[:filas]
+            self._posiciones = {h: i for i, h in enumerate(hashes)}
+            self._mapear(len(hashes))
+        except Exception as e:
+            logger.warning(f"Cache de embeddings ilegible, se ignora: {e}")
+            self._posiciones, self._dim, self._matriz = {}, None, None
+
+    def _mapear(self, filas: int):
+        if filas:
+            self._matriz = np.memmap(self._ruta_matriz, dtype=np.float32, mode="r", shape=(filas, self._dim))
+        else:
+            self._matriz = None
+
+    def _escribir_indice(self):
+        # El índice se reescribe de forma atómica para que nunca quede desalineado con la matriz
+        tmp = self._ruta_hashes + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(f"{h}\n" for h in self._posiciones))
+        os.replace(tmp, self._ruta_hashes)
+
+    def _agregar(self, hashes: List[str], vectores: np.ndarray):
+        """Agrega al final de la matriz y del índice los vectores que ningún otro proceso agregó ya."""
+        os.makedirs(self.directorio, exist_ok=True)
+        with self._lock_archivo(exclusivo=True):
+            # Otro proceso pudo agregar filas (o compactar) desde la última lectura
+            self._leer_disco()
+            if os.path.exists(self._ruta_compactando):
+                self._limpiar_disco()
+            if self._dim is None:
+                self._dim = int(vectores.shape[1])
+                with open(self._ruta_meta, "w", encoding="utf-8") as f:
+                    json.dump({"modelo": self.modelo, "dim": self._dim}, f)
+            nuevos = [i for i, h in enumerate(hashes) if h not in self._posiciones]
+            if nuevos:
+                # Truncar filas huérfanas de una escritura interrumpida antes de agregar
+                filas = len(self._posiciones)
+                with open(self._ruta_matriz, "ab") as f:
+                    f.truncate(filas * 4 * self._dim)
+                    f.write(np.ascontiguousarray(vectores[nuevos], dtype=np.float32).tobytes())
+                for i in nuevos:
+                    self._posiciones[hashes[i]] = len(self._posiciones)
+                self._escribir_indice()
+            self._mapear(len(self._posiciones))
+            if len(self._posiciones) > self.max_entradas:
+                self._compactar(self.max_entradas)
+
+    def _limpiar_disco(self):
+        """Descarta un cache que quedó a medio compactar."""
+        for ruta in (self._ruta_matriz, self._ruta_hashes, self._ruta_compactando):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        self._posiciones, self._matriz = {}, None
+
+    def _compactar(self, conservar: int):
+        """Reescribe matriz e índice con los `conservar` vectores más recientes (con el flock exclusivo)."""
+        hashes = list(self._posiciones)[-conservar:] if conservar else []
+        desde = len(self._posiciones) - len(hashes)
+        vectores = np.array(self._matriz[desde:]) if hashes else np.zeros((0, self._dim), dtype=np.float32)
+        # La marca invalida el cache si el proceso muere entre el reemplazo de la matriz y el del índice
+        open(self._ruta_compactando, "w").close()
+        tmp = self._ruta_matriz + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(vectores, dtype=np.float32).tobytes())
+        os.replace(tmp, self._ruta_matriz)
+        self._posiciones = {h: i for i, h in enumerate(hashes)}
+        self._escribir_indice()
+        os.remove(self._ruta_compactando)
+        self._mapear(len(hashes))
+        logger.info(f"🧹 Cache de embeddings compactado: {desde} vectores descartados ({self.modelo})")
+
+    def compactar(self, max_entradas: Optional[int] = None) -> int:
+        """Deja el cache en `max_entradas` vectores (los más recientes). Devuelve cuántos descartó."""
+        limite = self.max_entradas if max_entradas is None else max(0, max_entradas)
+        with self._lock:
+            if not os.path.exists(self._ruta_meta):
+                return 0
+            with self._lock_archivo(exclusivo=True):
+                self._leer_disco()
+                sobrantes = len(self._posiciones) - limite
+                if sobrantes <= 0:
+                    return 0
+                self._compactar(limite)
+                return sobrantes
+
+    def codificar(self, textos: Sequence[str], model) -> np.ndarray:
+        """
+        Devuelve los embeddings de `textos`, calculando solo los que no están en cache.
+
+        Args:
+            textos: Textos a embeber
+            model: Modelo con método encode() (SentenceTransformer)
+
+        Returns:
+            np.ndarray float32 (len(textos) x dim)
+        """
+        hashes = [hash_texto(t) for t in textos]
+        with self._lock:
+            faltantes: Dict[str, str] = {}
+            for h, t in zip(hashes, textos):
+                if h not in self._posiciones and h not in faltantes:
+                    faltantes[h] = t
+            if faltantes:
+                logger.info(f"Cache de embeddings: {len(textos) - len(faltantes)} hits, {len(faltantes)} a calcular")
+                vectores = np.asarray(model.encode(list(faltantes.values())), dtype=np.float32)
+                self._agregar(list(faltantes.keys()), vectores)
+            if not hashes:
+                return np.zeros((0, self._dim or 0), dtype=np.float32)
+            # Con un lote más grande que el límite, la compactación pudo descartar parte de lo pedido
+            if any(h not in self._posiciones for h in hashes):
+                return np.asarray(model.encode(list(textos)), dtype=np.float32)
+            return np.asarray(self._matriz[[self._posiciones[h] for h in hashes]])
+
+    def envolver(self, model) -> "ModeloConCache":
+        """Adaptador con la misma interfaz encode() que el modelo, respaldado por el cache."""
+        return ModeloConCache(model, self)
+
+
+class ModeloConCache:
+    """Expone encode() como SentenceTransformer, pero resolviendo desde EmbeddingCache."""
+
+    def __init__(self, model, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def encode(self, textos, **kwargs) -> np.ndarray:
+        if isinstance(textos, str):
+            return self.cache.codificar([textos], self.model)[0]
+        return self.cache.codificar(list(textos), self.model)
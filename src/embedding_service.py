@@ -0,0 +1,162 @@
+"""
+embedding_service.py - Servicio local de embeddings compartido entre procesos de la app
+Carga el modelo una sola vez y atiende pedidos de encode por HTTP en localhost
+(solo stdlib). Varias réplicas de Streamlit en la misma máquina apuntan a él con
+EMBEDDINGS_SERVICE_URL en lugar de cargar cada una su propio SentenceTransformer.
+
+Uso:
+    python -m src.embedding_service --port 8765
+    EMBEDDINGS_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import argparse
+import json
+import logging
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+from src.config import EMBEDDINGS_BACKEND, EMBEDDINGS_MODEL, EMBEDDINGS_SERVICE_URL
+
+logger = logging.getLogger(__name__)
+
+# Textos por pedido HTTP al codificar listas grandes (ingesta masiva)
+LOTE_CLIENTE = 256
+
+
+class ClienteEmbeddings:
+    """Cliente del servicio con la misma interfaz encode() que SentenceTransformer."""
+
+    def __init__(self, url: str = EMBEDDINGS_SERVICE_URL, timeout: float = 60.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.modelo = None
+
+    def _pedir(self, ruta: str, payload=None) -> dict:
+        datos = json.dumps(payload).encode("utf-8") if payload is not None else None
+        pedido = urllib.request.Request(
+            self.url + ruta, data=datos, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(pedido, timeout=self.timeout) as respuesta:
+            return json.loads(respuesta.read().decode("utf-8"))
+
+    def salud(self) -> dict:
+        """Estado del servicio: {"ok": True, "modelo": ..., "dim": ...}."""
+        estado = self._pedir("/health")
+        self.modelo = estado.get("modelo")
+        return estado
+
+    def encode(self, textos, **kwargs) -> np.ndarray:
+        if isinstance(textos, str):
+            return self.encode([textos])[0]
+        textos = list(textos)
+        partes = []
+        for desde in range(0, len(textos), LOTE_CLIENTE):
+            respuesta = self._pedir("/encode", {"textos": textos[desde:desde + LOTE_CLIENTE]})
+            partes.append(np.asarray(respuesta["embeddings"], dtype=np.float32))
+        if not partes:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(partes)
+
+
+def crear_servidor(model, host: str = "127.0.0.1", port: int = 8765, nombre_modelo: str = EMBEDDINGS_MODEL,
+                   backend: str = EMBEDDINGS_BACKEND):
+    """
+    Servidor HTTP multi-thread sobre un modelo ya cargado.
+
+    Los pedidos de un solo texto (queries) pasan por CodificadorQueries, que los
+    cachea y agrupa en micro-lotes; las listas (ingesta) se codifican directo.
+    """
+    from src.query_embeddings import CodificadorQueries
+
+    codificador = CodificadorQueries(model)
+    dim = int(np.asarray(model.encode(["warmup"])).shape[1])
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, codigo: int, cuerpo: dict):
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._responder(200, {"ok": True, "modelo": nombre_modelo, "backend": backend, "dim": dim,
+                                      "cache": codificador.estadisticas()})
+            else:
+                self._responder(404, {"error": "ruta desconocida"})
+
+        def do_POST(self):
+            if self.path != "/encode":
+                self._responder(404, {"error": "ruta desconocida"})
+                return
+            try:
+                largo = int(self.headers.get("Content-Length", 0))
+                textos: List[str] = json.loads(self.rfile.read(largo).decode("utf-8"))["textos"]
+                if len(textos) == 1:
+                    vectores = codificador.encode(textos)
+                else:
+                    vectores = np.asarray(model.encode(textos), dtype=np.float32)
+                self._responder(200, {"embeddings": np.asarray(vectores).tolist()})
+            except Exception as e:
+                logger.error(f"Error en /encode: {e}")
+                self._responder(400, {"error": str(e)})
+
+        def log_message(self, formato, *args):
+            logger.debug(formato % args)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def obtener_modelo_embeddings(modelo: str = EMBEDDINGS_MODEL, url: str = EMBEDDINGS_SERVICE_URL,
+                              backend: str = EMBEDDINGS_BACKEND):
+    """
+    Modelo con interfaz encode(): el servicio compartido si está configurado y
+    responde con el mismo modelo y backend, o el modelo local en caso contrario.
+    """
+    from src.embedding_backends import cargar_modelo
+
+    if url:
+        cliente = ClienteEmbeddings(url)
+        try:
+            estado = cliente.salud()
+            servido = (estado.get("modelo"), estado.get("backend", "torch"))
+            if servido == (modelo, backend):
+                logger.info(f"✅ Usando servicio de embeddings en {url} ({modelo}, {backend})")
+                return cliente
+            logger.warning(f"Servicio en {url} sirve {servido}, se esperaba {(modelo, backend)}. Cargando local")
+        except Exception as e:
+            logger.warning(f"Servicio de embeddings no disponible en {url}: {e}. Cargando modelo local")
+
+    return cargar_modelo(modelo, backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de embeddings")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modelo", default=EMBEDDINGS_MODEL)
+    parser.add_argument("--backend", default=EMBEDDINGS_BACKEND)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from src.embedding_backends import cargar_modelo
+
+    logger.info(f"Cargando modelo {args.modelo} ({args.backend})...")
+    model = cargar_modelo(args.modelo, args.backend)
+    servidor = crear_servidor(model, args.host, args.port, args.modelo, args.backend)
+    logger.info(f"🚀 Servicio de embeddings escuchando en http://{args.host}:{args.port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+export.py - Exportación de la tabla de propiedades en streaming
+Lee la BD en lotes con un cursor (fetchmany) y escribe cada lote a medida que
+llega, así la memoria no crece con el tamaño de la tabla. Soporta:
+    - CSV completo (se escribe aparte y se reemplaza de forma atómica)
+    - CSV incremental: solo agrega las filas con rowid posterior a la marca de la
+      última exportación (guardada en <destino>.marca). El rowid de una fila nueva
+      se asigna al escribirla y las escrituras están serializadas, así que crece en
+      el orden de los commits; fecha_agregado es la hora del scraping y no sirve de cursor
+    - Parquet con proyección de columnas (requiere pyarrow)
+Las exportaciones pueden correr en un thread con exportar_en_segundo_plano().
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from src.background_loader import CargaEnSegundoPlano
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 5000
+
+# Una exportación a la vez por archivo de destino
+_locks_destino: Dict[str, threading.Lock] = {}
+_lock_registro = threading.Lock()
+
+
+def _lock_de(destino: str) -> threading.Lock:
+    with _lock_registro:
+        return _locks_destino.setdefault(os.path.abspath(destino), threading.Lock())
+
+
+def _columnas_tabla(conn) -> Dict[str, str]:
+    """{columna: tipo declarado} de la tabla propiedades, en orden."""
+    return {row[1]: (row[2] or "").upper() for row in conn.execute("PRAGMA table_info(propiedades)")}
+
+
+def _proyeccion(conn, columnas: Optional[Sequence[str]]) -> List[str]:
+    disponibles = _columnas_tabla(conn)
+    if not columnas:
+        return list(disponibles)
+    desconocidas = [c for c in columnas if c not in disponibles]
+    if desconocidas:
+        raise ValueError(f"Columnas inexistentes en propiedades: {desconocidas}")
+    return list(columnas)
+
+
+def iterar_lotes(db_path: str, columnas: Optional[Sequence[str]] = None, desde_rowid: Optional[int] = None,
+                 hasta_rowid: Optional[int] = None, tamano_lote: int = TAMANO_LOTE) -> Iterator[List[tuple]]:
+    """
+    Filas de propiedades en lotes de `tamano_lote` tuplas (en el orden de `columnas`).
+
+    Con `desde_rowid` / `hasta_rowid`, solo las de rowid en (desde, hasta], en orden
+    de rowid (recorre la clave primaria).
+    """
+    from src.scrapers import PropertyDatabase
+
+    conn = PropertyDatabase(db_path=db_path)._conectar()
+    columnas = _proyeccion(conn, columnas)
+    sql = f"SELECT {', '.join(columnas)} FROM propiedades"
+    condiciones, parametros = [], []
+    if desde_rowid is not None:
+        condiciones.append("rowid > ?")
+        parametros.append(int(desde_rowid))
+    if hasta_rowid is not None:
+        condiciones.append("rowid <= ?")
+        parametros.append(int(hasta_rowid))
+    if condiciones:
+        sql += f" WHERE {' AND '.join(condiciones)} ORDER BY rowid"
+    cursor = conn.execute(sql, parametros)
+    try:
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            yield filas
+    finally:
+        cursor.close()
+
+
+def _leer_marca(destino: str) -> Optional[Dict]:
+    try:
+        with open(destino + ".marca", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _guardar_marca(destino: str, marca: Dict) -> None:
+    tmp = destino + ".marca.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(marca, f)
+    os.replace(tmp, destino + ".marca")
+
+
+def _max_rowid(db_path: str) -> Optional[int]:
+    from src.scrapers import PropertyDatabase
+
+    conn = PropertyDatabase(db_path=db_path)._conectar()
+    return conn.execute("SELECT MAX(rowid) FROM propiedades").fetchone()[0]
+
+
+def exportar_csv(db_path: str, destino: str, columnas: Optional[Sequence[str]] = None,
+                 incremental: bool = False, tamano_lote: int = TAMANO_LOTE) -> Dict:
+    """
+    Exporta propiedades a CSV en streaming.
+
+    Con `incremental=True` agrega al final del CSV solo las filas nuevas desde la
+    marca anterior; si no hay CSV o marca válidos (o cambiaron las columnas) hace
+    una exportación completa. Las filas actualizadas después de exportadas no se
+    reescriben (el incremental es solo de agregado).
+
+    Returns:
+        Dict con destino, filas (escritas en esta corrida), incremental y marca
+    """
+    with _lock_de(destino):
+        from src.scrapers import PropertyDatabase
+
+        columnas = _proyeccion(PropertyDatabase(db_path=db_path)._conectar(), columnas)
+        # La marca se toma antes de leer: lo que se agregue durante la exportación entra en la próxima
+        marca_nueva = _max_rowid(db_path)
+        marca = _leer_marca(destino) if incremental else None
+        # Una marca sin rowid (formato anterior, por fecha) fuerza una exportación completa
+        agregar = bool(marca and marca.get("rowid") is not None and os.path.exists(destino)
+                       and marca.get("columnas") == columnas)
+        desde = marca["rowid"] if agregar else None
+
+        directorio = os.path.dirname(destino)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        ruta = destino if agregar else destino + ".tmp"
+        filas = 0
+        with open(ruta, "a" if agregar else "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f, lineterminator="\n")
+            if not agregar:
+                escritor.writerow(columnas)
+            for lote in iterar_lotes(db_path, columnas, desde, marca_nueva, tamano_lote):
+                escritor.writerows(lote)
+                filas += len(lote)
+        if not agregar:
+            os.replace(ruta, destino)
+
+        # Con la tabla vacía se conserva la marca anterior
+        marca_nueva = marca_nueva if marca_nueva is not None else (desde or 0)
+        _guardar_marca(destino, {"rowid": marca_nueva, "columnas": columnas})
+        logger.info(f"📤 {'Agregadas' if agregar else 'Exportadas'} {filas} propiedades a {destino}")
+        return {"destino": destino, "filas": filas, "incremental": agregar, "marca": marca_nueva}
+
+
+def _tipo_arrow(tipo_sqlite: str):
+    import pyarrow as pa
+
+    if "INT" in tipo_sqlite:
+        return pa.int64()
+    if any(t in tipo_sqlite for t in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _convertir(valores: list, tipo) -> list:
+    """Ajusta una columna al tipo del schema: SQLite no impone tipos, un valor que no convierte queda nulo."""
+    import pyarrow as pa
+
+    if tipo == pa.string():
+        return [None if v is None else str(v) for v in valores]
+    conversor = int if tipo == pa.int64() else float
+    resultado = []
+    for v in valores:
+        try:
+            resultado.append(None if v is None or v == "" else conversor(v))
+        except (TypeError, ValueError):
+            resultado.append(None)
+    return resultado
+
+
+def exportar_parquet(db_path: str, destino: str, columnas: Optional[Sequence[str]] = None,
+                     tamano_lote: int = TAMANO_LOTE) -> Dict:
+    """
+    Exporta propiedades a Parquet (un row group por lote) con solo las columnas pedidas.
+    Los tipos salen de los declarados en la tabla (INTEGER, REAL, TEXT).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("La exportación a Parquet requiere pyarrow (pip install pyarrow)") from e
+    from src.scrapers import PropertyDatabase
+
+    with _lock_de(destino):
+        conn = PropertyDatabase(db_path=db_path)._conectar()
+        columnas = _proyeccion(conn, columnas)
+        tipos = _columnas_tabla(conn)
+        schema = pa.schema([(c, _tipo_arrow(tipos[c])) for c in columnas])
+
+        directorio = os.path.dirname(destino)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        tmp = destino + ".tmp"
+        filas = 0
+        with pq.ParquetWriter(tmp, schema) as escritor:
+            for lote in iterar_lotes(db_path, columnas, tamano_lote=tamano_lote):
+                arrays = [
+                    pa.array(_convertir([fila[i] for fila in lote], campo.type), type=campo.type)
+                    for i, campo in enumerate(schema)
+                ]
+                escritor.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                filas += len(lote)
+        os.replace(tmp, destino)
+        logger.info(f"📤 Exportadas {filas} propiedades a {destino}")
+        return {"destino": destino, "filas": filas}
+
+
+def exportar_en_segundo_plano(db_path: str, destino: str, formato: str = "csv", **kwargs) -> CargaEnSegundoPlano:
+    """Corre la exportación en un thread; el resultado queda en `.resultado` al terminar."""
+    exportar = exportar_parquet if formato == "parquet" else exportar_csv
+
+    def tarea(reportar):
+        reportar(f"Exportando propiedades a {destino}...")
+        return exportar(db_path, destino, **kwargs)
+
+    return CargaEnSegundoPlano(tarea, nombre=f"exportacion-{os.path.basename(destino)}")
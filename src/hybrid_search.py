@@ -0,0 +1,58 @@
+"""
+hybrid_search.py - Fusión de la búsqueda vectorial (Chroma) con la búsqueda BM25 (SQLite FTS5)
+Se usa reciprocal-rank fusion: cada lista aporta 1 / (k + posición) por documento,
+así que no hace falta calibrar distancias de embeddings contra scores BM25.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.search_index import hidratar
+
+# Constante de suavizado de RRF (valor estándar de la literatura)
+RRF_K = 60
+
+
+def fusion_rrf(rankings: Sequence[Sequence[str]], k: int = RRF_K,
+               pesos: Optional[Sequence[float]] = None) -> List[Tuple[str, float]]:
+    """
+    Reciprocal-rank fusion de varias listas de IDs ordenadas por relevancia.
+
+    Returns:
+        Lista de (id, score_rrf) de mayor a menor; a igual score gana el que
+        apareció primero (las listas se recorren en el orden recibido).
+    """
+    pesos = pesos or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, peso in zip(rankings, pesos):
+        for posicion, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + peso / (k + posicion)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def fusionar_resultados(registros_vectoriales: List[Dict], ids_bm25: Sequence[str], n_results: int,
+                        df: Optional[pd.DataFrame] = None, indice: Optional[pd.Index] = None,
+                        k: int = RRF_K) -> List[Dict]:
+    """
+    Combina los registros de Chroma con los IDs de BM25 en un único ranking RRF.
+
+    Los hits que solo encontró BM25 no traen metadatos de Chroma: se hidratan
+    desde el DataFrame. Cada registro resultante lleva 'score_rrf'.
+    """
+    por_id = {str(r['id']): r for r in registros_vectoriales}
+    ids_bm25 = [str(i) for i in ids_bm25]
+    fusion = fusion_rrf([list(por_id), ids_bm25], k=k)[:n_results]
+
+    faltantes = [doc_id for doc_id, _ in fusion if doc_id not in por_id]
+    if faltantes and df is not None and indice is not None:
+        for registro in hidratar(df, indice, faltantes):
+            por_id[str(registro['id'])] = registro
+
+    resultados = []
+    for doc_id, score in fusion:
+        if doc_id in por_id:
+            registro = dict(por_id[doc_id])
+            registro['score_rrf'] = score
+            resultados.append(registro)
+    return resultados
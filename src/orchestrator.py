@@ -0,0 +1,255 @@
+"""
+orchestrator.py - Descarga concurrente de varias zonas
+Reparte las zonas entre un pool de workers; cada worker corre el scraper de su
+zona y deja el resultado en una cola que consume un único thread escritor
+(PropertyDatabase.insertar_lote). El progreso se publica como eventos que la UI
+o la CLI consumen con un for.
+
+Uso (CLI):
+    python -m src.orchestrator --zonas Palermo Recoleta --tipo venta --limite 20
+    python -m src.orchestrator --provincia 06 --workers 4   # todos los municipios de Buenos Aires
+"""
+
+import argparse
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.config import ORQUESTADOR_WORKERS
+
+logger = logging.getLogger(__name__)
+
+_FIN_ESCRITURA = object()
+
+
+@dataclass
+class EventoProgreso:
+    """
+    Un paso de la descarga. tipo: 'inicio_zona', 'zona_completa', 'error_zona',
+    'error_escritura' (falló el escritor de la BD; la descarga se detiene) o 'fin'.
+    Los totales son acumulados al momento del evento; en 'fin', `error` indica si
+    falló la escritura.
+    """
+    tipo: str
+    zona: Optional[str]
+    zonas_completadas: int
+    total_zonas: int
+    encontradas: int = 0
+    insertadas: int = 0
+    actualizadas: int = 0
+    duracion: float = 0.0
+    error: Optional[str] = None
+    total_encontradas: int = 0
+    total_insertadas: int = 0
+    total_actualizadas: int = 0
+    propiedades_por_segundo: float = 0.0
+    ids: List[str] = field(default_factory=list)
+
+    @property
+    def progreso(self) -> float:
+        return self.zonas_completadas / self.total_zonas if self.total_zonas else 1.0
+
+
+class _FlagDetencion:
+    """Adapta el Event al `stop_flag.scraper_stop_flag` que consultan los scrapers."""
+
+    def __init__(self, evento: threading.Event):
+        self._evento = evento
+
+    @property
+    def scraper_stop_flag(self) -> bool:
+        return self._evento.is_set()
+
+
+def _scraper_por_defecto(portal: str) -> Callable:
+    from src.scrapers import ArgenpropScraper, BuscadorPropScraper
+
+    return ArgenpropScraper.buscar_propiedades if portal.lower() == "argenprop" else BuscadorPropScraper.buscar_propiedades
+
+
+class OrquestadorScraping:
+    """
+    Descarga `zonas` con `max_workers` zonas en paralelo.
+
+    `scraper(zona=, tipo=, limit=, debug=, stop_flag=)` devuelve la lista de
+    propiedades de una zona (la firma de buscar_propiedades de los scrapers).
+    `detener` corta la descarga: las zonas pendientes no arrancan y los scrapers
+    en curso lo ven en su stop_flag.
+    """
+
+    def __init__(self, zonas: List[str], tipo: str = "venta", limite: int = 10, db_path: str = "data/properties.db",
+                 max_workers: int = ORQUESTADOR_WORKERS, scraper: Optional[Callable] = None,
+                 portal: str = "BuscadorProp", detener: Optional[threading.Event] = None, debug: bool = False):
+        self.zonas = list(dict.fromkeys(zonas))
+        self.tipo = tipo
+        self.limite = limite
+        self.db_path = db_path
+        self.max_workers = max(1, min(max_workers, len(self.zonas) or 1))
+        self.scraper = scraper or _scraper_por_defecto(portal)
+        self.detener = detener or threading.Event()
+        self.debug = debug
+
+        self._eventos: "queue.Queue[EventoProgreso]" = queue.Queue()
+        self._escritura: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._completadas = 0
+        self._totales = {"encontradas": 0, "insertadas": 0, "actualizadas": 0}
+        self._ids: List[str] = []
+        self._error_escritura: Optional[str] = None
+        self._inicio = 0.0
+
+    def _evento(self, tipo: str, zona: Optional[str], **datos) -> EventoProgreso:
+        with self._lock:
+            transcurrido = max(time.monotonic() - self._inicio, 1e-6)
+            return EventoProgreso(
+                tipo=tipo, zona=zona, zonas_completadas=self._completadas, total_zonas=len(self.zonas),
+                total_encontradas=self._totales["encontradas"], total_insertadas=self._totales["insertadas"],
+                total_actualizadas=self._totales["actualizadas"],
+                propiedades_por_segundo=self._totales["encontradas"] / transcurrido, **datos,
+            )
+
+    def _descargar_zona(self, zona: str) -> None:
+        """Worker: scrapea una zona y pasa el resultado al escritor."""
+        if self.detener.is_set():
+            return
+        self._eventos.put(self._evento("inicio_zona", zona))
+        inicio = time.monotonic()
+        try:
+            props = self.scraper(zona=zona, tipo=self.tipo, limit=self.limite, debug=self.debug,
+                                 stop_flag=_FlagDetencion(self.detener))
+            self._escritura.put((zona, props or [], time.monotonic() - inicio, None))
+        except Exception as e:
+            logger.error(f"Error descargando {zona}: {e}")
+            self._escritura.put((zona, [], time.monotonic() - inicio, str(e)))
+
+    def _escribir(self) -> None:
+        """Único escritor de la BD: inserta el resultado de cada zona a medida que llega."""
+        from src.scrapers import PropertyDatabase
+
+        db = None
+        try:
+            db = PropertyDatabase(db_path=self.db_path)
+            while True:
+                item = self._escritura.get()
+                if item is _FIN_ESCRITURA:
+                    break
+                zona, props, duracion, error = item
+                stats = {"insertadas": 0, "actualizadas": 0, "ids": []}
+                if props:
+                    try:
+                        stats = db.insertar_lote(props)
+                    except Exception as e:
+                        error = error or str(e)
+                with self._lock:
+                    self._completadas += 1
+                    self._totales["encontradas"] += len(props)
+                    self._totales["insertadas"] += stats["insertadas"]
+                    self._totales["actualizadas"] += stats["actualizadas"]
+                    self._ids.extend(stats["ids"])
+                self._eventos.put(self._evento(
+                    "error_zona" if error else "zona_completa", zona, encontradas=len(props),
+                    insertadas=stats["insertadas"], actualizadas=stats["actualizadas"], duracion=duracion, error=error,
+                ))
+                logger.info(f"✓ {zona}: {len(props)} encontradas, {stats['insertadas']} nuevas ({duracion:.1f}s)")
+        except Exception as e:
+            # Sin escritor no tiene sentido seguir scrapeando: lo ya escrito queda en los ids del 'fin'
+            logger.error(f"Falló el escritor de la BD: {e}", exc_info=True)
+            with self._lock:
+                self._error_escritura = str(e)
+            self.detener.set()
+            self._eventos.put(self._evento("error_escritura", None, error=str(e)))
+        finally:
+            if db is not None:
+                db.cerrar_conexion()
+
+    def ejecutar(self) -> Iterator[EventoProgreso]:
+        """
+        Corre la descarga y va devolviendo eventos de progreso; el último es 'fin'
+        (con los ids escritos en la BD). Si el consumidor abandona el iterador,
+        la descarga se detiene.
+        """
+        self._inicio = time.monotonic()
+        escritor = threading.Thread(target=self._escribir, name="orquestador-escritor", daemon=True)
+        escritor.start()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="orquestador-zona")
+        terminado = False
+        try:
+            futuros = [executor.submit(self._descargar_zona, zona) for zona in self.zonas]
+
+            def cerrar_escritura():
+                wait(futuros)  # terminados o cancelados
+                self._escritura.put(_FIN_ESCRITURA)
+
+            threading.Thread(target=cerrar_escritura, name="orquestador-cierre", daemon=True).start()
+
+            while escritor.is_alive() or not self._eventos.empty():
+                if self.detener.is_set():
+                    for futuro in futuros:
+                        futuro.cancel()
+                try:
+                    yield self._eventos.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+            terminado = True
+            with self._lock:
+                ids, error = list(self._ids), self._error_escritura
+            yield self._evento("fin", None, ids=ids, error=error)
+        finally:
+            if not terminado:
+                self.detener.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            return {"zonas": self._completadas, **self._totales, "ids": list(self._ids)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descarga concurrente de propiedades por zona")
+    parser.add_argument("--zonas", nargs="*", default=[], help="Zonas/localidades a descargar")
+    parser.add_argument("--provincia", help="Id de provincia en Georef: descarga todos sus municipios")
+    parser.add_argument("--tipo", default="venta", choices=["venta", "alquiler"])
+    parser.add_argument("--limite", type=int, default=10, help="Propiedades por zona")
+    parser.add_argument("--workers", type=int, default=ORQUESTADOR_WORKERS)
+    parser.add_argument("--portal", default="BuscadorProp", choices=["BuscadorProp", "Argenprop"])
+    parser.add_argument("--db", default="data/properties.db")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    zonas = list(args.zonas)
+    if args.provincia:
+        from src.scrapers import GeorefAPI
+
+        zonas += [m["nombre"] for m in GeorefAPI.obtener_municipios(args.provincia)]
+    if not zonas:
+        parser.error("Indicá --zonas o --provincia")
+
+    orquestador = OrquestadorScraping(zonas, tipo=args.tipo, limite=args.limite, db_path=args.db,
+                                      max_workers=args.workers, portal=args.portal)
+    try:
+        for evento in orquestador.ejecutar():
+            if evento.tipo in ("zona_completa", "error_zona"):
+                estado = f"⚠️ {evento.error}" if evento.error else f"{evento.encontradas} encontradas, {evento.insertadas} nuevas"
+                print(f"[{evento.zonas_completadas}/{evento.total_zonas}] {evento.zona}: {estado} "
+                      f"({evento.duracion:.1f}s, {evento.propiedades_por_segundo:.2f} props/s)")
+            elif evento.tipo == "error_escritura":
+                print(f"❌ Error escribiendo en la BD: {evento.error}")
+            elif evento.tipo == "fin":
+                print(f"✅ {evento.total_encontradas} encontradas, {evento.total_insertadas} nuevas, "
+                      f"{evento.total_actualizadas} actualizadas")
+                from src.waits import obtener_registro_esperas
+
+                for nombre, stats in sorted(obtener_registro_esperas().estadisticas().items()):
+                    print(f"   ⏱️ {nombre}: n={stats['n']} media={stats['media']}s p50={stats['p50']}s "
+                          f"max={stats['max']}s timeouts={stats['timeouts']}")
+    except KeyboardInterrupt:
+        orquestador.detener.set()
+        print("⏹️ Descarga detenida")
+
+
+if __name__ == "__main__":
+    main()
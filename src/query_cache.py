@@ -0,0 +1,89 @@
+"""
+query_cache.py - Cache de resultados de búsqueda por query (LRU + TTL) compartido por el proceso
+La clave es la query normalizada + los filtros derivados; se invalida completo cuando
+PropertyDatabase.agregar_propiedades inserta filas.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from src.query_parser import CriteriosBusqueda, normalizar
+
+logger = logging.getLogger(__name__)
+
+
+def clave_query(query: str, criterios: Optional[CriteriosBusqueda] = None, **extra) -> str:
+    """Clave estable: query sin acentos ni espacios repetidos + filtros + parámetros extra (p.ej. k)."""
+    from src.search_filters import construir_filtros
+
+    partes = {
+        "q": " ".join(normalizar(query).split()),
+        "filtros": construir_filtros(criterios) if criterios else {},
+        **extra,
+    }
+    return json.dumps(partes, sort_keys=True, default=str)
+
+
+class QueryCache:
+    """LRU con expiración por TTL, seguro entre threads (las sesiones de Streamlit comparten proceso)."""
+
+    def __init__(self, max_entradas: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        """Valor cacheado o None si no está o expiró."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or time.monotonic() - entrada[0] > self.ttl:
+                if entrada is not None:
+                    del self._datos[clave]
+                self.misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return entrada[1]
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, *_args) -> None:
+        """Vacía el cache (firma compatible con los listeners de PropertyDatabase)."""
+        with self._lock:
+            self._datos.clear()
+        logger.info("🧹 Cache de queries invalidado")
+
+    def estadisticas(self) -> Dict:
+        return {"entradas": len(self._datos), "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[QueryCache] = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_queries() -> QueryCache:
+    """Cache del proceso, registrado para invalidarse cuando se agregan propiedades a la BD."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from src.scrapers import PropertyDatabase
+
+            _cache = QueryCache()
+            PropertyDatabase.registrar_listener(_cache.invalidar)
+        return _cache
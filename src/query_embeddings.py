@@ -0,0 +1,118 @@
+"""
+query_embeddings.py - Embeddings de queries memoizados y agrupados en micro-lotes
+Las queries expandidas se cachean en un LRU acotado; los misses que llegan casi al
+mismo tiempo desde distintas sesiones se codifican juntos en una sola pasada del modelo.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List
+
+import numpy as np
+
+from src.config import ENCODE_BATCH_WINDOW_MS, QUERY_EMBEDDING_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class CodificadorQueries:
+    """
+    Envoltorio de encode() con cache LRU y micro-batching.
+
+    Expone encode() con la misma forma que SentenceTransformer para listas de
+    textos, así que se puede usar donde antes se llamaba a model.encode().
+    """
+
+    def __init__(self, model, max_entradas: int = QUERY_EMBEDDING_CACHE_SIZE,
+                 ventana_ms: float = ENCODE_BATCH_WINDOW_MS, max_lote: int = 32):
+        self.model = model
+        self.max_entradas = max_entradas
+        self.ventana = ventana_ms / 1000.0
+        self.max_lote = max_lote
+        self.hits = 0
+        self.misses = 0
+        self.lotes = 0
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._en_vuelo: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pendientes: "queue.Queue[str]" = queue.Queue()
+        self._worker = None
+
+    def estadisticas(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entradas": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "lotes": self.lotes,
+        }
+
+    def encode(self, textos, **kwargs) -> np.ndarray:
+        if isinstance(textos, str):
+            return self.encode([textos])[0]
+        futuros = [self._resolver(t) for t in textos]
+        return np.stack([f.result() for f in futuros]) if futuros else np.zeros((0, 0), dtype=np.float32)
+
+    def _resolver(self, texto: str) -> Future:
+        """Future con el embedding: inmediato si está en cache, compartido si ya se está calculando."""
+        with self._lock:
+            if texto in self._cache:
+                self._cache.move_to_end(texto)
+                self.hits += 1
+                futuro = Future()
+                futuro.set_result(self._cache[texto])
+                return futuro
+            self.misses += 1
+            futuro = self._en_vuelo.get(texto)
+            if futuro is None:
+                futuro = Future()
+                self._en_vuelo[texto] = futuro
+                self._pendientes.put(texto)
+                self._iniciar_worker()
+            return futuro
+
+    def _iniciar_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._procesar, name="codificador-queries", daemon=True)
+            self._worker.start()
+
+    def _procesar(self):
+        """Toma la primera query pendiente, espera la ventana por más y codifica el lote de una vez."""
+        while True:
+            lote = [self._pendientes.get()]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._pendientes.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._codificar_lote(lote)
+
+    def _codificar_lote(self, lote: List[str]):
+        try:
+            vectores = np.asarray(self.model.encode(lote), dtype=np.float32)
+            error = None
+        except Exception as e:
+            logger.error(f"Error codificando lote de {len(lote)} queries: {e}")
+            vectores, error = None, e
+
+        with self._lock:
+            self.lotes += 1
+            for i, texto in enumerate(lote):
+                futuro = self._en_vuelo.pop(texto)
+                if error is not None:
+                    futuro.set_exception(error)
+                    continue
+                self._cache[texto] = vectores[i]
+                self._cache.move_to_end(texto)
+                futuro.set_result(vectores[i])
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
@@ -0,0 +1,267 @@
+"""
+query_parser.py - Comprensión de la consulta compilada una sola vez
+Todos los vocabularios (amenities, zonas, tipos, expansiones e intenciones) se
+compilan en un único autómata regex y la query se analiza en una sola pasada.
+Lo comparten mejorar_query(), el pre-filtrado en Chroma y el re-ranking.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+# DICCIONARIO DE AMENITIES - Mapear palabras clave a campos reales
+AMENITIES_MAPPING = {
+    'pileta': ['pileta', 'piscina', 'natatorio'],
+    'piscina': ['pileta', 'piscina', 'natatorio'],
+    'jardín': ['jardín', 'patio', 'parque', 'verde'],
+    'patio': ['jardín', 'patio', 'parque'],
+    'aire': ['aire', 'clima', 'acondicionado'],
+    'gas': ['gas', 'calefacción'],
+    'garage': ['garage', 'cochera', 'estacionamiento', 'parking', 'auto'],
+    'cochera': ['garage', 'cochera', 'estacionamiento', 'parking'],
+    'terraza': ['terraza', 'balcón', 'vista'],
+    'balcón': ['terraza', 'balcón', 'vista'],
+    'cocina': ['cocina'],
+    'nuevo': ['nuevo', 'renovado', 'moderno', 'recién'],
+    'renovado': ['renovado', 'nuevo', 'moderno'],
+    'moderno': ['moderno', 'nuevo', 'renovado', 'contemporáneo'],
+    'seguridad': ['seguridad', 'vigilancia', 'alarma', 'portero'],
+    'luminoso': ['luz', 'iluminado', 'ventanas'],
+    'amplio': ['amplio', 'espacioso', 'grande'],
+}
+
+# DICCIONARIO DE ZONAS
+ZONAS_MAPPING = {
+    'san isidro': ['san isidro', 'isidro'],
+    'palermo': ['palermo', 'soho', 'hollywood', 'chico'],
+    'recoleta': ['recoleta'],
+    'belgrano': ['belgrano'],
+    'caballito': ['caballito', 'primera junta'],
+    'flores': ['flores', 'parque chacabuco'],
+    'puerto madero': ['puerto madero', 'madero'],
+    'la boca': ['la boca', 'boca'],
+    'san nicolás': ['san nicolás', 'nicolás'],
+    'centro': ['centro', 'retiro', 'microcentro'],
+    'caba': ['caba', 'buenos aires'],
+}
+
+# Tipos buscables en la query (en orden de prioridad)
+TIPOS_SEARCH = ['casa', 'departamento', 'dpto', 'apt', 'apartamento', 'piso', 'loft', 'estudio', 'monoambiente']
+
+# Categoría canónica de tipo: se deriva del título de la propiedad al ingestar y
+# de la query al buscar, para poder filtrar por igualdad en Chroma
+TIPOS_CATEGORIA = {
+    'casa': ['casa', 'chalet'],
+    'departamento': ['departamento', 'depto', 'dpto', 'apartamento'],
+    'monoambiente': ['monoambiente'],
+    'ph': ['ph'],
+    'loft': ['loft'],
+    'cochera': ['cochera', 'cocheras'],
+    'local': ['local'],
+    'oficina': ['oficina'],
+    'terreno': ['terreno', 'lote'],
+}
+
+# Diccionario de expansiones semánticas para criterios comunes
+EXPANSIONES = {
+    'moderno': ['nuevo', 'renovado', 'contemporáneo', 'actualizado'],
+    'luminoso': ['luz', 'iluminado', 'ventanas'],
+    'amplio': ['espacioso', 'grande', 'tamaño', 'metros'],
+    'tranquilo': ['paz', 'quieto', 'residencial', 'alejado'],
+    'céntrico': ['centro', 'central', 'ubicación', 'acceso'],
+    'familia': ['habitaciones', 'dormitorios', 'niños', 'personas'],
+    'campo': ['rural', 'chacra', 'terreno', 'naturales'],
+    'ciudad': ['urbano', 'zona', 'barrio', 'localidad'],
+    'pequeño': ['compacto', 'estudio', 'monoambiente', 'reducido'],
+    'balcón': ['terraza', 'vista', 'aire libre'],
+    'jardin': ['patio', 'verde', 'exterior', 'plantas'],
+    'piscina': ['pileta', 'natatorio', 'agua'],
+    'seguridad': ['vigilancia', 'alarma', 'portero', 'cerradura'],
+    'cocina': ['cocina equipada', 'amoblada', 'electrodomésticos'],
+    'baño': ['baños', 'toilette', 'espacio sanitario'],
+    'parking': ['cochera', 'garaje', 'estacionamiento', 'auto'],
+}
+
+# Intenciones: palabras disparadoras -> contexto que se agrega a la query
+INTENCIONES = [
+    (['cuántas', 'cuantas', 'cantidad', 'número', 'personas'], "tamaño distribución espacial dormitorios"),
+    (['cuánto', 'cuanto', 'precio', 'costo', 'valor'], "precio valor inversión"),
+    (['dónde', 'donde', 'zona', 'ubicación', 'barrio'], "localidad ubicación zona área"),
+]
+
+
+def normalizar(texto) -> str:
+    """Minúsculas y sin acentos (para comparar zonas y tipos)."""
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c)).strip()
+
+
+_PATRON_TIPO_CATEGORIA = re.compile(
+    r"\b(" + "|".join(sorted({normalizar(kw) for kws in TIPOS_CATEGORIA.values() for kw in kws}, key=len, reverse=True)) + r")\b"
+)
+_CATEGORIA_POR_KEYWORD = {normalizar(kw): cat for cat, kws in TIPOS_CATEGORIA.items() for kw in kws}
+_PATRON_NUMEROS = re.compile(r'\d+')
+
+
+def derivar_tipo_categoria(tipo) -> str:
+    """Categoría canónica del tipo (la primera que aparece en el texto), '' si no hay."""
+    match = _PATRON_TIPO_CATEGORIA.search(normalizar(tipo))
+    return _CATEGORIA_POR_KEYWORD[match.group(1)] if match else ""
+
+
+def _regex_trie(terminos: Iterable[str]) -> str:
+    """
+    Regex equivalente a la alternancia de `terminos`, factorizada como trie
+    (prefijos comunes una sola vez) y con las ramas más largas primero.
+    """
+    trie: Dict = {}
+    for termino in terminos:
+        nodo = trie
+        for c in termino:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = {}
+
+    def _a_regex(nodo: Dict) -> str:
+        ramas = [re.escape(c) + _a_regex(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ""
+        final = "" in nodo
+        if len(ramas) == 1 and not final:
+            return ramas[0]
+        return "(?:" + "|".join(ramas) + ")" + ("?" if final else "")
+
+    return _a_regex(trie)
+
+
+@dataclass(frozen=True)
+class CriteriosBusqueda:
+    """Lo que el usuario busca, extraído de la query en una sola pasada."""
+    amenities: Tuple[str, ...] = ()
+    zona: Optional[str] = None
+    zona_keywords: Tuple[str, ...] = ()  # normalizadas
+    tipo: Optional[str] = None
+    tipo_categoria: Optional[str] = None
+    habitaciones: Optional[int] = None
+    precio_aprox: Optional[int] = None
+    pileta: bool = False
+    expansiones: Tuple[str, ...] = ()  # sinónimos a agregar a la query
+    intenciones: Tuple[str, ...] = ()  # contexto a agregar a la query
+
+
+class QueryParser:
+    """
+    Vocabularios compilados en un único regex.
+
+    El patrón es una alternancia dentro de un lookahead, así que encuentra en
+    cada posición el término más largo que empieza ahí; los términos más cortos
+    contenidos en él se agregan desde una tabla precalculada. El resultado es
+    el mismo conjunto que `kw in query` para cada término del vocabulario.
+    """
+
+    def __init__(self, zonas_extra: Iterable[str] = ()):
+        self.zonas_extra = tuple(sorted(
+            {z for z in (normalizar(z) for z in zonas_extra) if len(z) >= 4}, key=len, reverse=True
+        ))
+
+        # Vocabularios normalizados, en el orden de prioridad original
+        self._amenities = [(a, tuple(normalizar(kw) for kw in kws)) for a, kws in AMENITIES_MAPPING.items()]
+        self._zonas = [(z, tuple(normalizar(kw) for kw in kws)) for z, kws in ZONAS_MAPPING.items()]
+        self._tipos = [(t, normalizar(t)) for t in TIPOS_SEARCH]
+        self._expansiones = [(normalizar(k), " ".join(sinonimos)) for k, sinonimos in EXPANSIONES.items()]
+        self._intenciones = [(tuple(normalizar(d) for d in disp), contexto) for disp, contexto in INTENCIONES]
+
+        terminos = set(self.zonas_extra)
+        for _, keywords in self._amenities + self._zonas:
+            terminos.update(keywords)
+        for disparadores, _ in self._intenciones:
+            terminos.update(disparadores)
+        terminos.update(t for _, t in self._tipos)
+        terminos.update(k for k, _ in self._expansiones)
+        terminos.discard("")
+
+        self._patron = re.compile("(?=(" + _regex_trie(terminos) + "))")
+        self._contenidos: Dict[str, FrozenSet[str]] = {
+            t: frozenset(o for o in terminos if o in t) for t in terminos
+        }
+
+    def _terminos_en(self, query_norm: str) -> FrozenSet[str]:
+        encontrados = set()
+        for match in self._patron.finditer(query_norm):
+            encontrados |= self._contenidos[match.group(1)]
+        return frozenset(encontrados)
+
+    @lru_cache(maxsize=2048)
+    def parsear(self, query: str) -> CriteriosBusqueda:
+        """Analiza la query y devuelve los criterios (cacheado por texto de query)."""
+        query_norm = normalizar(query)
+        hay = self._terminos_en(query_norm)
+
+        # 1. Amenities buscados
+        amenities = tuple(a for a, keywords in self._amenities if any(kw in hay for kw in keywords))
+
+        # 2. Zona (diccionario fijo y luego zonas presentes en la BD, la más larga primero)
+        zona, zona_keywords = None, ()
+        for zona_key, keywords in self._zonas:
+            if any(kw in hay for kw in keywords):
+                zona, zona_keywords = zona_key, keywords
+                break
+        if zona is None:
+            zona = next((z for z in self.zonas_extra if z in hay), None)
+            zona_keywords = (zona,) if zona else ()
+
+        # 3. Tipo
+        tipo = next((t for t, t_norm in self._tipos if t_norm in hay), None)
+
+        # 4. Habitaciones o precio
+        habitaciones = precio_aprox = None
+        for num_str in _PATRON_NUMEROS.findall(query_norm):
+            num = int(num_str)
+            if 2 <= num <= 8:  # Probablemente habitaciones
+                habitaciones = num
+                break
+            elif num > 100000:  # Probablemente precio
+                precio_aprox = num
+                break
+
+        # 5. Expansiones e intenciones para la búsqueda semántica
+        expansiones = tuple(sinonimos for clave, sinonimos in self._expansiones if clave in hay)
+        intenciones = tuple(
+            contexto for disparadores, contexto in self._intenciones if any(d in hay for d in disparadores)
+        )
+
+        return CriteriosBusqueda(
+            amenities=amenities,
+            zona=zona,
+            zona_keywords=zona_keywords,
+            tipo=tipo,
+            tipo_categoria=derivar_tipo_categoria(query_norm) or None,
+            habitaciones=habitaciones,
+            precio_aprox=precio_aprox,
+            pileta='pileta' in amenities or 'piscina' in amenities,
+            expansiones=expansiones,
+            intenciones=intenciones,
+        )
+
+
+@lru_cache(maxsize=8)
+def obtener_parser(zonas_extra: Tuple[str, ...] = ()) -> QueryParser:
+    """Parser compilado una vez por conjunto de zonas del corpus."""
+    return QueryParser(zonas_extra)
+
+
+def parsear_query(query: str, zonas_extra: Tuple[str, ...] = ()) -> CriteriosBusqueda:
+    """Atajo: analiza `query` con el parser compilado para `zonas_extra`."""
+    return obtener_parser(tuple(zonas_extra)).parsear(query or "")
+
+
+def zonas_normalizadas(zonas: Iterable) -> Tuple[str, ...]:
+    """Zonas distintas del corpus, normalizadas (para detectarlas en la query)."""
+    return tuple(sorted({normalizar(z) for z in zonas if normalizar(z)}, key=len, reverse=True))
+
+
+def expandir_query(query: str, criterios: CriteriosBusqueda) -> str:
+    """Query original + sinónimos y contexto de intención detectados."""
+    return query + "".join(" " + extra for extra in criterios.expansiones + criterios.intenciones)
+
@@ -0,0 +1,85 @@
+"""
+rate_limit.py - Límite de pedidos por portal (token bucket por host)
+Reemplaza las pausas fijas entre páginas: cada pedido toma un token del host
+y solo espera lo necesario para respetar la tasa, aunque lo pidan varios
+threads a la vez.
+"""
+
+import logging
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, Optional
+
+from src.config import RATE_LIMIT_POR_HOST, RATE_LIMIT_RAFAGA
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    `tasa` tokens por segundo con hasta `capacidad` acumulados.
+
+    Cada pedido reserva su token al entrar (el saldo puede quedar negativo), así
+    los que llegan juntos quedan espaciados en orden de llegada sin reintentar.
+    """
+
+    def __init__(self, tasa: float, capacidad: int = 1, reloj: Callable[[], float] = time.monotonic):
+        self.tasa = max(tasa, 1e-6)
+        self.capacidad = max(1, capacidad)
+        self._reloj = reloj
+        self._tokens = float(self.capacidad)
+        self._ultimo = reloj()
+        self._lock = threading.Lock()
+
+    def reservar(self) -> float:
+        """Toma un token y devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            ahora = self._reloj()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.tasa)
+
+    def esperar(self) -> float:
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+class LimitadorPorHost:
+    """Un TokenBucket por host (www.argenprop.com, www.buscadorprop.com.ar, ...)."""
+
+    def __init__(self, tasa: float = RATE_LIMIT_POR_HOST, rafaga: int = RATE_LIMIT_RAFAGA):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.tasa, self.rafaga)
+            return self._buckets[host]
+
+    def esperar(self, url: str) -> float:
+        """Bloquea hasta que se pueda pedir `url`; devuelve los segundos esperados."""
+        espera = self._bucket(url).esperar()
+        if espera > 0:
+            logger.debug(f"Rate limit: {espera:.2f}s antes de {url}")
+        return espera
+
+
+_limitador: Optional[LimitadorPorHost] = None
+_lock_limitador = threading.Lock()
+
+
+def obtener_limitador() -> LimitadorPorHost:
+    """Limitador compartido por todos los scrapers del proceso."""
+    global _limitador
+    with _lock_limitador:
+        if _limitador is None:
+            _limitador = LimitadorPorHost()
+        return _limitador
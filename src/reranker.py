@@ -0,0 +1,252 @@
+"""
+reranker.py - Re-ranking local vectorizado sobre una matriz de features por propiedad
+Las columnas de texto se pasan a minúsculas y se tokenizan una sola vez al cargar,
+y los amenities del diccionario quedan como columnas booleanas. Cada query se
+puntúa con aritmética de arrays sobre las posiciones de los candidatos.
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.query_parser import AMENITIES_MAPPING, CriteriosBusqueda, normalizar
+
+# Pesos del scoring (los mismos del re-ranking original por diccionarios)
+PESO_ZONA, PENALIDAD_ZONA = 500, -50
+PESO_TIPO, PENALIDAD_TIPO = 150, -30
+PESO_HAB_EXACTA, PESO_HAB_MINIMA, PENALIDAD_HAB = 200, 100, -40
+PESO_PILETA, PESO_AMENITY, PENALIDAD_AMENITY = 100, 80, -20
+PESO_KW_DESCRIPCION, PESO_KW_AMENITIES = 10, 8
+
+# Palabras de la query que no suman en la bonificación general (ya cuentan como zona)
+PALABRAS_ZONA_EXCLUIDAS = {'san', 'isidro', 'palermo', 'recoleta'}
+
+_PATRON_TOKEN = re.compile(r'\w+')
+
+
+def _texto_minusculas(df: pd.DataFrame, columna: str) -> pd.Series:
+    if columna not in df.columns:
+        return pd.Series([""] * len(df), dtype=object)
+    return df[columna].fillna("").astype(str).str.lower().reset_index(drop=True)
+
+
+def _unir_valores(propios: Sequence, ajenos: Sequence):
+    """Valores de `propios` seguidos de los nuevos de `ajenos`, y el código unido de cada valor ajeno."""
+    posiciones = {v: i for i, v in enumerate(propios)}
+    unidos = list(propios)
+    mapa = np.empty(len(ajenos), dtype=np.intp)
+    for j, valor in enumerate(ajenos):
+        if valor not in posiciones:
+            posiciones[valor] = len(unidos)
+            unidos.append(valor)
+        mapa[j] = posiciones[valor]
+    return unidos, mapa
+
+
+class _IndiceTokens:
+    """
+    Columna de texto tokenizada: vocabulario + (fila, token) aplanados.
+
+    Una palabra (solo caracteres \\w) aparece como subcadena del texto si y solo
+    si es subcadena de alguno de sus tokens, así que `kw in texto` se resuelve
+    recorriendo el vocabulario en lugar de todas las filas.
+    """
+
+    def __init__(self, textos: pd.Series, max_cache: int = 1024):
+        self.n = len(textos)
+        self._textos = textos
+        tokens = textos.str.findall(_PATRON_TOKEN.pattern).explode().dropna()
+        self._filas = tokens.index.to_numpy(dtype=np.intp)
+        self._codigos, vocabulario = pd.factorize(tokens)
+        self._vocabulario = list(vocabulario)
+        self._cache: Dict[str, np.ndarray] = {}
+        self._max_cache = max_cache
+
+    def __getstate__(self):
+        # Las máscaras memoizadas no se persisten (snapshot)
+        estado = self.__dict__.copy()
+        estado['_cache'] = {}
+        return estado
+
+    def extender(self, conservar: np.ndarray, otro: "_IndiceTokens") -> "_IndiceTokens":
+        """Índice de las filas con `conservar` seguidas de las de `otro`, sin volver a tokenizar."""
+        nuevo = object.__new__(_IndiceTokens)
+        nuevo._textos = pd.concat([self._textos[conservar], otro._textos], ignore_index=True)
+        nuevo.n = len(nuevo._textos)
+        vigentes = conservar[self._filas]
+        posicion = np.cumsum(conservar) - 1
+        nuevo._vocabulario, mapa = _unir_valores(self._vocabulario, otro._vocabulario)
+        nuevo._filas = np.concatenate([posicion[self._filas[vigentes]], otro._filas + int(conservar.sum())]).astype(np.intp)
+        nuevo._codigos = np.concatenate([self._codigos[vigentes], mapa[otro._codigos]]).astype(np.intp)
+        nuevo._cache = {}
+        nuevo._max_cache = self._max_cache
+        return nuevo
+
+    def contiene(self, kw: str) -> np.ndarray:
+        """Máscara booleana (n,) de filas cuyo texto contiene `kw`."""
+        if kw in self._cache:
+            return self._cache[kw]
+        if _PATRON_TOKEN.fullmatch(kw):
+            tokens_ok = np.fromiter((kw in t for t in self._vocabulario), dtype=bool, count=len(self._vocabulario))
+            mascara = np.zeros(self.n, dtype=bool)
+            mascara[self._filas[tokens_ok[self._codigos]]] = True
+        else:
+            # Palabras con puntuación o vacías: búsqueda directa de subcadena
+            mascara = self._textos.str.contains(kw, regex=False).to_numpy(dtype=bool)
+        if len(self._cache) >= self._max_cache:
+            self._cache.clear()
+        self._cache[kw] = mascara
+        return mascara
+
+
+class _Categorica:
+    """Columna categórica factorizada: los predicados se evalúan una vez por valor distinto."""
+
+    def __init__(self, valores: pd.Series):
+        self._codigos, self._unicos = pd.factorize(valores)
+
+    def extender(self, conservar: np.ndarray, otra: "_Categorica") -> "_Categorica":
+        nueva = object.__new__(_Categorica)
+        nueva._unicos, mapa = _unir_valores(list(self._unicos), list(otra._unicos))
+        nueva._codigos = np.concatenate([self._codigos[conservar], mapa[otra._codigos]]).astype(np.intp)
+        return nueva
+
+    def coincide(self, posiciones: np.ndarray, predicado) -> np.ndarray:
+        codigos, inversa = np.unique(self._codigos[posiciones], return_inverse=True)
+        resultado = np.fromiter((predicado(self._unicos[c]) for c in codigos), dtype=bool, count=len(codigos))
+        return resultado[inversa]
+
+
+class MatrizFeatures:
+    """Features precalculadas por fila del DataFrame de propiedades (mismas posiciones que el índice de ids)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.descripcion = _IndiceTokens(_texto_minusculas(df, 'descripcion'))
+        self.amenities_texto = _IndiceTokens(_texto_minusculas(df, 'amenities'))
+        self.zona = _Categorica(_texto_minusculas(df, 'zona').map(normalizar))
+        self.tipo = _Categorica(_texto_minusculas(df, 'tipo'))
+
+        # Habitaciones: vacío cuenta como 0; un valor no numérico no puntúa
+        crudo = df['habitaciones'].reset_index(drop=True) if 'habitaciones' in df.columns else pd.Series([None] * self.n)
+        vacio = crudo.isna() | (crudo.astype(str).str.strip() == "")
+        numerico = pd.to_numeric(crudo, errors='coerce')
+        self.habitaciones = numerico.fillna(0).to_numpy(dtype=np.float64).astype(np.int64)
+        self.habitaciones_valida = (vacio | numerico.notna()).to_numpy(dtype=bool)
+
+        pileta = df['pileta'].reset_index(drop=True) if 'pileta' in df.columns else pd.Series([0] * self.n)
+        self.pileta = pd.to_numeric(pileta, errors='coerce').fillna(0).to_numpy() != 0
+
+        # Columnas booleanas por amenity del diccionario
+        self.amenity_en_campo: Dict[str, np.ndarray] = {}
+        self.amenity_en_texto: Dict[str, np.ndarray] = {}
+        for amenity, keywords in AMENITIES_MAPPING.items():
+            en_campo = np.zeros(self.n, dtype=bool)
+            en_desc = np.zeros(self.n, dtype=bool)
+            for kw in keywords:
+                en_campo |= self.amenities_texto.contiene(kw)
+                en_desc |= self.descripcion.contiene(kw)
+            self.amenity_en_campo[amenity] = en_campo
+            self.amenity_en_texto[amenity] = en_campo | en_desc
+
+    def extender(self, conservar: np.ndarray, df_nuevas: pd.DataFrame) -> "MatrizFeatures":
+        """
+        Features de las filas con `conservar` (máscara sobre este DataFrame) seguidas
+        de `df_nuevas`, el orden de pd.concat([df[conservar], df_nuevas]). Solo se
+        procesan las filas nuevas; las conservadas se copian.
+        """
+        conservar = np.asarray(conservar, dtype=bool)
+        otra = MatrizFeatures(df_nuevas)
+        nueva = object.__new__(MatrizFeatures)
+        nueva.n = int(conservar.sum()) + otra.n
+        nueva.descripcion = self.descripcion.extender(conservar, otra.descripcion)
+        nueva.amenities_texto = self.amenities_texto.extender(conservar, otra.amenities_texto)
+        nueva.zona = self.zona.extender(conservar, otra.zona)
+        nueva.tipo = self.tipo.extender(conservar, otra.tipo)
+        for atributo in ("habitaciones", "habitaciones_valida", "pileta"):
+            setattr(nueva, atributo, np.concatenate([getattr(self, atributo)[conservar], getattr(otra, atributo)]))
+        nueva.amenity_en_campo = {
+            a: np.concatenate([m[conservar], otra.amenity_en_campo[a]]) for a, m in self.amenity_en_campo.items()
+        }
+        nueva.amenity_en_texto = {
+            a: np.concatenate([m[conservar], otra.amenity_en_texto[a]]) for a, m in self.amenity_en_texto.items()
+        }
+        return nueva
+
+    def puntuar(self, query: str, criterios: CriteriosBusqueda, posiciones: np.ndarray) -> np.ndarray:
+        """Score de cada posición candidata (mismas reglas y pesos que el re-ranking original)."""
+        posiciones = np.asarray(posiciones, dtype=np.intp)
+        scores = np.zeros(len(posiciones), dtype=np.int64)
+
+        # ZONA: máxima prioridad si se especificó
+        if criterios.zona:
+            zona_keywords = criterios.zona_keywords
+            coincide = self.zona.coincide(posiciones, lambda z: any(kw in z for kw in zona_keywords))
+            scores += np.where(coincide, PESO_ZONA, PENALIDAD_ZONA)
+
+        # AMENITIES: puntos por cada uno encontrado, penalidad menor si falta
+        for amenity in criterios.amenities:
+            if amenity == 'pileta':
+                encontrado = self.pileta[posiciones] | self.amenity_en_campo[amenity][posiciones]
+                scores += np.where(encontrado, PESO_PILETA, PENALIDAD_AMENITY)
+            else:
+                encontrado = self.amenity_en_texto[amenity][posiciones]
+                scores += np.where(encontrado, PESO_AMENITY, PENALIDAD_AMENITY)
+
+        # TIPO: bonificación si coincide
+        if criterios.tipo:
+            tipo = criterios.tipo
+            coincide = self.tipo.coincide(posiciones, lambda t: tipo in t)
+            scores += np.where(coincide, PESO_TIPO, PENALIDAD_TIPO)
+
+        # HABITACIONES: exacta es mejor, pero acepta >= buscado
+        if criterios.habitaciones:
+            hab = self.habitaciones[posiciones]
+            puntos = np.select(
+                [hab == criterios.habitaciones, hab >= criterios.habitaciones],
+                [PESO_HAB_EXACTA, PESO_HAB_MINIMA],
+                PENALIDAD_HAB,
+            )
+            scores += np.where(self.habitaciones_valida[posiciones], puntos, 0)
+
+        # BONIFICACIÓN GENERAL: palabras de la query en descripción y amenities
+        for kw in (kw.strip() for kw in query.lower().split()):
+            if len(kw) <= 2 or kw in PALABRAS_ZONA_EXCLUIDAS:
+                continue
+            scores += PESO_KW_DESCRIPCION * self.descripcion.contiene(kw)[posiciones]
+            scores += PESO_KW_AMENITIES * self.amenities_texto.contiene(kw)[posiciones]
+
+        return scores
+
+
+def ordenar_por_score(scores: np.ndarray) -> np.ndarray:
+    """Orden descendente estable (a igual score se respeta el orden de la búsqueda semántica)."""
+    return np.argsort(-np.asarray(scores), kind='stable')
+
+
+def reranquear(query: str, criterios: CriteriosBusqueda, propiedades: List[Dict],
+               features: MatrizFeatures, indice: pd.Index) -> List[Dict]:
+    """
+    Ordena `propiedades` (registros con 'id') por score local.
+
+    Los candidatos se ubican en la matriz de features vía el índice de ids; los
+    que no están (p.ej. la BD cambió desde la carga) se puntúan con una matriz
+    armada al vuelo solo con esos registros.
+    """
+    if not propiedades:
+        return []
+    from src.search_index import posiciones_de
+
+    posiciones = posiciones_de(indice, [p.get('id') for p in propiedades])
+    scores = np.zeros(len(propiedades), dtype=np.int64)
+    conocidos = posiciones >= 0
+    if conocidos.any():
+        scores[conocidos] = features.puntuar(query, criterios, posiciones[conocidos])
+    if not conocidos.all():
+        faltantes = np.flatnonzero(~conocidos)
+        extra = MatrizFeatures(pd.DataFrame([propiedades[i] for i in faltantes]))
+        scores[faltantes] = extra.puntuar(query, criterios, np.arange(len(faltantes)))
+
+    return [propiedades[i] for i in ordenar_por_score(scores)]
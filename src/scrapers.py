@@ -5,7 +5,7 @@ Extrae descripciones reales (títulos + direcciones)
 """
 
 import requests
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 from datetime import datetime
 import sqlite3
@@ -15,6 +15,9 @@ from random import uniform
 import time
 import urllib.parse
 import os
+import re
+import json
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +77,33 @@ class GeorefAPI:
         return resultado
 
 
+# Extrae en el navegador los campos crudos de las tarjetas de Argenprop (ver ArgenpropScraper.extraer_tarjetas).
+# innerText equivale al .text de Selenium; las tarjetas sin link se omiten como en la lectura por WebElement.
+JS_TARJETAS_ARGENPROP = """
+    var textos = function (card, tag) {
+        return Array.prototype.map.call(card.getElementsByTagName(tag), function (el) { return el.innerText || ''; });
+    };
+    var tarjetas = [];
+    var cards = document.querySelectorAll(arguments[0]);
+    for (var i = 0; i < cards.length && i < arguments[1]; i++) {
+        var card = cards[i];
+        var link = card.querySelector('a');
+        if (!link) { continue; }
+        var h2 = card.querySelector('h2');
+        tarjetas.push({
+            href: link.href || link.getAttribute('href') || '',
+            h2: h2 ? h2.innerText : '',
+            parrafos: textos(card, 'p'),
+            spans: textos(card, 'span'),
+            imagenes: Array.prototype.map.call(card.getElementsByTagName('img'), function (img) {
+                return img.currentSrc || img.getAttribute('src') || img.getAttribute('data-src') || '';
+            }).filter(function (src) { return src.indexOf('http') === 0; })
+        });
+    }
+    return tarjetas;
+"""
+
+
 class ArgenpropScraper:
     @staticmethod
     def buscar_propiedades(zona: str = "Palermo", tipo: str = "Venta", limit: int = 10, debug: bool = False, stop_flag=None) -> List[Dict]:
@@ -87,11 +117,10 @@ class ArgenpropScraper:
     def buscar_propiedades_selenium(zona: str = "Palermo", tipo: str = "Venta", limit: int = 10, debug: bool = False, stop_flag=None) -> List[Dict]:
         """Scraping de Argenprop - extrae h2 (título) + dirección + datos mejorados."""
         try:
-            from selenium import webdriver
             from selenium.webdriver.common.by import By
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
+            from src.driver_pool import obtener_pool
+            from src.rate_limit import obtener_limitador
+            from src.waits import esperar_elementos_estables, scroll_hasta_estable
         except:
             logger.error("selenium no disponible")
             return []
@@ -101,113 +130,121 @@ class ArgenpropScraper:
         url = f"https://www.argenprop.com/departamentos/{tipo_text}/{zona_slug}"
         
         propiedades = []
-        driver = None
         
         try:
             # Verificar si ya se solicitó detener antes de iniciar
             if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
                 return []
             
-            opts = Options()
-            opts.add_argument("--headless")
-            opts.add_argument("--no-sandbox")
-            opts.add_argument("--disable-dev-shm-usage")
-            opts.add_argument("--disable-gpu")
-            opts.add_argument("--window-size=1920,1080")
-            opts.add_argument("--disable-blink-features=AutomationControlled")  # Evitar detección de version en Chrome
-            opts.add_argument("user-agent=" + random.choice(USER_AGENTS))
-            
-            try:
-                from webdriver_manager.chrome import ChromeDriverManager
-                from selenium.webdriver.chrome.service import Service
-                # Usar ChromeDriverManager - detecta versión automáticamente
-                driver_path = ChromeDriverManager().install()
-                logger.debug(f"ChromeDriver instalado en: {driver_path}")
-                driver = webdriver.Chrome(service=Service(driver_path), options=opts)
-            except Exception as wdm_error:
-                logger.debug(f"webdriver_manager error: {wdm_error}. Intentando sin manager...")
-                try:
-                    driver = webdriver.Chrome(options=opts)
-                except Exception as direct_error:
-                    logger.error(f"No se puede inicializar Chrome: {direct_error}")
-                    return []
+            # El turno del rate limit se toma antes de pedir un driver: el que espera no retiene un Chrome
+            obtener_limitador().esperar(url)
+            with obtener_pool().driver() as driver:
+                if debug:
+                    logger.info(f"Argenprop: {url}")
             
-            if debug:
-                logger.info(f"Argenprop: {url}")
+                driver.get(url)
             
-            driver.get(url)
+                # Esperar a que aparezcan las tarjetas y su cantidad deje de cambiar
+                esperar_elementos_estables(driver, ".card", "argenprop.tarjetas", timeout=10)
             
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+                # Scroll para cargar más tarjetas (corta si un scroll ya no agrega ninguna)
+                scroll_hasta_estable(
+                    driver, ".card", "argenprop.scroll", max_scrolls=3,
+                    stop=lambda: stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag
                 )
-            except:
-                pass
-            
-            time.sleep(2)
-            
-            # Scroll para cargar más tarjetas
-            for _ in range(3):
-                # Verificar flag de stop entre scrolls
-                if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
-                    break
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
             
-            cards = driver.find_elements(By.CSS_SELECTOR, ".card")
-            if debug:
-                logger.info(f"Encontradas {len(cards)} tarjetas")
-            
-            for idx, card in enumerate(cards[:limit]):
-                # Verificar flag de stop en cada iteración
-                if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
-                    if debug:
-                        logger.info(f"Stop solicitado, deteniendo en tarjeta {idx}")
-                    break
-                
                 try:
-                    # Obtener URL del link
-                    href = ""
-                    try:
-                        link = card.find_element(By.TAG_NAME, "a")
-                        href = link.get_attribute("href")
+                    # Todas las tarjetas en una sola ida y vuelta; el parseo se hace en Python
+                    tarjetas = ArgenpropScraper.extraer_tarjetas(driver, limit)
+                    if debug:
+                        logger.info(f"Encontradas {len(tarjetas)} tarjetas")
+                    for datos in tarjetas:
+                        href = datos.get("href") or ""
+                        if not href:
+                            continue
                         if not href.startswith("http"):
-                            href = "https://www.argenprop.com" + href
-                    except:
-                        continue
-                    
-                    # Usar función mejorada de extracción
-                    prop = ArgenpropScraper.extraer_datos_propiedad(card, href, zona, debug)
-                    if prop:
-                        propiedades.append(prop)
-                except Exception as e:
+                            datos["href"] = "https://www.argenprop.com" + href
+                        prop = ArgenpropScraper.parsear_tarjeta(datos, zona, debug)
+                        if prop:
+                            propiedades.append(prop)
+                except Exception as js_error:
+                    logger.warning(f"Argenprop: extracción por script falló ({js_error}), leyendo tarjeta por tarjeta")
+                    propiedades = []
+                    cards = driver.find_elements(By.CSS_SELECTOR, ".card")
                     if debug:
-                        logger.error(f"Error procesando tarjeta: {e}")
-                    continue
+                        logger.info(f"Encontradas {len(cards)} tarjetas")
+                
+                    for idx, card in enumerate(cards[:limit]):
+                        # Verificar flag de stop en cada iteración
+                        if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
+                            if debug:
+                                logger.info(f"Stop solicitado, deteniendo en tarjeta {idx}")
+                            break
+                    
+                        try:
+                            # Obtener URL del link
+                            href = ""
+                            try:
+                                link = card.find_element(By.TAG_NAME, "a")
+                                href = link.get_attribute("href")
+                                if not href.startswith("http"):
+                                    href = "https://www.argenprop.com" + href
+                            except:
+                                continue
+                        
+                            # Usar función mejorada de extracción
+                            prop = ArgenpropScraper.extraer_datos_propiedad(card, href, zona, debug)
+                            if prop:
+                                propiedades.append(prop)
+                        except Exception as e:
+                            if debug:
+                                logger.error(f"Error procesando tarjeta: {e}")
+                            continue
             
-            if debug:
-                logger.info(f"✅ Extraídas {len(propiedades)} propiedades")
+                if debug:
+                    logger.info(f"✅ Extraídas {len(propiedades)} propiedades")
         
         except Exception as e:
             logger.error(f"Error Argenprop: {e}")
         
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-        
         return propiedades
 
+    @staticmethod
+    def extraer_tarjetas(driver, limit: int) -> List[Dict]:
+        """
+        Datos crudos de las primeras `limit` tarjetas del listado (href, h2, textos
+        de <p> y <span>, imágenes) en un solo execute_script, en lugar de varias
+        idas y vueltas a WebDriver por tarjeta.
+        """
+        tarjetas = driver.execute_script(JS_TARJETAS_ARGENPROP, ".card", int(limit))
+        if not isinstance(tarjetas, list):
+            raise ValueError(f"Respuesta inesperada del script de tarjetas: {type(tarjetas).__name__}")
+        return tarjetas
+
     @staticmethod
     def extraer_datos_propiedad(card, href, zona, debug=False):
-        """Extrae datos detallados de una tarjeta de propiedad en Argenprop."""
+        """Extrae datos detallados de una tarjeta de propiedad en Argenprop (un WebElement por vez)."""
         try:
             from selenium.webdriver.common.by import By
             
-            # Título
-            h2 = card.find_element(By.TAG_NAME, "h2").text.strip()
+            datos = {
+                "href": href,
+                "h2": card.find_element(By.TAG_NAME, "h2").text,
+                "parrafos": [p.text for p in card.find_elements(By.TAG_NAME, "p")],
+                "spans": [span.text for span in card.find_elements(By.TAG_NAME, "span")],
+            }
+            return ArgenpropScraper.parsear_tarjeta(datos, zona, debug)
+        except Exception as e:
+            if debug:
+                logger.error(f"Error extrayendo datos: {e}")
+            return None
+
+    @staticmethod
+    def parsear_tarjeta(datos: Dict, zona, debug=False):
+        """Arma la propiedad a partir de los textos de una tarjeta (de extraer_tarjetas o de un WebElement)."""
+        try:
+            href = datos.get("href") or ""
+            h2 = (datos.get("h2") or "").strip()
             if not h2:
                 return None
             
@@ -223,24 +260,12 @@ class ArgenpropScraper:
             antiguedad = None
             amenities_list = []
             
-            # Extraer información de párrafos y elementos
-            elementos_texto = []
-            try:
-                for p in card.find_elements(By.TAG_NAME, "p"):
-                    p_text = p.text.strip()
-                    if p_text:
-                        elementos_texto.append(p_text)
-            except:
-                pass
-            
-            # Extraer información de spans, divs, etc
-            try:
-                for span in card.find_elements(By.TAG_NAME, "span"):
-                    span_text = span.text.strip()
-                    if span_text and span_text not in elementos_texto:
-                        elementos_texto.append(span_text)
-            except:
-                pass
+            # Textos de párrafos y después de spans (sin repetir los ya vistos)
+            elementos_texto = [t.strip() for t in datos.get("parrafos") or [] if t and t.strip()]
+            for span_text in datos.get("spans") or []:
+                span_text = (span_text or "").strip()
+                if span_text and span_text not in elementos_texto:
+                    elementos_texto.append(span_text)
             
             # Procesar texto extraído
             for text in elementos_texto:
@@ -253,7 +278,6 @@ class ArgenpropScraper:
                 # Metros cubiertos (70 m² cubie., 70m2, etc)
                 elif "m²" in text or "m2" in text:
                     try:
-                        import re
                         match = re.search(r'(\d+(?:\.\d+)?)\s*m[²2]', text, re.IGNORECASE)
                         if match:
                             valor = float(match.group(1))
@@ -267,7 +291,6 @@ class ArgenpropScraper:
                 # Habitaciones/Dormitorios
                 elif any(word in text_lower for word in ["dorm", "dormitorio", "ambientes"]):
                     try:
-                        import re
                         match = re.search(r'(\d+)', text)
                         if match:
                             habitaciones = int(match.group(1))
@@ -277,7 +300,6 @@ class ArgenpropScraper:
                 # Baños
                 elif "baño" in text_lower or "bano" in text_lower:
                     try:
-                        import re
                         match = re.search(r'(\d+)', text)
                         if match:
                             banos = int(match.group(1))
@@ -287,7 +309,6 @@ class ArgenpropScraper:
                 # Toilettes
                 elif "toilette" in text_lower:
                     try:
-                        import re
                         match = re.search(r'(\d+)', text)
                         if match:
                             toilettes = int(match.group(1))
@@ -297,7 +318,6 @@ class ArgenpropScraper:
                 # Antigüedad
                 elif "año" in text_lower or "antigüedad" in text_lower:
                     try:
-                        import re
                         match = re.search(r'(\d+)\s*año', text, re.IGNORECASE)
                         if match:
                             antiguedad = int(match.group(1))
@@ -355,6 +375,8 @@ class ArgenpropScraper:
                 "latitud": None,
                 "longitud": None,
             }
+            if datos.get("imagenes"):
+                propiedad["foto_portada"] = datos["imagenes"][0]
             
             if debug:
                 logger.info(f"Propiedad extraída: {h2} - {metros_cubiertos}m² - {habitaciones} dorm")
@@ -367,17 +389,18 @@ class ArgenpropScraper:
             return None
     
 
-
 class BuscadorPropScraper:
     @staticmethod
-    def extraer_detalles_propiedad(url: str, debug: bool = False) -> Dict:
-        """Extrae detalles completos de una página de propiedad individual en BuscadorProp."""
+    def extraer_detalles_propiedad(url: str, debug: bool = False, detener: threading.Event = None) -> Dict:
+        """
+        Extrae detalles completos de una página de propiedad individual en BuscadorProp.
+        Si `detener` se activa antes de cargar la página, devuelve los detalles vacíos sin pedirla.
+        """
         try:
-            from selenium import webdriver
             from selenium.webdriver.common.by import By
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
+            from src.driver_pool import obtener_pool
+            from src.rate_limit import obtener_limitador
+            from src.waits import esperar_documento_listo, esperar_elementos_estables, esperar_imagenes
         except:
             logger.error("selenium no disponible para extraer detalles")
             return {}
@@ -396,285 +419,236 @@ class BuscadorPropScraper:
             "precio_completo": None,
         }
         
-        opts = Options()
-        opts.add_argument("--headless")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-dev-shm-usage")
-        opts.add_argument("--disable-gpu")
-        opts.add_argument("--window-size=1920,1080")
-        opts.add_argument("--disable-blink-features=AutomationControlled")  # Evitar detección de version en Chrome
-        opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0")
-        
-        # Detectar si Chromium está instalado en el sistema (Streamlit Cloud)
-        chromium_paths = [
-            "/usr/bin/chromium-browser",  # Streamlit Cloud
-            "/usr/bin/chromium",
-            "/snap/bin/chromium",
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",  # macOS
-            "C:\\Program Files\\Chromium\\Application\\chrome.exe",  # Windows
-        ]
-        chromium_binary = None
-        for path in chromium_paths:
-            if os.path.exists(path):
-                chromium_binary = path
-                logger.debug(f"Detectado Chromium en: {chromium_binary}")
-                break
-        
-        if chromium_binary:
-            opts.binary_location = chromium_binary
-        
-        driver = None
         try:
-            try:
-                from webdriver_manager.chrome import ChromeDriverManager
-                from selenium.webdriver.chrome.service import Service
-                driver_path = ChromeDriverManager().install()
-                logger.debug(f"ChromeDriver instalado en: {driver_path}")
-                driver = webdriver.Chrome(service=Service(driver_path), options=opts)
-            except ModuleNotFoundError as module_error:
-                # webdriver_manager no está instalado
-                if "webdriver_manager" in str(module_error):
-                    logger.debug(f"BuscadorProp: webdriver_manager no disponible, intentando sin manager...")
-                    driver = webdriver.Chrome(options=opts)
-                else:
-                    logger.debug(f"BuscadorProp: Error de módulo para {url}, devolviendo detalles vacíos")
-                    return detalles
-            except Exception as driver_init_error:
-                # Si falla la inicialización del driver, es probable que sea por dependencias del sistema
-                error_msg = str(driver_init_error)
-                if "127" in error_msg or "unexpectedly exited" in error_msg or "chromedriver" in error_msg.lower():
-                    logger.debug(f"BuscadorProp: Chromedriver no disponible, devolviendo detalles vacíos")
-                    return detalles
-                elif "session not created" in error_msg.lower() or "version" in error_msg.lower():
-                    # ChromeDriver version mismatch - intentar sin manager
-                    logger.debug(f"BuscadorProp: Version mismatch, intentando sin webdriver_manager...")
-                    try:
-                        driver = webdriver.Chrome(options=opts)
-                    except Exception as fallback_error:
-                        logger.debug(f"BuscadorProp: Fallback también falló, devolviendo detalles vacíos")
-                        return detalles
-                else:
-                    logger.debug(f"BuscadorProp: Error inicializando driver para {url}, devolviendo detalles vacíos")
+            if detener is not None and detener.is_set():
+                return detalles
+            # El turno del rate limit se toma antes de pedir un driver: el que espera no retiene un Chrome
+            obtener_limitador().esperar(url)
+            with obtener_pool().driver() as driver:
+                if detener is not None and detener.is_set():
                     return detalles
+                driver.get(url)
+                esperar_documento_listo(driver, "buscadorprop.detalle")
+                esperar_elementos_estables(driver, "h1", "buscadorprop.detalle_titulo", timeout=5, estable_por=0.3)
             
-            driver.get(url)
-            time.sleep(3)
-            
-            # Extraer dirección
-            try:
-                direccion = driver.find_element(By.CSS_SELECTOR, "h1, .property-address, [class*='direccion'], [class*='address']").text
-                detalles["direccion"] = direccion
-            except:
-                pass
-            
-            # Extraer precio completo
-            try:
-                # Buscar elemento con "USD" o "$"
-                for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'USD') or contains(text(), '$')]"):
-                    text = elem.text.strip()
-                    if any(char.isdigit() for char in text):
-                        detalles["precio_completo"] = text
-                        if debug:
-                            logger.info(f"Precio extraído: {text}")
-                        break
-            except:
-                pass
+                # Extraer dirección
+                try:
+                    direccion = driver.find_element(By.CSS_SELECTOR, "h1, .property-address, [class*='direccion'], [class*='address']").text
+                    detalles["direccion"] = direccion
+                except:
+                    pass
             
-            # Extraer características (ambientes, dormitorios, baños, etc.)
-            try:
-                # Buscar en los textos de la página
-                page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
-                
-                # Ambientes
-                if "ambiente" in page_text:
-                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'ambiente') or contains(text(), 'Ambiente')]"):
-                        text = elem.text.strip()
-                        try:
-                            # Extraer número antes de "ambiente"
-                            num = int(text.split()[0])
-                            detalles["ambientes"] = num
-                            break
-                        except:
-                            pass
-                
-                # Dormitorios
-                if "dormitorio" in page_text:
-                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'dormitorio') or contains(text(), 'Dormitorio')]"):
-                        text = elem.text.strip()
-                        try:
-                            num = int(text.split()[0])
-                            detalles["dormitorios"] = num
-                            break
-                        except:
-                            pass
-                
-                # Baños
-                if "baño" in page_text:
-                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'baño') or contains(text(), 'Baño')]"):
+                # Extraer precio completo
+                try:
+                    # Buscar elemento con "USD" o "$"
+                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'USD') or contains(text(), '$')]"):
                         text = elem.text.strip()
-                        try:
-                            num = int(text.split()[0])
-                            detalles["baños"] = num
+                        if any(char.isdigit() for char in text):
+                            detalles["precio_completo"] = text
+                            if debug:
+                                logger.info(f"Precio extraído: {text}")
                             break
-                        except:
-                            pass
+                except:
+                    pass
+            
+                # Extraer características (ambientes, dormitorios, baños, etc.)
+                try:
+                    # Buscar en los textos de la página
+                    page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
                 
-                # Antigüedad
-                if "año" in page_text and "antigüedad" in page_text:
-                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'año') and contains(text(), 'ntiguedad')]"):
-                        text = elem.text.strip()
-                        try:
-                            num = int(text.split()[0])
-                            detalles["antiguedad"] = num
-                            break
-                        except:
-                            pass
+                    # Ambientes
+                    if "ambiente" in page_text:
+                        for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'ambiente') or contains(text(), 'Ambiente')]"):
+                            text = elem.text.strip()
+                            try:
+                                # Extraer número antes de "ambiente"
+                                num = int(text.split()[0])
+                                detalles["ambientes"] = num
+                                break
+                            except:
+                                pass
                 
-                # Estado
-                estado_keywords = ["refaccionar", "buen estado", "excelente", "a reformar"]
-                for keyword in estado_keywords:
-                    if keyword in page_text:
-                        detalles["estado"] = keyword.title()
-                        break
+                    # Dormitorios
+                    if "dormitorio" in page_text:
+                        for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'dormitorio') or contains(text(), 'Dormitorio')]"):
+                            text = elem.text.strip()
+                            try:
+                                num = int(text.split()[0])
+                                detalles["dormitorios"] = num
+                                break
+                            except:
+                                pass
                 
-                # Superficie total
-                if "m2" in page_text or "m²" in page_text:
-                    try:
-                        # Buscar "210m2" o "210 m2"
-                        import re
-                        matches = re.findall(r'(\d+)\s*m[2²]', page_text)
-                        if matches:
-                            # El primer match suele ser superficie total
-                            detalles["superficie_total"] = int(matches[0])
-                            # El segundo match suele ser cubierta
-                            if len(matches) > 1:
-                                detalles["superficie_cubierta"] = int(matches[1])
-                    except:
-                        pass
+                    # Baños
+                    if "baño" in page_text:
+                        for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'baño') or contains(text(), 'Baño')]"):
+                            text = elem.text.strip()
+                            try:
+                                num = int(text.split()[0])
+                                detalles["baños"] = num
+                                break
+                            except:
+                                pass
                 
-                # Pisos
-                if "piso" in page_text:
-                    for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'piso') or contains(text(), 'Piso')]"):
-                        text = elem.text.strip()
-                        if text.lower().startswith(('1 ', '2 ', '3 ', '4 ', '5 ', '6 ')):
+                    # Antigüedad
+                    if "año" in page_text and "antigüedad" in page_text:
+                        for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'año') and contains(text(), 'ntiguedad')]"):
+                            text = elem.text.strip()
                             try:
                                 num = int(text.split()[0])
-                                detalles["pisos"] = num
+                                detalles["antiguedad"] = num
                                 break
                             except:
                                 pass
-            except Exception as e:
-                if debug:
-                    logger.info(f"Error extrayendo características: {e}")
+                
+                    # Estado
+                    estado_keywords = ["refaccionar", "buen estado", "excelente", "a reformar"]
+                    for keyword in estado_keywords:
+                        if keyword in page_text:
+                            detalles["estado"] = keyword.title()
+                            break
+                
+                    # Superficie total
+                    if "m2" in page_text or "m²" in page_text:
+                        try:
+                            # Buscar "210m2" o "210 m2"
+                            import re
+                            matches = re.findall(r'(\d+)\s*m[2²]', page_text)
+                            if matches:
+                                # El primer match suele ser superficie total
+                                detalles["superficie_total"] = int(matches[0])
+                                # El segundo match suele ser cubierta
+                                if len(matches) > 1:
+                                    detalles["superficie_cubierta"] = int(matches[1])
+                        except:
+                            pass
+                
+                    # Pisos
+                    if "piso" in page_text:
+                        for elem in driver.find_elements(By.XPATH, "//*[contains(text(), 'piso') or contains(text(), 'Piso')]"):
+                            text = elem.text.strip()
+                            if text.lower().startswith(('1 ', '2 ', '3 ', '4 ', '5 ', '6 ')):
+                                try:
+                                    num = int(text.split()[0])
+                                    detalles["pisos"] = num
+                                    break
+                                except:
+                                    pass
+                except Exception as e:
+                    if debug:
+                        logger.info(f"Error extrayendo características: {e}")
             
-            # Extraer fotos
-            try:
-                fotos = []
+                # Extraer fotos
+                try:
+                    fotos = []
                 
-                # Esperar a que carguen las imágenes
-                time.sleep(2)
+                    # Esperar a que carguen las fotos de la galería (no alcanza con el logo del header)
+                    esperar_imagenes(
+                        driver, "img[data-src], picture img, [class*='gallery'] img, [class*='carousel'] img",
+                        "buscadorprop.fotos", timeout=5,
+                    )
                 
-                # Palabras clave para excluir (logos, iconos, etc)
-                exclude_keywords = [
-                    'logo', 'icon', 'placeholder', 'avatar', 'sprite', 'button',
-                    'header', 'footer', 'nav', 'menu', 'banner', 'badge',
-                    'mark', 'seal', 'watermark', 'instagram', 'facebook',
-                    'youtube', 'twitter', 'social', 'share', 'arrow',
-                    'chevron', 'check', 'close', 'spinner', 'loading',
-                    'flag', 'star', 'rating', 'dot', 'circle', 'square',
-                    'buscadorprop', 'zonaprop', 'logo', 'badge', 'seal',
-                    'button', 'arrow', 'heart', 'share', 'favorite',
-                    'tiktok', 'instagram', 'facebook', 'youtube', 'twitter',
-                    'social', 'watermark', 'copyright', 'realtor'
-                ]
+                    # Palabras clave para excluir (logos, iconos, etc)
+                    exclude_keywords = [
+                        'logo', 'icon', 'placeholder', 'avatar', 'sprite', 'button',
+                        'header', 'footer', 'nav', 'menu', 'banner', 'badge',
+                        'mark', 'seal', 'watermark', 'instagram', 'facebook',
+                        'youtube', 'twitter', 'social', 'share', 'arrow',
+                        'chevron', 'check', 'close', 'spinner', 'loading',
+                        'flag', 'star', 'rating', 'dot', 'circle', 'square',
+                        'buscadorprop', 'zonaprop', 'logo', 'badge', 'seal',
+                        'button', 'arrow', 'heart', 'share', 'favorite',
+                        'tiktok', 'instagram', 'facebook', 'youtube', 'twitter',
+                        'social', 'watermark', 'copyright', 'realtor'
+                    ]
                 
-                def is_valid_photo(src):
-                    """Verifica si una URL es una foto válida de una propiedad (no logo/icon/banner)."""
-                    if not src or len(src) < 50:
-                        return False
+                    def is_valid_photo(src):
+                        """Verifica si una URL es una foto válida de una propiedad (no logo/icon/banner)."""
+                        if not src or len(src) < 50:
+                            return False
                     
-                    src_lower = src.lower()
+                        src_lower = src.lower()
                     
-                    # Excluir si contiene palabras clave sospechosas
-                    if any(kw in src_lower for kw in exclude_keywords):
-                        return False
+                        # Excluir si contiene palabras clave sospechosas
+                        if any(kw in src_lower for kw in exclude_keywords):
+                            return False
                     
-                    # Excluir patrones típicos de logos/icons
-                    if any(pattern in src_lower for pattern in ['favicon', 'icon-', '/logo/', '/brand/', '/mark/', '/seal/', 'default-image', 'no-image', 'placeholder']):
-                        return False
+                        # Excluir patrones típicos de logos/icons
+                        if any(pattern in src_lower for pattern in ['favicon', 'icon-', '/logo/', '/brand/', '/mark/', '/seal/', 'default-image', 'no-image', 'placeholder']):
+                            return False
                     
-                    # Incluir solo imágenes válidas
-                    if not any(ext in src_lower for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']):
-                        return False
+                        # Incluir solo imágenes válidas
+                        if not any(ext in src_lower for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']):
+                            return False
                     
-                    # Heurística: URLs de propiedades reales suelen tener patrones de dimensiones
-                    # o IDs largos (¿w=800&h=600, /800x600/, etc.)
-                    import re
-                    size_pattern = r'(?:w|width|h|height|size)=?\d{2,4}|/\d{3,4}x\d{3,4}/'
-                    id_pattern = r'/\d{6,}|id=\d{6,}|prop_\d+|image_\d+'
+                        # Heurística: URLs de propiedades reales suelen tener patrones de dimensiones
+                        # o IDs largos (¿w=800&h=600, /800x600/, etc.)
+                        import re
+                        size_pattern = r'(?:w|width|h|height|size)=?\d{2,4}|/\d{3,4}x\d{3,4}/'
+                        id_pattern = r'/\d{6,}|id=\d{6,}|prop_\d+|image_\d+'
                     
-                    if re.search(size_pattern, src_lower) or re.search(id_pattern, src_lower):
-                        return True
+                        if re.search(size_pattern, src_lower) or re.search(id_pattern, src_lower):
+                            return True
                     
-                    # Si la URL es muy larga y tiene slashes con muchos parámetros, probablemente sea una imagen real
-                    if len(src) > 100 and src.count('/') > 4:
-                        return True
+                        # Si la URL es muy larga y tiene slashes con muchos parámetros, probablemente sea una imagen real
+                        if len(src) > 100 and src.count('/') > 4:
+                            return True
                     
-                    return False
+                        return False
                 
-                # Estrategia 1: Buscar en atributos data-src (lazy loading)
-                for img in driver.find_elements(By.XPATH, "//img[@data-src]"):
-                    src = img.get_attribute("data-src") or img.get_attribute("src")
-                    if is_valid_photo(src) and src not in fotos:
-                        fotos.append(src)
+                    # Estrategia 1: Buscar en atributos data-src (lazy loading)
+                    for img in driver.find_elements(By.XPATH, "//img[@data-src]"):
+                        src = img.get_attribute("data-src") or img.get_attribute("src")
+                        if is_valid_photo(src) and src not in fotos:
+                            fotos.append(src)
                 
-                # Estrategia 2: Buscar en tags picture o div con data-src
-                if not fotos or len(fotos) < 3:
-                    for picture in driver.find_elements(By.TAG_NAME, "picture"):
-                        try:
-                            img = picture.find_element(By.TAG_NAME, "img")
-                            src = img.get_attribute("src") or img.get_attribute("data-src")
-                            if is_valid_photo(src) and src not in fotos:
-                                fotos.append(src)
-                        except:
-                            pass
+                    # Estrategia 2: Buscar en tags picture o div con data-src
+                    if not fotos or len(fotos) < 3:
+                        for picture in driver.find_elements(By.TAG_NAME, "picture"):
+                            try:
+                                img = picture.find_element(By.TAG_NAME, "img")
+                                src = img.get_attribute("src") or img.get_attribute("data-src")
+                                if is_valid_photo(src) and src not in fotos:
+                                    fotos.append(src)
+                            except:
+                                pass
                 
-                # Estrategia 3: Ejecutar JavaScript para obtener todas las imágenes
-                try:
-                    js_fotos = driver.execute_script("""
-                        const excludeKeywords = ['logo', 'icon', 'placeholder', 'avatar', 'sprite', 'button',
-                                                 'header', 'footer', 'nav', 'menu', 'banner', 'badge',
-                                                 'mark', 'seal', 'watermark', 'instagram', 'facebook',
-                                                 'youtube', 'twitter', 'social', 'share', 'arrow'];
-                        return Array.from(document.querySelectorAll('img'))
-                            .map(img => img.src || img.getAttribute('data-src'))
-                            .filter(src => {
-                                if (!src || src.length < 40) return false;
-                                const lower = src.toLowerCase();
-                                if (excludeKeywords.some(kw => lower.includes(kw))) return false;
-                                return true;
-                            })
-                            .filter((src, idx, arr) => arr.indexOf(src) === idx);
-                    """)
-                    if js_fotos:
-                        for f in js_fotos:
-                            if f not in fotos:
-                                fotos.append(f)
-                except:
-                    pass
+                    # Estrategia 3: Ejecutar JavaScript para obtener todas las imágenes
+                    try:
+                        js_fotos = driver.execute_script("""
+                            const excludeKeywords = ['logo', 'icon', 'placeholder', 'avatar', 'sprite', 'button',
+                                                     'header', 'footer', 'nav', 'menu', 'banner', 'badge',
+                                                     'mark', 'seal', 'watermark', 'instagram', 'facebook',
+                                                     'youtube', 'twitter', 'social', 'share', 'arrow'];
+                            return Array.from(document.querySelectorAll('img'))
+                                .map(img => img.src || img.getAttribute('data-src'))
+                                .filter(src => {
+                                    if (!src || src.length < 40) return false;
+                                    const lower = src.toLowerCase();
+                                    if (excludeKeywords.some(kw => lower.includes(kw))) return false;
+                                    return true;
+                                })
+                                .filter((src, idx, arr) => arr.indexOf(src) === idx);
+                        """)
+                        if js_fotos:
+                            for f in js_fotos:
+                                if f not in fotos:
+                                    fotos.append(f)
+                    except:
+                        pass
                 
-                # Remover duplicados manteniendo orden
-                fotos_unicas = []
-                for foto in fotos:
-                    if foto not in fotos_unicas:
-                        fotos_unicas.append(foto)
+                    # Remover duplicados manteniendo orden
+                    fotos_unicas = []
+                    for foto in fotos:
+                        if foto not in fotos_unicas:
+                            fotos_unicas.append(foto)
                 
-                detalles["fotos"] = fotos_unicas[:10]  # Máximo 10 fotos
-                if debug:
-                    logger.info(f"Fotos extraídas: {len(fotos_unicas)}")
-            except Exception as e:
-                if debug:
-                    logger.info(f"Error extrayendo fotos: {e}")
+                    detalles["fotos"] = fotos_unicas[:10]  # Máximo 10 fotos
+                    if debug:
+                        logger.info(f"Fotos extraídas: {len(fotos_unicas)}")
+                except Exception as e:
+                    if debug:
+                        logger.info(f"Error extrayendo fotos: {e}")
         
         except Exception as e:
             error_msg = str(e)
@@ -683,15 +657,54 @@ class BuscadorPropScraper:
             else:
                 logger.debug(f"Error extrayendo detalles de {url}: {type(e).__name__}: {e}")
         
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-        
         return detalles
     
+    @staticmethod
+    def extraer_detalles_en_paralelo(urls: List[str], debug: bool = False, stop_flag=None,
+                                     max_workers: int = None) -> Iterator[Dict]:
+        """
+        Extrae los detalles de varias páginas con un pool acotado de workers y los
+        devuelve en el mismo orden que `urls` a medida que van estando listos.
+        El espaciado entre pedidos lo pone el rate limit por host, no pausas fijas.
+        """
+        from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoPendiente
+
+        from src.config import DETALLES_WORKERS
+
+        if not urls:
+            return
+        workers = max(1, min(max_workers or DETALLES_WORKERS, len(urls)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detalles")
+        # El flag se consulta desde el thread que llama (session_state no es de los workers)
+        # y se pasa a los workers con este Event, que revisan antes de cargar cada página
+        detener = threading.Event()
+
+        def stop_solicitado() -> bool:
+            return stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag
+
+        try:
+            futuros = [executor.submit(BuscadorPropScraper.extraer_detalles_propiedad, url, debug, detener)
+                       for url in urls]
+            for idx, futuro in enumerate(futuros):
+                while not detener.is_set():
+                    if stop_solicitado():
+                        detener.set()
+                        break
+                    try:
+                        resultado = futuro.result(timeout=0.2)
+                        break
+                    except FuturoPendiente:
+                        continue
+                if detener.is_set():
+                    if debug:
+                        logger.info(f"Stop solicitado en BuscadorProp, deteniendo en detalle {idx}")
+                    break
+                yield resultado
+        finally:
+            # Lo que no empezó se cancela y lo que está en cola ve `detener` antes de pedir su página
+            detener.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     @staticmethod
     def buscar_propiedades(zona: str = "Palermo", tipo: str = "venta", limit: int = 10, debug: bool = False, stop_flag=None) -> List[Dict]:
         """Scraping de BuscadorProp."""
@@ -704,11 +717,10 @@ class BuscadorPropScraper:
     def buscar_propiedades_selenium(zona: str = "Palermo", tipo: str = "venta", limit: int = 10, debug: bool = False, stop_flag=None) -> List[Dict]:
         """Scraping de BuscadorProp - extrae h2 (tipo) + dirección (span/p) + detalles + fotos."""
         try:
-            from selenium import webdriver
             from selenium.webdriver.common.by import By
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
+            from src.driver_pool import obtener_pool
+            from src.rate_limit import obtener_limitador
+            from src.waits import esperar_elementos_estables, esperar_oculto, scroll_hasta_estable
         except:
             logger.error("selenium no disponible")
             return []
@@ -720,179 +732,108 @@ class BuscadorPropScraper:
         if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
             return []
         
-        opts = Options()
-        opts.add_argument("--headless")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-dev-shm-usage")
-        opts.add_argument("--disable-gpu")
-        opts.add_argument("--window-size=1920,1080")
-        opts.add_argument("--disable-blink-features=AutomationControlled")  # Evitar detección de version en Chrome
-        opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0")
-        
-        # Detectar si Chromium está instalado en el sistema (Streamlit Cloud)
-        chromium_paths = [
-            "/usr/bin/chromium-browser",  # Streamlit Cloud
-            "/usr/bin/chromium",
-            "/snap/bin/chromium",
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",  # macOS
-            "C:\\Program Files\\Chromium\\Application\\chrome.exe",  # Windows
-        ]
-        chromium_binary = None
-        for path in chromium_paths:
-            if os.path.exists(path):
-                chromium_binary = path
-                logger.debug(f"Detectado Chromium en: {chromium_binary}")
-                break
-        
-        if chromium_binary:
-            opts.binary_location = chromium_binary
-        
         out: List[Dict] = []
-        driver = None
-        
-        # Detectar si Chromium está instalado en el sistema (Streamlit Cloud)
-        chromium_paths = [
-            "/usr/bin/chromium-browser",  # Streamlit Cloud (antiguo)
-            "/usr/bin/chromium",          # Streamlit Cloud (actual)
-            "/snap/bin/chromium",
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",  # macOS
-            "C:\\Program Files\\Chromium\\Application\\chrome.exe",  # Windows
-        ]
-        chromium_binary = None
-        for path in chromium_paths:
-            if os.path.exists(path):
-                chromium_binary = path
-                logger.debug(f"Detectado Chromium en: {chromium_binary}")
-                break
-        
-        if chromium_binary:
-            opts.binary_location = chromium_binary
+        # Datos de cada tarjeta del listado; los detalles se piden después de liberar el driver del listado
+        tarjetas: List[Dict] = []
         
         try:
-            # ESTRATEGIA: Intentar sin webdriver-manager primero (más rápido, evita version mismatch)
-            logger.debug("BuscadorProp: Intentando Chrome sin webdriver-manager...")
-            driver = webdriver.Chrome(options=opts)
-            logger.debug("✅ BuscadorProp: Chrome inicializado correctamente")
-            
-        except Exception as direct_error:
-            error_msg_direct = str(direct_error)
-            logger.debug(f"BuscadorProp: Fallback necesario. Error directo: {error_msg_direct[:100]}")
-            
-            # Si falla, intentar con webdriver-manager como fallback
-            try:
-                from webdriver_manager.chrome import ChromeDriverManager
-                from selenium.webdriver.chrome.service import Service
-                logger.debug("BuscadorProp: Intentando con webdriver-manager...")
-                driver_path = ChromeDriverManager().install()
-                logger.debug(f"ChromeDriver instalado en: {driver_path}")
-                driver = webdriver.Chrome(service=Service(driver_path), options=opts)
-                logger.debug("✅ BuscadorProp: Chrome inicializado con webdriver-manager")
+            # El turno del rate limit se toma antes de pedir un driver: el que espera no retiene un Chrome
+            obtener_limitador().esperar(base_url)
+            with obtener_pool().driver() as driver:
+                if debug:
+                    logger.info(f"BuscadorProp: {base_url}")
                 
-            except ModuleNotFoundError:
-                logger.error(f"BuscadorProp error: webdriver_manager no instalado")
-                logger.warning(f"BuscadorProp: No se puede descargar propiedades de {zona}")
-                return []
+                driver.get(base_url)
                 
-            except Exception as wdm_error:
-                error_msg_wdm = str(wdm_error)
-                logger.error(f"BuscadorProp error: Ambos métodos fallaron")
-                logger.error(f"  Directo: {error_msg_direct[:150]}")
-                logger.error(f"  WebDriver-manager: {error_msg_wdm[:150]}")
-                logger.warning(f"BuscadorProp: No se puede descargar propiedades de {zona}")
-                return []
-        
-        try:
-            if debug:
-                logger.info(f"BuscadorProp: {base_url}")
-            
-            driver.get(base_url)
-            
-            try:
-                WebDriverWait(driver, 15).until(
-                    EC.invisibility_of_element_located((By.CSS_SELECTOR, ".loading-spinner"))
-                )
-            except:
-                time.sleep(8)
-            
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
-            
-            links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/propiedad/']")
-            if debug:
-                logger.info(f"Encontrados {len(links)} links")
-            
-            for idx, link in enumerate(links[:limit]):
-                # Verificar flag de stop en cada iteración
-                if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
-                    if debug:
-                        logger.info(f"Stop solicitado en BuscadorProp, deteniendo en link {idx}")
-                    break
+                esperar_oculto(driver, ".loading-spinner", "buscadorprop.spinner", timeout=15)
+                esperar_elementos_estables(driver, "a[href*='/propiedad/']", "buscadorprop.links", timeout=8)
+                scroll_hasta_estable(driver, "a[href*='/propiedad/']", "buscadorprop.scroll", max_scrolls=1)
                 
-                try:
-                    href = link.get_attribute("href")
-                    if not href:
-                        continue
-                    if not href.startswith("http"):
-                        href = "https://www.buscadorprop.com.ar" + href
-                    
-                    # Obtener contenedor
-                    parent = link
-                    for _ in range(5):
-                        parent = parent.find_element(By.XPATH, "..")
-                        if len(parent.text.strip()) > 20:
-                            break
+                links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/propiedad/']")
+                if debug:
+                    logger.info(f"Encontrados {len(links)} links")
+                
+                for idx, link in enumerate(links[:limit]):
+                    # Verificar flag de stop en cada iteración
+                    if stop_flag is not None and hasattr(stop_flag, 'scraper_stop_flag') and stop_flag.scraper_stop_flag:
+                        if debug:
+                            logger.info(f"Stop solicitado en BuscadorProp, deteniendo en link {idx}")
+                        break
                     
-                    # h2 = tipo de propiedad
-                    titulo = ""
                     try:
-                        titulo = parent.find_element(By.TAG_NAME, "h2").text.strip()
-                    except:
-                        pass
-                    
-                    # Dirección: buscar span con comas o "Buenos Aires"
-                    direccion = ""
-                    for span in parent.find_elements(By.TAG_NAME, "span"):
-                        span_text = span.text.strip()
-                        if len(span_text) > 10 and len(span_text) < 150 and ("," in span_text or "Buenos Aires" in span_text):
-                            direccion = span_text
-                            break
-                    
-                    # Descripción
-                    desc = f"{titulo} - {direccion}" if (titulo and direccion) else titulo
-                    if not desc or len(desc) < 10:
+                        href = link.get_attribute("href")
+                        if not href:
+                            continue
+                        if not href.startswith("http"):
+                            href = "https://www.buscadorprop.com.ar" + href
+                        
+                        # Obtener contenedor
+                        parent = link
+                        for _ in range(5):
+                            parent = parent.find_element(By.XPATH, "..")
+                            if len(parent.text.strip()) > 20:
+                                break
+                        
+                        # h2 = tipo de propiedad
+                        titulo = ""
+                        try:
+                            titulo = parent.find_element(By.TAG_NAME, "h2").text.strip()
+                        except:
+                            pass
+                        
+                        # Dirección: buscar span con comas o "Buenos Aires"
+                        direccion = ""
+                        for span in parent.find_elements(By.TAG_NAME, "span"):
+                            span_text = span.text.strip()
+                            if len(span_text) > 10 and len(span_text) < 150 and ("," in span_text or "Buenos Aires" in span_text):
+                                direccion = span_text
+                                break
+                        
+                        # Descripción
+                        desc = f"{titulo} - {direccion}" if (titulo and direccion) else titulo
+                        if not desc or len(desc) < 10:
+                            continue
+                        
+                        # Precio inicial (de la tarjeta)
+                        precio = "N/A"
+                        for line in parent.text.split("\n"):
+                            if "$" in line or "USD" in line.upper():
+                                precio = line.strip()
+                                break
+                        
+                        # Extraer foto de la tarjeta (portada)
+                        foto_portada = None
+                        try:
+                            img = parent.find_element(By.TAG_NAME, "img")
+                            img_src = img.get_attribute("src") or img.get_attribute("data-src")
+                            # Filtrar iconos y logos (no cargar URLs con palabras clave sospechosas)
+                            if img_src and not any(keyword in img_src.lower() for keyword in ["icon", "logo", "star", "placeholder", "header", "footer", "nav", "button", "badge"]):
+                                foto_portada = img_src
+                        except:
+                            pass
+                        
+                        tarjetas.append({"href": href, "titulo": titulo, "desc": desc, "precio": precio, "foto_portada": foto_portada})
+                    except Exception as e:
+                        if debug:
+                            logger.info(f"Error procesando link {idx}: {e}")
                         continue
-                    
-                    # Precio inicial (de la tarjeta)
-                    precio = "N/A"
-                    for line in parent.text.split("\n"):
-                        if "$" in line or "USD" in line.upper():
-                            precio = line.strip()
-                            break
-                    
-                    # Extraer foto de la tarjeta (portada)
-                    foto_portada = None
-                    try:
-                        img = parent.find_element(By.TAG_NAME, "img")
-                        img_src = img.get_attribute("src") or img.get_attribute("data-src")
-                        # Filtrar iconos y logos (no cargar URLs con palabras clave sospechosas)
-                        if img_src and not any(keyword in img_src.lower() for keyword in ["icon", "logo", "star", "placeholder", "header", "footer", "nav", "button", "badge"]):
-                            foto_portada = img_src
-                    except:
-                        pass
-                    
-                    # NUEVO: Extraer detalles completos de la página individual
-                    detalles = BuscadorPropScraper.extraer_detalles_propiedad(href, debug=debug)
-                    
+            
+            # Detalles en paralelo (acotado por el pool de drivers y el rate limit del portal), en el orden del listado
+            detalles_en_orden = BuscadorPropScraper.extraer_detalles_en_paralelo(
+                [t["href"] for t in tarjetas], debug=debug, stop_flag=stop_flag
+            )
+            for idx, (tarjeta, detalles) in enumerate(zip(tarjetas, detalles_en_orden)):
+                try:
+                    href = tarjeta["href"]
                     # Usar precio completo si está disponible
-                    if detalles.get("precio_completo"):
-                        precio = detalles["precio_completo"]
+                    precio = detalles.get("precio_completo") or tarjeta["precio"]
                     
                     out.append({
                         "id": href,
-                        "tipo": titulo or "Propiedad",
+                        "tipo": tarjeta["titulo"] or "Propiedad",
                         "zona": zona,
                         "precio": precio,
-                        "descripcion": desc[:300],
+                        "descripcion": tarjeta["desc"][:300],
                         "url": href,
                         "fuente": "BuscadorProp",
                         "fecha_agregado": datetime.now().isoformat(),
@@ -904,17 +845,15 @@ class BuscadorPropScraper:
                         "metros_descubiertos": detalles.get("superficie_total"),
                         "latitud": None,
                         "longitud": None,
-                        "foto_portada": foto_portada,
+                        "foto_portada": tarjeta["foto_portada"],
                         "fotos": detalles.get("fotos", []),
                         "antiguedad": detalles.get("antiguedad"),
                         "estado": detalles.get("estado"),
                         "direccion": detalles.get("direccion"),
                     })
-                    
-                    time.sleep(random.uniform(1, 2))  # Delay entre propiedades
                 except Exception as e:
                     if debug:
-                        logger.info(f"Error procesando link {idx}: {e}")
+                        logger.info(f"Error procesando detalle {idx}: {e}")
                     continue
             
             if debug:
@@ -928,198 +867,579 @@ class BuscadorPropScraper:
             else:
                 logger.error(f"BuscadorProp error: {e}")
         
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-        
         return out
 
 
+# Columnas indexadas para búsqueda por palabras (BM25)
+FTS_COLUMNAS = ("descripcion", "amenities", "direccion", "tipo")
+
+# Ajustes aplicados a cada conexión del pool. WAL deja leer mientras otro escribe;
+# synchronous=NORMAL es seguro con WAL y evita un fsync por commit.
+SQLITE_TIMEOUT = 30
+PRAGMAS_CONEXION = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA cache_size=-65536",    # 64 MB (negativo = KiB)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=30000",
+)
+
+
+def _expresion_fts(query: str) -> str:
+    """Query libre -> expresión MATCH de FTS5 (OR de términos, prefijo para palabras largas)."""
+    terminos = []
+    for token in re.findall(r'\w+', (query or "").lower()):
+        if len(token) <= 2 or token in terminos:
+            continue
+        terminos.append(token)
+    return " OR ".join(f'"{t}"*' if len(t) >= 4 else f'"{t}"' for t in terminos)
+
+
+# Columnas que escribe la ingesta, en el orden de SQL_UPSERT_PROPIEDAD
+COLUMNAS_PROPIEDAD = (
+    "id", "tipo", "zona", "precio", "precio_valor", "precio_moneda",
+    "habitaciones", "baños", "toilettes", "pileta", "metros_cubiertos", "metros_descubiertos",
+    "orientacion", "antiguedad", "descripcion", "amenities", "latitud", "longitud", "url", "fuente",
+    "fecha_agregado", "foto_portada", "fotos", "estado", "direccion",
+)
+# En una actualización se conservan el id y la fecha en que se vio la propiedad por primera vez
+_COLUMNAS_ACTUALIZABLES = ", ".join(
+    f"{c} = excluded.{c}" for c in COLUMNAS_PROPIEDAD if c not in ("id", "fecha_agregado")
+)
+SQL_UPSERT_PROPIEDAD = f"""
+    INSERT INTO propiedades ({', '.join(COLUMNAS_PROPIEDAD)})
+    VALUES ({', '.join('?' for _ in COLUMNAS_PROPIEDAD)})
+    ON CONFLICT(url) WHERE url IS NOT NULL AND url != '' DO UPDATE SET {_COLUMNAS_ACTUALIZABLES}
+    ON CONFLICT(id) DO UPDATE SET {_COLUMNAS_ACTUALIZABLES}
+"""
+
+_PATRON_NUMERO = re.compile(r'[\d,\.]+')
+
+
+def _normalizar_propiedad(prop: Dict, posicion: int = 0) -> Dict:
+    """Fila lista para insertar: precio parseado, fotos en JSON y valores por defecto."""
+    # Extraer precio valor y moneda
+    precio_texto = prop.get("precio") or "N/A"
+    precio_valor = 0
+    precio_moneda = "USD"
+    if "$" in precio_texto:
+        precio_moneda = "$"
+    numeros = _PATRON_NUMERO.findall(precio_texto)
+    if numeros:
+        num_str = numeros[0].replace('.', '').replace(',', '')
+        if num_str.isdigit():
+            precio_valor = int(num_str)
+
+    # Convertir fotos a JSON si es una lista
+    fotos = prop.get("fotos")
+    fotos_json = json.dumps(fotos) if isinstance(fotos, list) and fotos else ""
+
+    return {
+        "id": str(prop.get("id") or f"{datetime.now().isoformat()}-{posicion}"),
+        "tipo": prop.get("tipo", ""),
+        "zona": prop.get("zona", ""),
+        "precio": prop.get("precio", ""),
+        "precio_valor": precio_valor,
+        "precio_moneda": precio_moneda,
+        "habitaciones": prop.get("habitaciones"),
+        "baños": prop.get("baños"),
+        "toilettes": prop.get("toilettes"),
+        "pileta": 1 if prop.get("pileta") else 0,
+        "metros_cubiertos": prop.get("metros_cubiertos"),
+        "metros_descubiertos": prop.get("metros_descubiertos"),
+        "orientacion": prop.get("orientacion"),
+        "antiguedad": prop.get("antiguedad"),
+        "descripcion": prop.get("descripcion", ""),
+        "amenities": prop.get("amenities", ""),
+        "latitud": prop.get("latitud"),
+        "longitud": prop.get("longitud"),
+        "url": prop.get("url") or "",
+        "fuente": prop.get("fuente", ""),
+        "fecha_agregado": prop.get("fecha_agregado") or datetime.now().isoformat(),
+        "foto_portada": prop.get("foto_portada", ""),
+        "fotos": fotos_json,
+        "estado": prop.get("estado", ""),
+        "direccion": prop.get("direccion", ""),
+    }
+
+
+def _poblar_fts(cursor) -> None:
+    """
+    Reconstruye el contenido del índice BM25 desde la tabla de propiedades.
+    Cada entrada usa el rowid de su propiedad, así se reemplaza por rowid sin recorrer el índice.
+    """
+    columnas = ', '.join(FTS_COLUMNAS)
+    cursor.execute("DELETE FROM propiedades_fts")
+    cursor.execute(f"""
+        INSERT INTO propiedades_fts (rowid, id, {columnas})
+        SELECT rowid, id, {', '.join(f"COALESCE({c}, '')" for c in FTS_COLUMNAS)} FROM propiedades
+    """)
+
+
+def _migracion_esquema_inicial(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS propiedades (
+            id TEXT PRIMARY KEY,
+            tipo TEXT,
+            zona TEXT,
+            precio TEXT,
+            precio_valor INTEGER,
+            precio_moneda TEXT,
+            habitaciones INTEGER,
+            baños INTEGER,
+            toilettes INTEGER,
+            pileta INTEGER,
+            metros_cubiertos REAL,
+            metros_descubiertos REAL,
+            orientacion TEXT,
+            antiguedad INTEGER,
+            descripcion TEXT,
+            amenities TEXT,
+            latitud REAL,
+            longitud REAL,
+            url TEXT,
+            fuente TEXT,
+            fecha_agregado TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            propiedad_id TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            UNIQUE(propiedad_id, tipo),
+            FOREIGN KEY(propiedad_id) REFERENCES propiedades(id)
+        )
+    """)
+
+
+def _migracion_columnas_fotos_estado(cursor) -> None:
+    # BDs creadas antes del sistema de migraciones pueden tener ya alguna de estas columnas
+    cursor.execute("PRAGMA table_info(propiedades)")
+    columnas = {row[1] for row in cursor.fetchall()}
+    for col_name, col_type in (("foto_portada", "TEXT"), ("fotos", "TEXT"), ("estado", "TEXT"), ("direccion", "TEXT")):
+        if col_name not in columnas:
+            cursor.execute(f"ALTER TABLE propiedades ADD COLUMN {col_name} {col_type}")
+            logger.info(f"Agregada columna {col_name} a la BD")
+
+
+def _migracion_indices(cursor) -> None:
+    # El índice único sobre url no se puede crear con duplicados previos: se conserva
+    # la última fila escrita de cada url y su feedback pasa a apuntar a ella
+    cursor.execute("""
+        CREATE TEMP TABLE url_duplicadas AS
+        SELECT p.id AS id_viejo, (
+            SELECT q.id FROM propiedades q WHERE q.url = p.url ORDER BY q.rowid DESC LIMIT 1
+        ) AS id_nuevo
+        FROM propiedades p
+        WHERE p.url IS NOT NULL AND p.url != ''
+          AND p.rowid != (SELECT MAX(rowid) FROM propiedades q WHERE q.url = p.url)
+    """)
+    cursor.execute("SELECT COUNT(*) FROM url_duplicadas")
+    duplicadas = cursor.fetchone()[0]
+    if duplicadas:
+        cursor.execute("""
+            UPDATE OR IGNORE feedback
+            SET propiedad_id = (SELECT id_nuevo FROM url_duplicadas WHERE id_viejo = feedback.propiedad_id)
+            WHERE propiedad_id IN (SELECT id_viejo FROM url_duplicadas)
+        """)
+        cursor.execute("DELETE FROM feedback WHERE propiedad_id IN (SELECT id_viejo FROM url_duplicadas)")
+        cursor.execute("DELETE FROM propiedades WHERE id IN (SELECT id_viejo FROM url_duplicadas)")
+        logger.info(f"Eliminadas {duplicadas} propiedades con url duplicada")
+    cursor.execute("DROP TABLE url_duplicadas")
+
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_propiedades_url ON propiedades(url)
+        WHERE url IS NOT NULL AND url != ''
+    """)
+    for columna in ("zona", "fuente", "tipo", "precio_valor", "habitaciones", "fecha_agregado"):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_propiedades_{columna} ON propiedades({columna})")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedback_tipo ON feedback(tipo)")
+
+
+def _migracion_fts(cursor) -> None:
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS propiedades_fts USING fts5(
+                id UNINDEXED, {', '.join(FTS_COLUMNAS)},
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: la migración se da por aplicada sin el índice
+        logger.warning(f"FTS5 no disponible, no se crea el índice BM25: {e}")
+        return
+    _poblar_fts(cursor)
+
+
+def _migracion_version_datos(cursor) -> None:
+    # Contador que sube en cada escritura de propiedades (incluidas las actualizaciones,
+    # que no cambian la cantidad de filas ni la fecha de alta)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS version_datos (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO version_datos (id, version) VALUES (1, 0)")
+
+
+def _migracion_version_escritura(cursor) -> None:
+    # Versión de los datos en la que se escribió cada fila: permite leer solo lo cambiado
+    # desde una huella. Las filas anteriores quedan en NULL (entran en cualquier lectura completa)
+    cursor.execute("PRAGMA table_info(propiedades)")
+    if "version_escritura" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE propiedades ADD COLUMN version_escritura INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_propiedades_version_escritura ON propiedades(version_escritura)")
+
+
+# Migraciones del esquema en orden: (versión, descripción, función(cursor)).
+# La versión aplicada se guarda en PRAGMA user_version; nunca se editan las ya publicadas,
+# los cambios nuevos van en una migración nueva al final.
+MIGRACIONES = (
+    (1, "tablas propiedades y feedback", _migracion_esquema_inicial),
+    (2, "columnas foto_portada, fotos, estado y direccion", _migracion_columnas_fotos_estado),
+    (3, "índices secundarios y url única", _migracion_indices),
+    (4, "índice BM25 (FTS5)", _migracion_fts),
+    (5, "contador de versión de los datos", _migracion_version_datos),
+    (6, "versión de escritura por propiedad", _migracion_version_escritura),
+)
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> int:
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción junto
+    con la actualización de user_version. Devuelve la versión final del esquema.
+    """
+    cursor = conn.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    for numero, descripcion, migracion in MIGRACIONES:
+        if numero <= version:
+            continue
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Otro proceso pudo haberla aplicado mientras esperábamos el lock
+            if cursor.execute("PRAGMA user_version").fetchone()[0] >= numero:
+                conn.rollback()
+                version = numero
+                continue
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(numero)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Falló la migración {numero} ({descripcion})")
+            raise
+        version = numero
+        logger.info(f"Migración {numero} aplicada: {descripcion}")
+    return version
+
+
 class PropertyDatabase:
+    # Callbacks notificados cuando se agregan propiedades (p.ej. invalidar caches de búsqueda).
+    # Es de clase porque la app crea instancias nuevas en cada uso.
+    _listeners: List = []
+
+    @classmethod
+    def registrar_listener(cls, callback) -> None:
+        """Registra callback(db_path, agregadas) para cuando agregar_propiedades inserta filas."""
+        if callback not in cls._listeners:
+            cls._listeners.append(callback)
+
+    def _notificar_cambios(self, agregadas: int) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(self.db_path, agregadas)
+            except Exception as e:
+                logger.warning(f"Error notificando cambios en BD: {e}")
+
+    # Rutas ya inicializadas en este proceso y disponibilidad de FTS5 por ruta
+    _inicializadas: Dict[str, bool] = {}
+    _lock_init = threading.Lock()
+    # Conexiones abiertas por thread: {ruta absoluta: sqlite3.Connection}
+    _locales = threading.local()
+
     def __init__(self, db_path: str = "data/properties.db"):
         self.db_path = db_path
-        self._init_db()
+        self._clave = os.path.abspath(db_path)
+        # El DDL y las migraciones corren una vez por proceso, no en cada instancia
+        with PropertyDatabase._lock_init:
+            if self._clave not in PropertyDatabase._inicializadas or not os.path.exists(self.db_path):
+                # Archivo nuevo o borrado desde la última vez: la conexión vieja apunta a otro archivo
+                self.cerrar_conexion()
+                self.fts_disponible = False
+                if self._init_db():
+                    PropertyDatabase._inicializadas[self._clave] = self.fts_disponible
+            else:
+                self.fts_disponible = PropertyDatabase._inicializadas[self._clave]
+
+    def _conectar(self) -> sqlite3.Connection:
+        """Conexión del thread actual a esta BD: se abre una vez por thread y se reutiliza."""
+        conexiones = getattr(PropertyDatabase._locales, "conexiones", None)
+        if conexiones is None:
+            conexiones = PropertyDatabase._locales.conexiones = {}
+        conn = conexiones.get(self._clave)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=SQLITE_TIMEOUT)
+            for pragma in PRAGMAS_CONEXION:
+                conn.execute(pragma)
+            # Los filtros de búsqueda comparan zona y tipo normalizados igual que en Chroma
+            from src.query_parser import derivar_tipo_categoria, normalizar
+
+            conn.create_function("normalizar", 1, normalizar, deterministic=True)
+            conn.create_function("tipo_categoria", 1, derivar_tipo_categoria, deterministic=True)
+            conexiones[self._clave] = conn
+        return conn
 
-    def _init_db(self):
-        """Inicializa la BD."""
+    def cerrar_conexion(self) -> None:
+        """Cierra la conexión del thread actual (p.ej. al terminar un thread de scraping)."""
+        conexiones = getattr(PropertyDatabase._locales, "conexiones", {})
+        conn = conexiones.pop(self._clave, None)
+        if conn is not None:
+            conn.close()
+
+    def _revertir(self) -> None:
+        """Descarta una transacción a medias para no dejar la conexión reutilizada en mal estado."""
+        try:
+            self._conectar().rollback()
+        except Exception:
+            pass
+
+    def _init_db(self) -> bool:
+        """Inicializa la BD aplicando las migraciones pendientes. Devuelve si el esquema quedó listo."""
         try:
             # Asegurar que la carpeta data existe
             db_dir = os.path.dirname(self.db_path)
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir, exist_ok=True)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS propiedades (
-                    id TEXT PRIMARY KEY,
-                    tipo TEXT,
-                    zona TEXT,
-                    precio TEXT,
-                    precio_valor INTEGER,
-                    precio_moneda TEXT,
-                    habitaciones INTEGER,
-                    baños INTEGER,
-                    toilettes INTEGER,
-                    pileta INTEGER,
-                    metros_cubiertos REAL,
-                    metros_descubiertos REAL,
-                    orientacion TEXT,
-                    antiguedad INTEGER,
-                    descripcion TEXT,
-                    amenities TEXT,
-                    latitud REAL,
-                    longitud REAL,
-                    url TEXT,
-                    fuente TEXT,
-                    fecha_agregado TEXT,
-                    foto_portada TEXT,
-                    fotos TEXT,
-                    estado TEXT,
-                    direccion TEXT
-                )
-            """)
-            
-            # Crear tabla de feedback
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS feedback (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    propiedad_id TEXT NOT NULL,
-                    tipo TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    UNIQUE(propiedad_id, tipo),
-                    FOREIGN KEY(propiedad_id) REFERENCES propiedades(id)
-                )
-            """)
-            conn.commit()
-            
-            # Agregar columnas nuevas si no existen (migración)
-            cursor.execute("PRAGMA table_info(propiedades)")
-            columns = {row[1] for row in cursor.fetchall()}
-            
-            nuevas_columnas = {
-                'foto_portada': 'TEXT',
-                'fotos': 'TEXT',
-                'estado': 'TEXT',
-                'direccion': 'TEXT'
-            }
-            
-            for col_name, col_type in nuevas_columnas.items():
-                if col_name not in columns:
-                    try:
-                        cursor.execute(f"ALTER TABLE propiedades ADD COLUMN {col_name} {col_type}")
-                        logger.info(f"Agregada columna {col_name} a la BD")
-                    except Exception as e:
-                        logger.warning(f"Columna {col_name} ya existe o error: {e}")
-            
-            conn.commit()
-            conn.close()
+
+            conn = self._conectar()
+            aplicar_migraciones(conn)
+            self._init_fts(conn)
+            return True
         except Exception as e:
             logger.error(f"Error inicializando BD: {e}")
+            self._revertir()
+            return False
+
+    def _init_fts(self, conn):
+        """Verifica el índice BM25 creado por las migraciones y lo reconstruye si quedó desalineado con la tabla."""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'propiedades_fts'")
+            if cursor.fetchone() is None:
+                self.fts_disponible = False
+                return
+            cursor.execute("SELECT COUNT(*) FROM propiedades_fts")
+            en_fts = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM propiedades")
+            en_tabla = cursor.fetchone()[0]
+            if en_fts != en_tabla:
+                _poblar_fts(cursor)
+                logger.info(f"Índice BM25 reconstruido: {en_tabla} propiedades")
+            conn.commit()
+            self.fts_disponible = True
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sin FTS5: la búsqueda sigue siendo solo vectorial
+            logger.warning(f"FTS5 no disponible, búsqueda BM25 desactivada: {e}")
+            self.fts_disponible = False
+
+    def _indexar_fts(self, cursor, filas: List[Dict]):
+        """Reemplaza en el índice BM25 las entradas de las filas escritas."""
+        if not self.fts_disponible:
+            return
+        cursor.executemany(
+            "DELETE FROM propiedades_fts WHERE rowid = (SELECT rowid FROM propiedades WHERE id = ?)",
+            [(f["id"],) for f in filas],
+        )
+        cursor.executemany(
+            f"INSERT INTO propiedades_fts (rowid, id, {', '.join(FTS_COLUMNAS)}) "
+            f"VALUES ((SELECT rowid FROM propiedades WHERE id = ?), ?, {', '.join('?' for _ in FTS_COLUMNAS)})",
+            [(f["id"], f["id"], *[str(f.get(c) or "") for c in FTS_COLUMNAS]) for f in filas],
+        )
 
     def agregar_propiedades(self, nuevas_props: List[Dict]) -> int:
-        """Agrega propiedades evitando duplicados por URL."""
+        """Agrega propiedades (las de URL ya conocida se actualizan). Devuelve cuántas son nuevas."""
+        return self.insertar_lote(nuevas_props)["insertadas"]
+
+    def insertar_lote(self, nuevas_props: List[Dict]) -> Dict:
+        """
+        Ingesta en bloque: normaliza el lote, resuelve contra la BD por los índices
+        de url e id (sin leer la columna url completa) y escribe con un único
+        executemany con UPSERT.
+
+        Returns:
+            Dict con insertadas, actualizadas, omitidas e ids (ids en la BD de las
+            filas escritas; para una url ya conocida es el id existente)
+        """
+        stats = {"insertadas": 0, "actualizadas": 0, "omitidas": 0, "ids": []}
         if not nuevas_props:
-            return 0
-        
+            return stats
+
+        # Normalizar todo el lote antes de tocar la BD; en el lote gana la última aparición de cada url/id
+        filas: Dict[str, Dict] = {}
+        for posicion, prop in enumerate(nuevas_props):
+            try:
+                fila = _normalizar_propiedad(prop, posicion)
+            except Exception as e:
+                logger.debug(f"Propiedad inválida, se omite: {e}")
+                stats["omitidas"] += 1
+                continue
+            clave = fila["url"] or f"id:{fila['id']}"
+            if clave in filas:
+                stats["omitidas"] += 1
+            filas[clave] = fila
+        por_id: Dict[str, Dict] = {}
+        for fila in filas.values():
+            if fila["id"] in por_id:
+                stats["omitidas"] += 1
+            por_id[fila["id"]] = fila
+        lote = list(por_id.values())
+        if not lote:
+            return stats
+
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conectar()
             cursor = conn.cursor()
-            
-            cursor.execute("SELECT url FROM propiedades WHERE url IS NOT NULL")
-            existentes = set(row[0] for row in cursor.fetchall())
-            
-            agregadas = 0
-            for prop in nuevas_props:
-                url = prop.get("url", "")
-                if url and url in existentes:
-                    continue
-                
-                try:
-                    # Extraer precio valor y moneda
-                    precio_texto = prop.get("precio", "N/A")
-                    precio_valor = 0
-                    precio_moneda = "USD"
-                    
-                    if "$" in precio_texto:
-                        precio_moneda = "$"
-                    elif "USD" in precio_texto.upper():
-                        precio_moneda = "USD"
-                    
-                    import re
-                    numeros = re.findall(r'[\d,\.]+', precio_texto)
-                    if numeros:
-                        num_str = numeros[0].replace('.', '').replace(',', '')
-                        try:
-                            precio_valor = int(num_str)
-                        except:
-                            pass
-                    
-                    # Convertir fotos a JSON si es una lista
-                    fotos_json = ""
-                    if isinstance(prop.get("fotos"), list) and prop.get("fotos"):
-                        import json
-                        fotos_json = json.dumps(prop.get("fotos"))
-                    
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO propiedades 
-                        (id, tipo, zona, precio, precio_valor, precio_moneda,
-                         habitaciones, baños, toilettes, pileta, metros_cubiertos, metros_descubiertos,
-                         orientacion, antiguedad, descripcion, amenities, latitud, longitud, url, fuente, fecha_agregado,
-                         foto_portada, fotos, estado, direccion)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        prop.get("id", str(datetime.now())),
-                        prop.get("tipo", ""),
-                        prop.get("zona", ""),
-                        prop.get("precio", ""),
-                        precio_valor,
-                        precio_moneda,
-                        prop.get("habitaciones"),
-                        prop.get("baños"),
-                        prop.get("toilettes"),
-                        1 if prop.get("pileta") else 0,
-                        prop.get("metros_cubiertos"),
-                        prop.get("metros_descubiertos"),
-                        prop.get("orientacion"),
-                        prop.get("antiguedad"),
-                        prop.get("descripcion", ""),
-                        prop.get("amenities", ""),
-                        prop.get("latitud"),
-                        prop.get("longitud"),
-                        url,
-                        prop.get("fuente", ""),
-                        prop.get("fecha_agregado", datetime.now().isoformat()),
-                        prop.get("foto_portada", ""),
-                        fotos_json,
-                        prop.get("estado", ""),
-                        prop.get("direccion", "")
-                    ))
-                    agregadas += 1
-                except Exception as e:
-                    logger.debug(f"Error agregando: {e}")
-                    continue
-            
+            cursor.execute("BEGIN IMMEDIATE")
+            id_por_url, ids_existentes = self._existentes(cursor, lote)
+
+            for fila in lote:
+                # Una url ya cargada conserva su id (lo referencian Chroma y el feedback)
+                fila["id"] = id_por_url.get(fila["url"], fila["id"])
+                if fila["id"] in ids_existentes or fila["url"] in id_por_url:
+                    stats["actualizadas"] += 1
+                else:
+                    stats["insertadas"] += 1
+
+            cursor.executemany(SQL_UPSERT_PROPIEDAD, [tuple(f[c] for c in COLUMNAS_PROPIEDAD) for f in lote])
+            self._indexar_fts(cursor, lote)
+            cursor.execute("UPDATE version_datos SET version = version + 1 WHERE id = 1")
+            version = cursor.execute("SELECT version FROM version_datos WHERE id = 1").fetchone()[0]
+            cursor.executemany(
+                "UPDATE propiedades SET version_escritura = ? WHERE id = ?", [(version, f["id"]) for f in lote]
+            )
             conn.commit()
-            conn.close()
-            logger.info(f"Agregadas {agregadas} propiedades a BD")
-            return agregadas
         except Exception as e:
             logger.error(f"Error en agregar_propiedades: {e}")
-            return 0
+            self._revertir()
+            stats["omitidas"] += stats["insertadas"] + stats["actualizadas"]
+            stats["insertadas"] = stats["actualizadas"] = 0
+            return stats
+
+        stats["ids"] = [f["id"] for f in lote]
+        logger.info(
+            f"Agregadas {stats['insertadas']} propiedades a BD "
+            f"({stats['actualizadas']} actualizadas, {stats['omitidas']} omitidas)"
+        )
+        if stats["insertadas"] or stats["actualizadas"]:
+            self._notificar_cambios(stats["insertadas"] + stats["actualizadas"])
+        return stats
+
+    def _existentes(self, cursor, lote: List[Dict]):
+        """Ids ya guardados para las urls e ids del lote (búsquedas por índice, de a 500 parámetros)."""
+        urls = [f["url"] for f in lote if f["url"]]
+        ids = [f["id"] for f in lote]
+        id_por_url, ids_existentes = {}, set()
+        for desde in range(0, len(urls), 500):
+            parte = urls[desde:desde + 500]
+            cursor.execute(
+                f"SELECT url, id FROM propiedades WHERE url IS NOT NULL AND url != '' "
+                f"AND url IN ({', '.join('?' for _ in parte)})", parte
+            )
+            id_por_url.update(cursor.fetchall())
+        for desde in range(0, len(ids), 500):
+            parte = ids[desde:desde + 500]
+            cursor.execute(f"SELECT id FROM propiedades WHERE id IN ({', '.join('?' for _ in parte)})", parte)
+            ids_existentes.update(row[0] for row in cursor.fetchall())
+        return id_por_url, ids_existentes
+
+    def huella(self) -> Dict:
+        """
+        Huella del contenido de propiedades: cambia con cada alta o actualización,
+        pero no con el feedback ni con los checkpoints del WAL.
+        """
+        return self._huella(self._conectar())
+
+    @staticmethod
+    def _huella(conn) -> Dict:
+        filas, max_rowid, max_fecha = conn.execute(
+            "SELECT COUNT(*), MAX(rowid), MAX(fecha_agregado) FROM propiedades"
+        ).fetchone()
+        version = conn.execute("SELECT version FROM version_datos WHERE id = 1").fetchone()
+        return {"filas": filas, "max_rowid": max_rowid, "max_fecha": max_fecha,
+                "version": version[0] if version else 0}
+
+    def obtener_df_con_huella(self, desde_version: Optional[int] = None) -> Tuple[pd.DataFrame, Optional[Dict]]:
+        """
+        Propiedades como DataFrame junto con la huella de exactamente ese contenido:
+        las dos lecturas van en una misma transacción, así una escritura concurrente
+        (orquestador por CLI, otra réplica) no queda contada en la huella sin estar en el df.
+
+        Con `desde_version` solo devuelve las filas escritas después de esa versión
+        de los datos (lo que cambió desde una huella anterior).
+        """
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN")
+            huella = self._huella(conn)
+            if desde_version is None:
+                df = pd.read_sql_query("SELECT * FROM propiedades", conn)
+            else:
+                df = pd.read_sql_query(
+                    "SELECT * FROM propiedades WHERE version_escritura > ?", conn, params=(int(desde_version),)
+                )
+            conn.commit()
+            return df, huella
+        except Exception as e:
+            logger.error(f"Error leyendo DF con huella: {e}")
+            self._revertir()
+            return pd.DataFrame(), None
+
+    def buscar_bm25(self, query: str, limit: int = 50, criterios=None) -> List[tuple]:
+        """
+        Búsqueda por palabras con ranking BM25 sobre descripción, amenities, dirección y tipo.
+
+        Con `criterios` (CriteriosBusqueda) solo devuelve propiedades que cumplen los
+        mismos filtros que el pre-filtrado de Chroma (zona, tipo, habitaciones, pileta, precio).
+
+        Returns:
+            Lista de (id, score) ordenada de más a menos relevante (score mayor es mejor)
+        """
+        expresion = _expresion_fts(query)
+        if not expresion or not self.fts_disponible:
+            return []
+        try:
+            condiciones, parametros = "", []
+            if criterios is not None:
+                from src.search_filters import construir_filtros_sql
+
+                condiciones, parametros = construir_filtros_sql(criterios)
+            conn = self._conectar()
+            cursor = conn.cursor()
+            # bm25() devuelve valores negativos: más negativo = más relevante
+            cursor.execute(f"""
+                SELECT propiedades_fts.id, bm25(propiedades_fts) AS rank FROM propiedades_fts
+                JOIN propiedades p ON p.rowid = propiedades_fts.rowid
+                WHERE propiedades_fts MATCH ? {'AND ' + condiciones if condiciones else ''}
+                ORDER BY rank LIMIT ?
+            """, (expresion, *parametros, int(limit)))
+            resultados = [(row[0], -row[1]) for row in cursor.fetchall()]
+            return resultados
+        except Exception as e:
+            logger.error(f"Error en búsqueda BM25: {e}")
+            return []
 
     def obtener_todas(self) -> List[Dict]:
         """Obtiene todas las propiedades."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._conectar()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM propiedades")
             props = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             return props
         except Exception as e:
             logger.error(f"Error obteniendo propiedades: {e}")
@@ -1128,28 +1448,48 @@ class PropertyDatabase:
     def obtener_df(self) -> pd.DataFrame:
         """Obtiene propiedades como DataFrame."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conectar()
             df = pd.read_sql_query("SELECT * FROM propiedades", conn)
-            conn.close()
             return df
         except Exception as e:
             logger.error(f"Error leyendo DF: {e}")
             return pd.DataFrame()
 
-    def guardar_csv(self, csv_path: str = "data/properties_expanded.csv") -> None:
-        """Exporta a CSV."""
+    def obtener_por_ids(self, ids: List[str]) -> pd.DataFrame:
+        """Obtiene como DataFrame (mismas columnas que obtener_df) solo las propiedades pedidas."""
+        ids = list(dict.fromkeys(str(i) for i in ids if i))
+        if not ids:
+            return pd.DataFrame()
         try:
-            df = self.obtener_df()
-            if not df.empty:
-                df.to_csv(csv_path, index=False)
-                logger.info(f"BD exportada a {csv_path}")
+            conn = self._conectar()
+            partes = []
+            # SQLite limita la cantidad de parámetros por consulta
+            for desde in range(0, len(ids), 500):
+                lote = ids[desde:desde + 500]
+                partes.append(pd.read_sql_query(
+                    f"SELECT * FROM propiedades WHERE id IN ({', '.join('?' for _ in lote)})", conn, params=lote
+                ))
+            return pd.concat(partes, ignore_index=True)
+        except Exception as e:
+            logger.error(f"Error leyendo propiedades por id: {e}")
+            return pd.DataFrame()
+
+    def guardar_csv(self, csv_path: str = "data/properties_expanded.csv", incremental: bool = False) -> None:
+        """Exporta a CSV en streaming (ver src/export.py); con incremental solo agrega las filas nuevas."""
+        try:
+            # Con la BD vacía no se pisa un CSV existente (la app lo usa para poblar la BD)
+            if self._conectar().execute("SELECT 1 FROM propiedades LIMIT 1").fetchone() is None:
+                return
+            from src.export import exportar_csv
+
+            exportar_csv(self.db_path, csv_path, incremental=incremental)
         except Exception as e:
             logger.error(f"Error guardando CSV: {e}")
 
     def obtener_estadisticas(self) -> Dict:
         """Estadísticas de la BD."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conectar()
             cursor = conn.cursor()
             
             cursor.execute("SELECT COUNT(*) FROM propiedades")
@@ -1161,7 +1501,6 @@ class PropertyDatabase:
             cursor.execute("SELECT DISTINCT zona FROM propiedades")
             zonas = [row[0] for row in cursor.fetchall()]
             
-            conn.close()
             return {
                 "total_propiedades": total,
                 "fuentes": fuentes,
@@ -1177,7 +1516,7 @@ class PropertyDatabase:
             if timestamp is None:
                 timestamp = datetime.now().isoformat()
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self._conectar()
             cursor = conn.cursor()
             
             # INSERT OR IGNORE para evitar duplicados (constraint UNIQUE)
@@ -1187,22 +1526,21 @@ class PropertyDatabase:
             """, (propiedad_id, tipo, timestamp))
             
             conn.commit()
-            conn.close()
             logger.info(f"Feedback guardado: {propiedad_id} - {tipo}")
             return True
         except Exception as e:
             logger.error(f"Error guardando feedback: {e}")
+            self._revertir()
             return False
 
     def obtener_feedback(self) -> List[Dict]:
         """Obtiene todo el feedback guardado."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._conectar()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM feedback")
             feedback = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             return feedback
         except Exception as e:
             logger.error(f"Error obteniendo feedback: {e}")
@@ -1211,12 +1549,11 @@ class PropertyDatabase:
     def obtener_feedback_por_tipo(self, tipo: str) -> List[Dict]:
         """Obtiene feedback de un tipo específico (positivo/negativo)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._conectar()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM feedback WHERE tipo = ?", (tipo,))
             feedback = [dict(row) for row in cursor.fetchall()]
-            conn.close()
             return feedback
         except Exception as e:
             logger.error(f"Error obteniendo feedback: {e}")
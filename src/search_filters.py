@@ -0,0 +1,147 @@
+"""
+search_filters.py - Pre-filtrado de la búsqueda vectorial en ChromaDB
+Los criterios extraídos por query_parser (zona, tipo, habitaciones, precio, pileta)
+se empujan como filtros `where` a Chroma, relajándolos si hay pocos resultados.
+Los mismos criterios se traducen a SQL para la búsqueda BM25 (construir_filtros_sql).
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.config import FILTRO_MIN_RESULTADOS
+from src.query_parser import CriteriosBusqueda, derivar_tipo_categoria, normalizar
+
+logger = logging.getLogger(__name__)
+
+# Orden en el que se relajan los filtros si hay pocos resultados (el primero se descarta primero)
+ORDEN_RELAJACION = ['precio', 'pileta', 'habitaciones', 'tipo', 'zona']
+
+def agregar_campos_filtro(df):
+    """Agrega al DataFrame (copia) los campos de metadatos usados por los filtros `where`."""
+    import pandas as pd
+
+    df = df.copy()
+    df['zona_norm'] = df['zona'].map(normalizar) if 'zona' in df.columns else ""
+    df['tipo_categoria'] = df['tipo'].map(derivar_tipo_categoria) if 'tipo' in df.columns else ""
+    # Chroma compara numéricos por tipo: guardar enteros (o nada si es nulo)
+    for col in ('habitaciones', 'precio_valor', 'pileta'):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+    return df
+
+
+def construir_filtros(criterios: CriteriosBusqueda) -> Dict[str, Dict]:
+    """Cláusulas `where` de Chroma por criterio (solo las de criterios presentes)."""
+    filtros = {}
+    if criterios.zona:
+        zonas = sorted({normalizar(criterios.zona)} | set(criterios.zona_keywords))
+        filtros['zona'] = {'zona_norm': {'$in': zonas}}
+    if criterios.tipo_categoria:
+        filtros['tipo'] = {'tipo_categoria': criterios.tipo_categoria}
+    if criterios.habitaciones:
+        filtros['habitaciones'] = {'habitaciones': {'$gte': int(criterios.habitaciones)}}
+    if criterios.pileta:
+        filtros['pileta'] = {'pileta': 1}
+    if criterios.precio_aprox:
+        filtros['precio'] = {'$and': [
+            {'precio_valor': {'$gt': 0}},
+            {'precio_valor': {'$lte': int(criterios.precio_aprox * 1.1)}},
+        ]}
+    return filtros
+
+
+def construir_filtros_sql(criterios: CriteriosBusqueda) -> Tuple[str, List]:
+    """
+    Los filtros de construir_filtros como condiciones SQL sobre `propiedades p`
+    (para el BM25), unidas con AND. normalizar() y tipo_categoria() son las
+    funciones de query_parser que PropertyDatabase registra en cada conexión.
+
+    Returns:
+        (condiciones, parámetros); condiciones vacío si no hay criterios
+    """
+    condiciones, parametros = [], []
+    if criterios.zona:
+        zonas = sorted({normalizar(criterios.zona)} | set(criterios.zona_keywords))
+        condiciones.append(f"normalizar(p.zona) IN ({', '.join('?' for _ in zonas)})")
+        parametros.extend(zonas)
+    if criterios.tipo_categoria:
+        condiciones.append("tipo_categoria(p.tipo) = ?")
+        parametros.append(criterios.tipo_categoria)
+    if criterios.habitaciones:
+        condiciones.append("p.habitaciones IS NOT NULL AND ROUND(p.habitaciones) >= ?")
+        parametros.append(int(criterios.habitaciones))
+    if criterios.pileta:
+        condiciones.append("p.pileta = 1")
+    if criterios.precio_aprox:
+        condiciones.append("p.precio_valor > 0 AND p.precio_valor <= ?")
+        parametros.append(int(criterios.precio_aprox * 1.1))
+    return " AND ".join(condiciones), parametros
+
+
+def combinar_where(clausulas: List[Dict]) -> Optional[Dict]:
+    """Combina cláusulas con $and (Chroma exige $and explícito para más de una)."""
+    if not clausulas:
+        return None
+    if len(clausulas) == 1:
+        return clausulas[0]
+    return {'$and': clausulas}
+
+
+def niveles_relajacion(filtros: Dict[str, Dict]) -> List[Optional[Dict]]:
+    """Filtros `where` de más estricto a más laxo; el último nivel es sin filtro."""
+    activos = [nombre for nombre in reversed(ORDEN_RELAJACION) if nombre in filtros]
+    niveles = []
+    for n in range(len(activos), 0, -1):
+        niveles.append(combinar_where([filtros[nombre] for nombre in activos[:n]]))
+    niveles.append(None)
+    return niveles
+
+
+def consultar_con_filtros(collection, query_embeddings, criterios: CriteriosBusqueda, n_results: int,
+                          min_resultados: Optional[int] = None,
+                          include=("metadatas", "distances")) -> Dict:
+    """
+    Búsqueda vectorial pre-filtrada con relajación progresiva.
+
+    Ejecuta la query con todos los filtros; si devuelve menos de `min_resultados`
+    (por defecto FILTRO_MIN_RESULTADOS), descarta filtros (precio, pileta,
+    habitaciones, tipo, zona, en ese orden) y completa con los nuevos hits sin
+    duplicar. `n_results` es solo cuántos hits se piden por query: no alcanzarlo
+    no dispara la relajación. Devuelve el mismo formato que collection.query()
+    para una sola query.
+    """
+    min_resultados = FILTRO_MIN_RESULTADOS if min_resultados is None else min_resultados
+    min_resultados = min(min_resultados, n_results)
+    acumulado = {'ids': [[]], 'metadatas': [[]], 'distances': [[]]}
+    vistos = set()
+
+    for where in niveles_relajacion(construir_filtros(criterios)):
+        try:
+            parcial = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=list(include),
+            )
+        except Exception as e:
+            logger.debug(f"Query con filtro {where} falló: {e}")
+            continue
+
+        metadatas = (parcial.get('metadatas') or [[]])[0] or [{}] * len(parcial['ids'][0])
+        distancias = (parcial.get('distances') or [[]])[0] or [0.0] * len(parcial['ids'][0])
+        for doc_id, meta, distancia in zip(parcial['ids'][0], metadatas, distancias):
+            if doc_id in vistos:
+                continue
+            vistos.add(doc_id)
+            acumulado['ids'][0].append(doc_id)
+            acumulado['metadatas'][0].append(meta)
+            acumulado['distances'][0].append(distancia)
+
+        if len(vistos) >= min_resultados:
+            break
+        if where is not None:
+            logger.info(f"Filtro {where} devolvió {len(vistos)} resultados, relajando...")
+
+    for clave in acumulado:
+        acumulado[clave][0] = acumulado[clave][0][:n_results]
+    return acumulado
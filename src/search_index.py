@@ -0,0 +1,72 @@
+"""
+search_index.py - Índice id -> posición de fila para hidratar resultados de búsqueda
+Se construye una vez junto con el sistema cacheado y evita máscaras O(n) por resultado.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.vector_sync import CAMPO_HASH
+
+
+def construir_indice_ids(df: pd.DataFrame) -> pd.Index:
+    """
+    Índice hash de IDs (como string) -> posición de fila en df.
+    Requiere IDs únicos (ver vector_sync.filtrar_ids_validos).
+    """
+    if df.empty or 'id' not in df.columns:
+        return pd.Index([], dtype=object)
+    return pd.Index(df['id'].astype(str))
+
+
+def posiciones_de(indice: pd.Index, ids: Sequence[str]) -> np.ndarray:
+    """Posiciones de fila para cada ID (-1 si el ID no está en el índice)."""
+    if len(ids) == 0 or len(indice) == 0:
+        return np.full(len(ids), -1, dtype=np.intp)
+    return indice.get_indexer([str(i) for i in ids])
+
+
+def hidratar(df: pd.DataFrame, indice: pd.Index, ids: Sequence[str]) -> List[Dict]:
+    """Convierte una lista de IDs en registros completos con un único take(), preservando el orden."""
+    posiciones = posiciones_de(indice, ids)
+    posiciones = posiciones[posiciones >= 0]
+    if len(posiciones) == 0:
+        return []
+    return df.take(posiciones).to_dict('records')
+
+
+def registros_desde_metadatos(ids: Sequence[str], metadatas: Sequence[Dict], distancias: Sequence[float],
+                              columnas: Sequence[str] = (), df: Optional[pd.DataFrame] = None,
+                              indice: Optional[pd.Index] = None) -> List[Dict]:
+    """
+    Construye los registros de resultado directamente desde los metadatos de Chroma.
+
+    La distancia se expone como 'distancia' y como 'score' (1 / (1 + distancia),
+    mayor es mejor). Solo si a algún registro le faltan `columnas` (p.ej. una
+    colección creada con metadatos parciales) se completan desde el DataFrame.
+    """
+    registros = []
+    incompletos = []
+    for i, (doc_id, meta, distancia) in enumerate(zip(ids, metadatas, distancias)):
+        registro = dict(meta or {})
+        registro.pop(CAMPO_HASH, None)
+        registro['id'] = doc_id
+        registro['distancia'] = float(distancia)
+        registro['score'] = 1.0 / (1.0 + float(distancia))
+        if any(col not in registro for col in columnas):
+            incompletos.append(i)
+        registros.append(registro)
+
+    if incompletos and df is not None and indice is not None and not df.empty:
+        posiciones = posiciones_de(indice, [registros[i]['id'] for i in incompletos])
+        for i, pos in zip(incompletos, posiciones):
+            if pos < 0:
+                continue
+            fila = df.iloc[pos]
+            for col in columnas:
+                if col not in registros[i]:
+                    registros[i][col] = fila[col]
+
+    return registros
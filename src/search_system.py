@@ -0,0 +1,162 @@
+"""
+search_system.py - Estado del sistema de búsqueda compartido por todas las sesiones
+Agrupa modelo, colección de Chroma, DataFrame, índice de ids y features del
+re-ranking, y permite aplicar propiedades nuevas en el lugar (sin recargar el
+modelo ni el resto del sistema) después de una descarga.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.query_cache import obtener_cache_queries
+from src.query_parser import zonas_normalizadas
+from src.reranker import MatrizFeatures
+from src.search_index import construir_indice_ids
+from src.vector_sync import (construir_textos, filtrar_ids_validos, huella_sincronizada, marcar_sincronizada,
+                             upsert_propiedades)
+
+logger = logging.getLogger(__name__)
+
+
+class SistemaBusqueda:
+    """
+    Estado del buscador con reemplazo atómico.
+
+    Las lecturas toman una tupla consistente con estado(); aplicar_nuevas_propiedades
+    arma el estado nuevo aparte y solo toma el lock para intercambiar referencias,
+    así que las búsquedas en curso siguen usando el estado anterior sin bloquearse.
+    """
+
+    def __init__(self, model, collection, df: pd.DataFrame, indice: Optional[pd.Index] = None,
+                 features: Optional[MatrizFeatures] = None, modelo_sync=None,
+                 db_path: Optional[str] = None, modelo_id: Optional[str] = None, huella: Optional[Dict] = None):
+        self.model = model
+        self.collection = collection
+        self._modelo_sync = modelo_sync or model
+        self._db_path = db_path
+        self._modelo_id = modelo_id
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()
+        self._lock_snapshot = threading.Lock()
+        self._version_snapshot = 0
+        self._carga_snapshot = None
+        self._db = None
+        self.version = 0
+        self._publicar(df, indice, features, huella)
+
+    def _publicar(self, df: pd.DataFrame, indice: Optional[pd.Index] = None,
+                  features: Optional[MatrizFeatures] = None, huella: Optional[Dict] = None):
+        indice = indice if indice is not None else construir_indice_ids(df)
+        features = features if features is not None else MatrizFeatures(df)
+        zonas = zonas_normalizadas(df['zona'].dropna().unique()) if 'zona' in df.columns else ()
+        with self._lock:
+            self.df, self.indice, self.features, self.zonas_conocidas = df, indice, features, zonas
+            # Huella de la BD leída junto con este df (None si no se conoce): es la que se guarda en el snapshot
+            self.huella = huella
+            self.version += 1
+
+    @property
+    def db(self):
+        """PropertyDatabase del sistema (None sin db_path); una sola instancia, las conexiones son por thread."""
+        if self._db is None and self._db_path:
+            from src.scrapers import PropertyDatabase
+
+            self._db = PropertyDatabase(db_path=self._db_path)
+        return self._db
+
+    def estado(self) -> Tuple:
+        """(model, collection, df, indice_ids, features) de una misma versión."""
+        with self._lock:
+            return self.model, self.collection, self.df, self.indice, self.features
+
+    def aplicar_cambios_bd(self, ids=()) -> Dict[str, int]:
+        """
+        Incorpora todo lo escrito en la BD desde la huella publicada (también lo que
+        escribieron otros procesos), leído en la misma transacción que la huella nueva.
+        Sin huella conocida solo se pueden aplicar los `ids` indicados.
+        """
+        db = self.db
+        if db is None:
+            return self.aplicar_nuevas_propiedades(pd.DataFrame())
+        huella = self.huella
+        if huella is None:
+            return self.aplicar_nuevas_propiedades(db.obtener_por_ids(list(ids)))
+        cambios, huella_nueva = db.obtener_df_con_huella(desde_version=huella["version"])
+        return self.aplicar_nuevas_propiedades(cambios, huella_nueva)
+
+    def aplicar_nuevas_propiedades(self, filas, huella: Optional[Dict] = None) -> Dict[str, int]:
+        """
+        Incorpora propiedades nuevas o actualizadas (lista de dicts o DataFrame con
+        las columnas de la BD): upsert en Chroma, DataFrame, índice y features.
+
+        `huella` solo se pasa si salió de la misma lectura que `filas` y esas filas son
+        todo lo escrito desde la huella publicada (ver aplicar_cambios_bd); si no, la
+        versión nueva queda sin huella y no se guarda snapshot de ella.
+
+        Returns:
+            Dict con contadores: agregadas, actualizadas, errores
+        """
+        nuevas = filas if isinstance(filas, pd.DataFrame) else pd.DataFrame(list(filas))
+        if nuevas.empty or 'id' not in nuevas.columns:
+            return {"agregadas": 0, "actualizadas": 0, "errores": 0}
+        nuevas = filtrar_ids_validos(nuevas)
+        nuevas['text'] = construir_textos(nuevas)
+
+        with self._lock_escritura:
+            df_actual, features_actuales = self.df, self.features
+            reemplazadas = df_actual['id'].isin(nuevas['id']) if 'id' in df_actual.columns else pd.Series(dtype=bool)
+            if df_actual.empty:
+                df, features = nuevas.reset_index(drop=True), None
+            else:
+                conservar = ~reemplazadas.to_numpy(dtype=bool)
+                df = pd.concat([df_actual[conservar], nuevas], ignore_index=True)
+                # Solo se calculan las features de las filas nuevas
+                features = features_actuales.extender(conservar, nuevas)
+
+            errores = 0
+            if self.collection is not None:
+                sincronizada = self.huella is not None and huella_sincronizada(self.collection) == self.huella
+                errores = len(upsert_propiedades(self.collection, nuevas, self._modelo_sync)["errores"])
+                # La colección sigue al día con la BD solo si lo estaba y el upsert entró completo
+                if sincronizada and huella is not None and not errores:
+                    marcar_sincronizada(self.collection, huella)
+
+            self._publicar(df, features=features, huella=huella)
+            # Las búsquedas que corrieron entre la escritura en la BD y la publicación
+            # pudieron volver a cachear resultados sin las filas nuevas
+            obtener_cache_queries().invalidar()
+            self._guardar_snapshot_en_segundo_plano()
+
+        stats = {
+            "agregadas": int(len(nuevas) - reemplazadas.sum()),
+            "actualizadas": int(reemplazadas.sum()),
+            "errores": errores,
+        }
+        logger.info(f"✅ Sistema de búsqueda actualizado en el lugar: {stats}")
+        return stats
+
+    def _guardar_snapshot_en_segundo_plano(self):
+        """Persiste el estado nuevo para que el próximo arranque sea en caliente, fuera del thread de la UI."""
+        if not self._db_path or not self._modelo_id:
+            return
+        from src.background_loader import CargaEnSegundoPlano
+
+        self._carga_snapshot = CargaEnSegundoPlano(self._guardar_snapshot, nombre="snapshot-sistema")
+
+    def _guardar_snapshot(self, reportar=lambda etapa: None):
+        """Escribe el snapshot de la última versión publicada (si otra escritura no la guardó ya)."""
+        from src.snapshot import guardar_snapshot
+
+        with self._lock_snapshot:
+            with self._lock:
+                df, features, huella, version = self.df, self.features, self.huella, self.version
+            # Sin la huella leída junto con este df no se puede saber si el snapshot estaría al día
+            if df.empty or huella is None or version <= self._version_snapshot:
+                return
+            reportar("Guardando snapshot del sistema...")
+            embeddings = self._modelo_sync.encode(df['text'].tolist())
+            guardar_snapshot(df, embeddings, features, huella, self._modelo_id)
+            self._version_snapshot = version
@@ -0,0 +1,153 @@
+"""
+snapshot.py - Snapshot en disco del sistema de búsqueda cargado (arranque en caliente)
+Guarda el DataFrame con los textos precalculados, la matriz de embeddings alineada
+a sus filas y las features del re-ranking. Se escribe de forma atómica después de
+cada sincronización y se valida contra la huella del contenido de data/properties.db
+al cargar (PropertyDatabase.huella: filas, último rowid, última fecha y versión).
+
+Estructura:
+    ACTUAL                 -> nombre del snapshot vigente (se reemplaza con os.replace)
+    v-<timestamp>/meta.json
+    v-<timestamp>/propiedades.pkl
+    v-<timestamp>/embeddings.npy   (se abre con mmap)
+    v-<timestamp>/features.pkl
+"""
+
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import SNAPSHOT_PATH
+from src.search_index import construir_indice_ids
+
+logger = logging.getLogger(__name__)
+
+# Se incrementa cuando cambia el contenido o el formato de los archivos del snapshot
+FORMATO_SNAPSHOT = 1
+PUNTERO = "ACTUAL"
+
+
+def huella_bd(db_path: str) -> Dict:
+    """
+    Huella del contenido de la tabla de propiedades. No depende del archivo: el WAL
+    se recrea al reabrir la BD y el feedback escribe en el mismo archivo.
+    """
+    from src.scrapers import PropertyDatabase
+
+    return PropertyDatabase(db_path=db_path).huella()
+
+
+@dataclass
+class Snapshot:
+    df: pd.DataFrame
+    indice: pd.Index
+    embeddings: Optional[np.ndarray]
+    features: object
+    meta: Dict
+
+    def envolver(self, model) -> "ModeloDesdeSnapshot":
+        """Modelo con encode() que toma de la matriz del snapshot los textos que ya tiene."""
+        return ModeloDesdeSnapshot(self, model)
+
+
+class ModeloDesdeSnapshot:
+    """Resuelve encode() desde la matriz del snapshot; solo lo que falta pasa por el modelo."""
+
+    def __init__(self, snapshot: Snapshot, model):
+        self.model = model
+        self._matriz = snapshot.embeddings
+        self._posiciones = {}
+        if self._matriz is not None and 'text' in snapshot.df.columns:
+            self._posiciones = {t: i for i, t in enumerate(snapshot.df['text'])}
+
+    def encode(self, textos, **kwargs) -> np.ndarray:
+        if isinstance(textos, str):
+            return self.encode([textos])[0]
+        textos = list(textos)
+        faltantes = [t for t in textos if t not in self._posiciones]
+        if not faltantes:
+            return np.asarray(self._matriz[[self._posiciones[t] for t in textos]], dtype=np.float32)
+        nuevos = dict(zip(faltantes, np.asarray(self.model.encode(faltantes), dtype=np.float32)))
+        return np.stack([
+            nuevos[t] if t in nuevos else np.asarray(self._matriz[self._posiciones[t]]) for t in textos
+        ]) if textos else np.zeros((0, 0), dtype=np.float32)
+
+
+def guardar_snapshot(df: pd.DataFrame, embeddings: Optional[np.ndarray], features, huella: Dict,
+                     modelo: str, directorio: str = SNAPSHOT_PATH) -> Optional[str]:
+    """
+    Escribe un snapshot nuevo y recién entonces mueve el puntero ACTUAL a él.
+    Un corte a mitad de la escritura deja vigente el snapshot anterior.
+    """
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        nombre = f"v-{time.time_ns()}"
+        tmp = os.path.join(directorio, nombre + ".tmp")
+        os.makedirs(tmp)
+
+        df.to_pickle(os.path.join(tmp, "propiedades.pkl"))
+        if embeddings is not None:
+            np.save(os.path.join(tmp, "embeddings.npy"), np.asarray(embeddings, dtype=np.float32))
+        with open(os.path.join(tmp, "features.pkl"), "wb") as f:
+            pickle.dump(features, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"formato": FORMATO_SNAPSHOT, "huella": huella, "modelo": modelo,
+                       "filas": len(df), "creado": time.time()}, f)
+
+        os.replace(tmp, os.path.join(directorio, nombre))
+        puntero_tmp = os.path.join(directorio, PUNTERO + ".tmp")
+        with open(puntero_tmp, "w", encoding="utf-8") as f:
+            f.write(nombre)
+        os.replace(puntero_tmp, os.path.join(directorio, PUNTERO))
+
+        # Los snapshots anteriores ya no están referenciados
+        for entrada in os.listdir(directorio):
+            if entrada.startswith("v-") and entrada != nombre:
+                shutil.rmtree(os.path.join(directorio, entrada), ignore_errors=True)
+        logger.info(f"💾 Snapshot del sistema guardado ({len(df)} propiedades)")
+        return nombre
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el snapshot: {e}")
+        return None
+
+
+def cargar_snapshot(huella: Dict, modelo: str, directorio: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """Snapshot vigente si coincide con la huella de la BD y el modelo; None si falta o está vencido."""
+    try:
+        with open(os.path.join(directorio, PUNTERO), encoding="utf-8") as f:
+            ruta = os.path.join(directorio, f.read().strip())
+        with open(os.path.join(ruta, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Snapshot ilegible, se ignora: {e}")
+        return None
+
+    if meta.get("formato") != FORMATO_SNAPSHOT or meta.get("modelo") != modelo:
+        logger.info("Snapshot de otro formato o modelo, se reconstruye")
+        return None
+    if meta.get("huella") != huella:
+        logger.info("Snapshot desactualizado respecto de la BD, se reconstruye")
+        return None
+
+    try:
+        df = pd.read_pickle(os.path.join(ruta, "propiedades.pkl"))
+        ruta_emb = os.path.join(ruta, "embeddings.npy")
+        embeddings = np.load(ruta_emb, mmap_mode="r") if os.path.exists(ruta_emb) else None
+        with open(os.path.join(ruta, "features.pkl"), "rb") as f:
+            features = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Error leyendo snapshot, se ignora: {e}")
+        return None
+
+    logger.info(f"⚡ Sistema restaurado desde snapshot ({len(df)} propiedades)")
+    return Snapshot(df=df, indice=construir_indice_ids(df), embeddings=embeddings, features=features, meta=meta)
@@ -0,0 +1,206 @@
+"""
+vector_sync.py - Sincronización incremental entre PropertyDatabase y ChromaDB
+Solo se embeben las propiedades nuevas o modificadas y se eliminan las borradas.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.config import CHROMA_BATCH_SIZE
+from src.search_filters import agregar_campos_filtro
+
+logger = logging.getLogger(__name__)
+
+COLECCION = "propiedades"
+CAMPO_HASH = "text_hash"  # Hash del registro (texto embebido + metadatos), guardado en Chroma
+CAMPO_HUELLA = "huella_bd"  # Huella de la BD con la que quedó al día la colección (metadatos de la colección)
+# Columnas de la BD que no van a Chroma: cambian en cada reescritura sin cambiar la propiedad
+COLUMNAS_INTERNAS = ("version_escritura",)
+
+
+def construir_textos(df: pd.DataFrame) -> pd.Series:
+    """Texto que se embebe por propiedad: '<tipo> en <zona>. <descripcion>'."""
+    desc = df['descripcion'] if 'descripcion' in df.columns else pd.Series('', index=df.index)
+    return df['tipo'].astype(str) + " en " + df['zona'].astype(str) + ". " + desc.astype(str)
+
+
+def hash_texto(texto: str) -> str:
+    """Hash de contenido del texto embebido (detecta propiedades modificadas)."""
+    return hashlib.sha1(str(texto).encode("utf-8")).hexdigest()
+
+
+def hash_registro(metadata: Dict) -> str:
+    """Hash del registro completo: cambia si cambia el texto o cualquier metadato filtrable."""
+    return hash_texto(json.dumps(metadata, sort_keys=True, default=str, ensure_ascii=False))
+
+
+def filtrar_ids_validos(df: pd.DataFrame) -> pd.DataFrame:
+    """Descarta filas sin ID utilizable y normaliza el ID a string."""
+    ids = df['id'].astype(str).str.strip()
+    validos = df['id'].notna() & (ids.str.len() > 0) & ~ids.isin(["nan", "None"])
+    df = df[validos].copy()
+    df['id'] = ids[validos]
+    return df.drop_duplicates(subset='id', keep='last').reset_index(drop=True)
+
+
+def sanear_metadatos(df: pd.DataFrame) -> List[Dict]:
+    """
+    Convierte las filas en metadatos válidos para Chroma (nulos -> "").
+    Agrega los campos normalizados que usan los filtros `where` (zona_norm, tipo_categoria).
+    """
+    df = agregar_campos_filtro(df).drop(columns=[CAMPO_HASH, *COLUMNAS_INTERNAS], errors='ignore')
+    return df.astype(object).where(df.notna(), "").to_dict("records")
+
+
+def ingestar_en_lotes(collection, ids: Sequence[str], documentos: Sequence[str], embeddings,
+                      metadatas: Sequence[Dict], batch_size: int = CHROMA_BATCH_SIZE,
+                      modo: str = "upsert") -> Dict:
+    """
+    Ingesta masiva en ChromaDB: un add/upsert por lote en lugar de uno por fila.
+
+    Args:
+        collection: Colección de ChromaDB
+        ids, documentos, embeddings, metadatas: Secuencias alineadas por posición
+        batch_size: Documentos por llamada a Chroma
+        modo: "upsert" (default) o "add"
+
+    Returns:
+        Dict con 'ingestados', 'lotes' y 'errores' (un dict por lote fallido)
+    """
+    operacion = collection.upsert if modo == "upsert" else collection.add
+    batch_size = max(1, int(batch_size))
+    reporte = {"ingestados": 0, "lotes": 0, "errores": []}
+
+    for inicio in range(0, len(ids), batch_size):
+        fin = min(inicio + batch_size, len(ids))
+        reporte["lotes"] += 1
+        try:
+            operacion(
+                ids=list(ids[inicio:fin]),
+                documents=list(documentos[inicio:fin]),
+                embeddings=[[float(x) for x in e] for e in embeddings[inicio:fin]],
+                metadatas=list(metadatas[inicio:fin]),
+            )
+            reporte["ingestados"] += fin - inicio
+        except Exception as e:
+            logger.error(f"Error ingestando lote {inicio}-{fin} en ChromaDB: {e}")
+            reporte["errores"].append({"desde": inicio, "hasta": fin, "error": str(e)})
+
+    return reporte
+
+
+def huella_sincronizada(collection) -> Optional[Dict]:
+    """Huella de la BD con la que se sincronizó por última vez la colección (None si no se registró)."""
+    try:
+        valor = (collection.metadata or {}).get(CAMPO_HUELLA)
+        return json.loads(valor) if valor else None
+    except Exception as e:
+        logger.debug(f"Huella de la colección ilegible: {e}")
+        return None
+
+
+def marcar_sincronizada(collection, huella: Dict) -> None:
+    """
+    Registra en los metadatos de la colección la huella de la BD con la que quedó al día.
+    Un arranque con un snapshot de esa misma huella puede saltear sincronizar_coleccion().
+    """
+    # Chroma no permite cambiar la configuración del índice (hnsw:*) con modify()
+    metadata = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+    metadata[CAMPO_HUELLA] = json.dumps(huella, sort_keys=True)
+    try:
+        collection.modify(metadata=metadata)
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la huella en la colección: {e}")
+
+
+def sincronizar_coleccion(collection, df: pd.DataFrame, model, batch_size: int = CHROMA_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Sincroniza la colección de Chroma con el DataFrame de propiedades.
+
+    Compara los IDs y el hash de cada registro guardados en Chroma con los de
+    la BD: solo se upsertean las filas nuevas o modificadas (el embedding solo
+    se recalcula si cambió el texto, vía EmbeddingCache) y se eliminan de
+    Chroma las propiedades que ya no existen en la BD.
+
+    Args:
+        collection: Colección de ChromaDB
+        df: DataFrame con columnas 'id' y 'text'
+        model: Modelo con método encode() (SentenceTransformer)
+        batch_size: Documentos por upsert en Chroma
+
+    Returns:
+        Dict con contadores: nuevos, actualizados, eliminados, sin_cambios, errores
+    """
+    df = filtrar_ids_validos(df)
+    metadatas = sanear_metadatos(df)
+    hashes = pd.Series([hash_registro(m) for m in metadatas], index=df.index)
+
+    existentes = collection.get(include=["metadatas"])
+    hash_en_chroma = {
+        doc_id: (meta or {}).get(CAMPO_HASH)
+        for doc_id, meta in zip(existentes['ids'], existentes['metadatas'] or [])
+    }
+
+    en_chroma = df['id'].isin(hash_en_chroma.keys())
+    cambiados = en_chroma & (df['id'].map(hash_en_chroma) != hashes)
+    pendientes = ~en_chroma | cambiados
+
+    eliminados = list(set(hash_en_chroma) - set(df['id']))
+    if eliminados:
+        collection.delete(ids=eliminados)
+        logger.info(f"Eliminadas {len(eliminados)} propiedades de ChromaDB")
+
+    df_pendientes = df[pendientes]
+    errores = []
+    if not df_pendientes.empty:
+        logger.info(f"Embebiendo {len(df_pendientes)} propiedades nuevas/modificadas...")
+        embeddings = model.encode(df_pendientes['text'].tolist())
+        reporte = ingestar_en_lotes(
+            collection,
+            ids=df_pendientes['id'].tolist(),
+            documentos=df_pendientes['text'].tolist(),
+            embeddings=embeddings,
+            metadatas=[
+                dict(metadatas[i], **{CAMPO_HASH: hashes[i]})
+                for i in df_pendientes.index
+            ],
+            batch_size=batch_size,
+        )
+        errores = reporte["errores"]
+
+    stats = {
+        "nuevos": int((~en_chroma).sum()),
+        "actualizados": int(cambiados.sum()),
+        "eliminados": len(eliminados),
+        "sin_cambios": int((~pendientes).sum()),
+        "errores": len(errores),
+    }
+    logger.info(f"✅ ChromaDB sincronizado: {stats}")
+    return stats
+
+
+def upsert_propiedades(collection, df: pd.DataFrame, model, batch_size: int = CHROMA_BATCH_SIZE) -> Dict:
+    """
+    Upsertea en Chroma solo las filas de `df` (propiedades nuevas o actualizadas),
+    sin comparar contra el resto de la colección ni eliminar nada.
+
+    Returns:
+        Reporte de ingestar_en_lotes()
+    """
+    df = filtrar_ids_validos(df)
+    if df.empty:
+        return {"ingestados": 0, "lotes": 0, "errores": []}
+    metadatas = sanear_metadatos(df)
+    textos = df['text'].tolist()
+    return ingestar_en_lotes(
+        collection,
+        ids=df['id'].tolist(),
+        documentos=textos,
+        embeddings=model.encode(textos),
+        metadatas=[dict(m, **{CAMPO_HASH: hash_registro(m)}) for m in metadatas],
+        batch_size=batch_size,
+    )
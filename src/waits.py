@@ -0,0 +1,163 @@
+"""
+waits.py - Esperas adaptativas para los scrapers (en lugar de time.sleep fijos)
+Cada espera sondea una condición concreta del DOM (cantidad de tarjetas estable,
+spinner oculto, fotos de la galería cargadas, documento cargado) hasta que se cumple o vence
+su timeout, y registra cuánto tardó en realidad. Las condiciones se evalúan con
+execute_script: una sola ida y vuelta a WebDriver por sondeo.
+
+    obtener_registro_esperas().estadisticas()
+    -> {"argenprop.tarjetas": {"n": 12, "media": 0.8, "p50": 0.7, "max": 2.1, "timeouts": 0}, ...}
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SONDEO = 0.1
+
+_JS_CANTIDAD = "return document.querySelectorAll(arguments[0]).length;"
+_JS_DOCUMENTO_LISTO = "return document.readyState === 'complete';"
+_JS_OCULTO = """
+    var el = document.querySelector(arguments[0]);
+    return !el || el.offsetParent === null || getComputedStyle(el).visibility === 'hidden';
+"""
+# Imágenes de `selector` con foto de verdad: cargada con tamaño mayor a un ícono, o con
+# data-src de lazy loading (el scraper lee ese atributo)
+_JS_IMAGENES = """
+    return Array.prototype.filter.call(document.querySelectorAll(arguments[0]), function (img) {
+        if (img.getAttribute('data-src')) { return true; }
+        var src = img.currentSrc || img.getAttribute('src') || '';
+        return src.length > 0 && img.complete && img.naturalWidth > 100;
+    }).length;
+"""
+_JS_SCROLL = "window.scrollTo(0, document.body.scrollHeight);"
+
+
+class RegistroEsperas:
+    """Duraciones reales de cada espera por nombre (últimas `max_muestras`)."""
+
+    def __init__(self, max_muestras: int = 500):
+        self._muestras: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=max_muestras))
+        self._timeouts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre: str, duracion: float, cumplida: bool) -> None:
+        with self._lock:
+            self._muestras[nombre].append(duracion)
+            if not cumplida:
+                self._timeouts[nombre] += 1
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            resultado = {}
+            for nombre, muestras in self._muestras.items():
+                ordenadas = sorted(muestras)
+                resultado[nombre] = {
+                    "n": len(ordenadas),
+                    "media": round(sum(ordenadas) / len(ordenadas), 3),
+                    "p50": round(ordenadas[len(ordenadas) // 2], 3),
+                    "max": round(ordenadas[-1], 3),
+                    "timeouts": self._timeouts[nombre],
+                }
+            return resultado
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._muestras.clear()
+            self._timeouts.clear()
+
+
+_registro = RegistroEsperas()
+
+
+def obtener_registro_esperas() -> RegistroEsperas:
+    return _registro
+
+
+def esperar_condicion(driver, nombre: str, condicion: Callable, timeout: float,
+                      intervalo: float = INTERVALO_SONDEO, registro: Optional[RegistroEsperas] = None):
+    """
+    Sondea `condicion(driver)` hasta que devuelva algo verdadero o venza `timeout`.
+    Devuelve el último valor de la condición (falso si venció). Los errores de
+    WebDriver durante el sondeo cuentan como condición no cumplida.
+    """
+    registro = registro or _registro
+    inicio = time.monotonic()
+    limite = inicio + timeout
+    valor = None
+    while True:
+        try:
+            valor = condicion(driver)
+        except Exception as e:
+            logger.debug(f"Espera {nombre}: {e}")
+            valor = None
+        if valor or time.monotonic() >= limite:
+            break
+        time.sleep(intervalo)
+    registro.registrar(nombre, time.monotonic() - inicio, bool(valor))
+    return valor
+
+
+def esperar_documento_listo(driver, nombre: str, timeout: float = 10) -> bool:
+    """document.readyState == 'complete'."""
+    return bool(esperar_condicion(driver, nombre, lambda d: d.execute_script(_JS_DOCUMENTO_LISTO), timeout))
+
+
+def esperar_oculto(driver, selector: str, nombre: str, timeout: float = 15) -> bool:
+    """El primer elemento de `selector` (p.ej. un spinner) no existe o no es visible."""
+    return bool(esperar_condicion(driver, nombre, lambda d: d.execute_script(_JS_OCULTO, selector), timeout))
+
+
+def esperar_elementos_estables(driver, selector: str, nombre: str, timeout: float = 10, minimo: int = 1,
+                               estable_por: float = 0.5) -> int:
+    """
+    Espera a que haya al menos `minimo` elementos de `selector` y que la cantidad
+    no cambie durante `estable_por` segundos (la página terminó de agregar tarjetas).
+    Devuelve la última cantidad vista.
+    """
+    estado = {"cantidad": -1, "desde": time.monotonic()}
+
+    def estable(d):
+        cantidad = d.execute_script(_JS_CANTIDAD, selector) or 0
+        ahora = time.monotonic()
+        if cantidad != estado["cantidad"]:
+            estado["cantidad"], estado["desde"] = cantidad, ahora
+            return False
+        return cantidad >= minimo and ahora - estado["desde"] >= estable_por
+
+    esperar_condicion(driver, nombre, estable, timeout)
+    return max(estado["cantidad"], 0)
+
+
+def esperar_imagenes(driver, selector: str, nombre: str, timeout: float = 5, minimo: int = 1) -> int:
+    """
+    Al menos `minimo` imágenes de `selector` (p.ej. la galería de fotos) cargadas o con
+    data-src de lazy loading. Devuelve cuántas hay.
+    """
+    def suficientes(d):
+        cantidad = d.execute_script(_JS_IMAGENES, selector) or 0
+        return cantidad if cantidad >= minimo else 0
+
+    return int(esperar_condicion(driver, nombre, suficientes, timeout) or 0)
+
+
+def scroll_hasta_estable(driver, selector: str, nombre: str, max_scrolls: int = 3, timeout: float = 3,
+                         stop: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Hace scroll al final y espera a que la cantidad de `selector` se estabilice,
+    hasta `max_scrolls` veces o hasta que un scroll ya no agregue elementos.
+    """
+    cantidad = driver.execute_script(_JS_CANTIDAD, selector) or 0
+    for _ in range(max_scrolls):
+        if stop is not None and stop():
+            break
+        driver.execute_script(_JS_SCROLL)
+        nueva = esperar_elementos_estables(driver, selector, nombre, timeout=timeout, minimo=0)
+        if nueva <= cantidad:
+            break
+        cantidad = nueva
+    return cantidad
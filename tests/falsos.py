@@ -0,0 +1,44 @@
+"""Dobles de prueba compartidos por los tests del sistema de búsqueda (modelo y colección de Chroma)"""
+
+import numpy as np
+
+
+class ModeloFalso:
+    """encode() determinístico que registra los textos que tuvo que codificar."""
+
+    def __init__(self):
+        self.textos_codificados = []
+
+    def encode(self, textos):
+        self.textos_codificados.extend(textos)
+        return np.array([[float(len(t)), 1.0] for t in textos])
+
+
+class ColeccionFalsa:
+    """Colección de Chroma en memoria: {id: metadatos}. Un lote con el id "roto" falla."""
+
+    def __init__(self):
+        self.docs = {}
+        self.llamadas = 0
+        self.metadata = None
+
+    def get(self, include=None):
+        ids = list(self.docs)
+        return {"ids": ids, "metadatas": [self.docs[i] for i in ids]}
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        self.llamadas += 1
+        if any(doc_id == "roto" for doc_id in ids):
+            raise ValueError("lote inválido")
+        for doc_id, meta in zip(ids, metadatas):
+            self.docs[doc_id] = meta
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def modify(self, metadata=None):
+        self.metadata = metadata
+
+    def count(self):
+        return len(self.docs)
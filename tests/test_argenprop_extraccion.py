@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Test de la extracción de tarjetas de Argenprop en un solo execute_script (sin Chrome)"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scrapers import JS_TARJETAS_ARGENPROP, ArgenpropScraper
+
+TARJETA = {
+    "href": "https://www.argenprop.com/departamento-en-venta-en-palermo--123",
+    "h2": "Departamento 3 ambientes con balcón",
+    "parrafos": ["USD 185.000", "Av. Santa Fe 3200, Palermo, Capital Federal", "  "],
+    "spans": ["75 m² cubie.", "USD 185.000", "2 dorm.", "1 baño", "10 años", "Frente", "Balcón"],
+    "imagenes": ["https://static.argenprop.com/foto1.jpg"],
+}
+
+
+class DriverFalso:
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+        self.llamadas = []
+
+    def execute_script(self, script, *args):
+        self.llamadas.append((script, args))
+        return self.respuesta
+
+
+def test_extraer_tarjetas_una_llamada():
+    driver = DriverFalso([TARJETA])
+    tarjetas = ArgenpropScraper.extraer_tarjetas(driver, 20)
+    assert tarjetas == [TARJETA]
+    assert driver.llamadas == [(JS_TARJETAS_ARGENPROP, (".card", 20))]
+
+
+def test_extraer_tarjetas_respuesta_invalida():
+    try:
+        ArgenpropScraper.extraer_tarjetas(DriverFalso(None), 5)
+    except ValueError:
+        return
+    raise AssertionError("Se esperaba ValueError con una respuesta que no es lista")
+
+
+def test_parsear_tarjeta():
+    prop = ArgenpropScraper.parsear_tarjeta(TARJETA, "Palermo")
+    assert prop["descripcion"].startswith(TARJETA["h2"])
+    assert prop["url"] == TARJETA["href"]
+    assert prop["precio"] == "USD 185.000"
+    assert prop["metros_cubiertos"] == 75
+    assert prop["habitaciones"] == 2
+    assert prop["baños"] == 1
+    assert prop["antiguedad"] == 10
+    assert prop["foto_portada"] == TARJETA["imagenes"][0]
+    assert prop["fuente"] == "Argenprop"
+
+
+def test_parsear_tarjeta_sin_titulo():
+    assert ArgenpropScraper.parsear_tarjeta({**TARJETA, "h2": "  "}, "Palermo") is None
+
+
+class ElementoFalso:
+    """WebElement mínimo: .text y find_element/find_elements por tag."""
+
+    def __init__(self, texto="", hijos=None):
+        self.text = texto
+        self.hijos = hijos or {}
+
+    def find_elements(self, by, valor):
+        return list(self.hijos.get(valor, []))
+
+    def find_element(self, by, valor):
+        encontrados = self.find_elements(by, valor)
+        if not encontrados:
+            raise LookupError(f"Sin elemento {valor}")
+        return encontrados[0]
+
+
+def _tarjeta_falsa(datos):
+    return ElementoFalso(hijos={
+        "h2": [ElementoFalso(datos["h2"])],
+        "p": [ElementoFalso(t) for t in datos["parrafos"]],
+        "span": [ElementoFalso(t) for t in datos["spans"]],
+    })
+
+
+def test_mismo_resultado_que_por_elemento():
+    """El camino por WebElement (fallback) y el del script arman la misma propiedad."""
+    pytest.importorskip("selenium")
+    por_script = ArgenpropScraper.parsear_tarjeta(TARJETA, "Palermo")
+    por_elemento = ArgenpropScraper.extraer_datos_propiedad(_tarjeta_falsa(TARJETA), TARJETA["href"], "Palermo")
+    assert por_elemento is not None
+    for prop in (por_script, por_elemento):
+        prop.pop("fecha_agregado")
+    # Las imágenes solo las junta el script
+    assert por_script.pop("foto_portada") == TARJETA["imagenes"][0] and "foto_portada" not in por_elemento
+    assert por_script == por_elemento
+
+    sin_titulo = _tarjeta_falsa(TARJETA)
+    sin_titulo.hijos.pop("h2")
+    assert ArgenpropScraper.extraer_datos_propiedad(sin_titulo, TARJETA["href"], "Palermo") is None
+
+
+if __name__ == "__main__":
+    test_extraer_tarjetas_una_llamada()
+    test_extraer_tarjetas_respuesta_invalida()
+    test_parsear_tarjeta()
+    test_parsear_tarjeta_sin_titulo()
+    test_mismo_resultado_que_por_elemento()
+    print("✅ Extracción de tarjetas de Argenprop OK")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Test de la carga en segundo plano (estado, etapas y errores)"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.background_loader import CargaEnSegundoPlano
+
+
+def test_carga_reporta_etapas_y_resultado():
+    liberar = threading.Event()
+
+    def cargar(reportar):
+        reportar("Cargando modelo...")
+        liberar.wait(5)
+        return "sistema"
+
+    carga = CargaEnSegundoPlano(cargar)
+    assert not carga.esperar(timeout=0.05) and not carga.listo
+    assert carga.etapa == "Cargando modelo..."
+    liberar.set()
+    assert carga.esperar(timeout=5) and carga.resultado == "sistema" and carga.error is None
+
+
+def test_carga_con_error():
+    def cargar(reportar):
+        raise RuntimeError("sin modelo")
+
+    carga = CargaEnSegundoPlano(cargar)
+    assert carga.esperar(timeout=5)
+    assert isinstance(carga.error, RuntimeError) and carga.resultado is None
+
+
+if __name__ == "__main__":
+    test_carga_reporta_etapas_y_resultado()
+    test_carga_con_error()
+    print("✅ Carga en segundo plano OK")
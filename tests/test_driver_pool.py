@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test del pool de drivers de Selenium (con drivers falsos, sin Chrome)"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.driver_pool import PoolDrivers
+
+
+class DriverFalso:
+    creados = 0
+
+    def __init__(self):
+        DriverFalso.creados += 1
+        self.caido = False
+        self.cerrado = False
+
+    @property
+    def current_url(self):
+        if self.caido:
+            raise ConnectionError("chrome no responde")
+        return "about:blank"
+
+    def quit(self):
+        self.cerrado = True
+
+
+def test_reutiliza_y_recicla_por_usos():
+    pool = PoolDrivers(tamano=1, max_paginas=3, fabrica=DriverFalso)
+    usados = []
+    for _ in range(4):
+        with pool.driver() as driver:
+            usados.append(driver)
+    assert usados[0] is usados[1] is usados[2] and usados[3] is not usados[0]
+    assert usados[0].cerrado and pool.estadisticas()["reciclados"] == 1
+    pool.cerrar()
+    assert usados[3].cerrado
+
+
+def test_descarta_driver_caido_aunque_falle_el_bloque():
+    pool = PoolDrivers(tamano=1, fabrica=DriverFalso)
+    with pytest.raises(RuntimeError):
+        with pool.driver() as driver:
+            driver.caido = True
+            raise RuntimeError("error de la página")
+    assert driver.cerrado
+    with pool.driver() as otro:
+        assert otro is not driver
+    assert pool.estadisticas()["descartados"] == 1
+
+
+def test_acotado_entre_threads():
+    pool = PoolDrivers(tamano=2, fabrica=DriverFalso)
+    antes = DriverFalso.creados
+    en_uso, maximo, lock = [0], [0], threading.Lock()
+    barrera = threading.Barrier(2)
+
+    def usar():
+        with pool.driver():
+            with lock:
+                en_uso[0] += 1
+                maximo[0] = max(maximo[0], en_uso[0])
+            try:
+                barrera.wait(timeout=0.2)
+            except threading.BrokenBarrierError:
+                pass
+            with lock:
+                en_uso[0] -= 1
+
+    hilos = [threading.Thread(target=usar) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert maximo[0] <= 2 and DriverFalso.creados - antes == 2
+
+    with pool.driver(), pool.driver():
+        with pytest.raises(TimeoutError):
+            with pool.driver(timeout=0.05):
+                pass
+    pool.cerrar()
+
+
+if __name__ == "__main__":
+    test_reutiliza_y_recicla_por_usos()
+    test_descarta_driver_caido_aunque_falle_el_bloque()
+    test_acotado_entre_threads()
+    print("✅ Pool de drivers OK")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Test de paridad de los backends de embeddings (onnx / int8) contra torch"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pytest
+
+from src.embedding_backends import identificador_modelo, similitud_coseno
+
+# Similitud coseno mínima aceptada contra el backend de referencia
+UMBRAL_PARIDAD = 0.98
+
+TEXTOS = [
+    "Casa en Temperley. Casa con pileta, jardín y 3 dormitorios",
+    "Departamento en Palermo. Luminoso 2 ambientes con balcón",
+    "PH en Flores. Reciclado a nuevo con terraza propia",
+]
+
+
+def test_similitud_coseno_e_identificador():
+    a = np.array([[1.0, 0.0], [1.0, 1.0]])
+    assert np.allclose(similitud_coseno(a, a * 3), [1.0, 1.0])
+    assert identificador_modelo("m", "torch") == "m" and identificador_modelo("m", "onnx") == "m@onnx"
+
+
+@pytest.mark.parametrize("backend", ["onnx", "int8"])
+def test_paridad_contra_torch(backend):
+    pytest.importorskip("sentence_transformers")
+    from src.embedding_backends import cargar_modelo
+
+    try:
+        referencia = cargar_modelo(backend="torch").encode(TEXTOS)
+    except Exception as e:  # sin red para bajar el modelo
+        pytest.skip(f"Modelo no disponible: {e}")
+    try:
+        modelo = cargar_modelo(backend=backend)
+    except RuntimeError as e:  # dependencia opcional del backend no instalada
+        pytest.skip(str(e))
+
+    # Se compara de verdad el backend pedido, no torch contra torch
+    assert modelo.backend_embeddings == backend
+    if backend == "onnx":
+        assert getattr(modelo, "backend", None) == "onnx"
+    else:
+        assert any("quantized" in type(m).__module__ for m in modelo.modules())
+    candidato = modelo.encode(TEXTOS)
+    assert similitud_coseno(referencia, candidato).min() >= UMBRAL_PARIDAD
+
+
+def test_backend_desconocido_no_vuelve_a_torch():
+    pytest.importorskip("sentence_transformers")
+    from src.embedding_backends import cargar_modelo
+
+    with pytest.raises(ValueError):
+        cargar_modelo(backend="tensorrt")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test del cache persistente de embeddings (modelo simulado)"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache
+
+
+class ModeloFalso:
+    def __init__(self):
+        self.llamadas = 0
+
+    def encode(self, textos):
+        self.llamadas += 1
+        return np.array([[len(t), t.count("a"), 1.0] for t in textos], dtype=np.float32)
+
+
+def test_cache_persiste_entre_procesos():
+    with tempfile.TemporaryDirectory() as tmp:
+        modelo = ModeloFalso()
+        cache = EmbeddingCache(directorio=tmp, modelo="modelo/prueba")
+        primera = cache.codificar(["casa en palermo", "ph en flores", "casa en palermo"], modelo)
+        assert primera.shape == (3, 3) and modelo.llamadas == 1
+        np.testing.assert_array_equal(primera[0], primera[2])
+
+        # Una nueva instancia (reinicio) reutiliza los vectores guardados
+        cache = EmbeddingCache(directorio=tmp, modelo="modelo/prueba")
+        assert len(cache) == 2
+        segunda = cache.envolver(modelo).encode(["ph en flores", "depto en recoleta"])
+        assert modelo.llamadas == 2  # solo se calculó el texto nuevo
+        np.testing.assert_array_equal(segunda[0], primera[1])
+
+        # Otro modelo no comparte vectores
+        assert len(EmbeddingCache(directorio=tmp, modelo="otro")) == 0
+
+
+def test_dos_procesos_comparten_el_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        modelo = ModeloFalso()
+        # Dos réplicas con el cache abierto al mismo tiempo, agregando alternadamente
+        a = EmbeddingCache(directorio=tmp, modelo="m")
+        b = EmbeddingCache(directorio=tmp, modelo="m")
+        a.codificar(["casa", "ph"], modelo)
+        b.codificar(["departamento con balcón"], modelo)
+        a.codificar(["casa amplia", "ph"], modelo)
+        b.codificar(["terreno", "casa"], modelo)
+
+        esperado = {t: modelo.encode([t])[0] for t in ("casa", "ph", "departamento con balcón", "casa amplia", "terreno")}
+        nuevo = EmbeddingCache(directorio=tmp, modelo="m")
+        assert len(nuevo) == 5
+        contador = ModeloFalso()
+        vectores = nuevo.codificar(list(esperado), contador)
+        assert contador.llamadas == 0  # nadie pisó las filas del otro
+        np.testing.assert_array_equal(vectores, np.array(list(esperado.values())))
+
+
+def test_compactacion_conserva_los_mas_recientes():
+    with tempfile.TemporaryDirectory() as tmp:
+        modelo = ModeloFalso()
+        cache = EmbeddingCache(directorio=tmp, modelo="m", max_entradas=3)
+        textos = ["uno", "dos", "tres", "cuatro", "cinco"]
+        for texto in textos:
+            cache.codificar([texto], modelo)
+        assert len(cache) == 3
+
+        reabierto = EmbeddingCache(directorio=tmp, modelo="m", max_entradas=3)
+        contador = ModeloFalso()
+        np.testing.assert_array_equal(reabierto.codificar(textos[-3:], contador), modelo.encode(textos[-3:]))
+        assert contador.llamadas == 0
+        assert reabierto.compactar(1) == 2 and len(EmbeddingCache(directorio=tmp, modelo="m")) == 1
+
+        # Una compactación interrumpida invalida el cache en lugar de desalinear vectores y hashes
+        open(os.path.join(reabierto.directorio, "compactando"), "w").close()
+        assert len(EmbeddingCache(directorio=tmp, modelo="m")) == 0
+        reabierto.codificar(["seis"], modelo)
+        assert len(EmbeddingCache(directorio=tmp, modelo="m")) == 1
+
+
+if __name__ == "__main__":
+    test_cache_persiste_entre_procesos()
+    test_dos_procesos_comparten_el_cache()
+    test_compactacion_conserva_los_mas_recientes()
+    print("✅ Cache de embeddings OK")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Test del servicio de embeddings compartido (servidor HTTP local con modelo simulado)"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from src.embedding_service import ClienteEmbeddings, crear_servidor, obtener_modelo_embeddings
+
+
+class ModeloFalso:
+    def encode(self, textos):
+        return np.array([[float(len(t)), 1.0, 0.5] for t in textos])
+
+
+def test_cliente_codifica_contra_el_servicio():
+    servidor = crear_servidor(ModeloFalso(), port=0, nombre_modelo="falso")
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    try:
+        cliente = ClienteEmbeddings(url)
+        assert cliente.salud()["dim"] == 3
+        assert cliente.encode(["casa"]).tolist() == [[4.0, 1.0, 0.5]]
+        assert cliente.encode(["ph", "loft"]).shape == (2, 3)
+        assert cliente.encode("depto").tolist() == [5.0, 1.0, 0.5]
+
+        assert isinstance(obtener_modelo_embeddings("falso", url=url), ClienteEmbeddings)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    test_cliente_codifica_contra_el_servicio()
+    print("✅ Servicio de embeddings OK")
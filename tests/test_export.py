@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test de exportación en streaming (CSV completo, incremental y Parquet)"""
+
+import csv
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.export import exportar_csv, exportar_en_segundo_plano, exportar_parquet, iterar_lotes
+from src.scrapers import PropertyDatabase
+
+
+def _props(desde, hasta, fecha):
+    return [{"id": f"p{i}", "url": f"http://x/{i}", "zona": "Flores", "habitaciones": i % 4,
+             "descripcion": f"Casa {i}, con \"comillas\"", "fecha_agregado": fecha} for i in range(desde, hasta)]
+
+
+def _leer(ruta):
+    with open(ruta, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_completo_e_incremental():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        db.agregar_propiedades(_props(0, 25, "2024-01-01T10:00:00"))
+        destino = os.path.join(tmp, "export", "props.csv")
+
+        assert sum(len(l) for l in iterar_lotes(db.db_path, ["id"], tamano_lote=10)) == 25
+        resultado = exportar_csv(db.db_path, destino, incremental=True, tamano_lote=10)
+        assert resultado["filas"] == 25 and not resultado["incremental"]
+        filas = _leer(destino)
+        assert len(filas) == 25 and filas[3]["descripcion"] == 'Casa 3, con "comillas"'
+
+        # Solo se agregan las filas posteriores a la marca, sin repetir encabezado
+        db.agregar_propiedades(_props(25, 30, "2024-01-02T10:00:00"))
+        resultado = exportar_csv(db.db_path, destino, incremental=True, tamano_lote=10)
+        assert resultado["filas"] == 5 and resultado["incremental"]
+        assert [f["id"] for f in _leer(destino)][-5:] == [f"p{i}" for i in range(25, 30)]
+        assert exportar_csv(db.db_path, destino, incremental=True)["filas"] == 0
+        assert len(_leer(destino)) == 30
+
+        # Otra proyección de columnas invalida la marca: exportación completa
+        resultado = exportar_csv(db.db_path, destino, columnas=["id", "zona"], incremental=True)
+        assert resultado["filas"] == 30 and list(_leer(destino)[0]) == ["id", "zona"]
+        with pytest.raises(ValueError):
+            exportar_csv(db.db_path, destino, columnas=["id; DROP TABLE propiedades"])
+
+        # guardar_csv delega en la exportación y corre también en segundo plano
+        db.guardar_csv(destino)
+        assert len(_leer(destino)) == 30
+        tarea = exportar_en_segundo_plano(db.db_path, os.path.join(tmp, "bg.csv"))
+        assert tarea.esperar(10) and tarea.error is None and tarea.resultado["filas"] == 30
+        db.cerrar_conexion()
+
+
+def test_incremental_por_orden_de_escritura():
+    """Filas escritas después de la marca entran aunque su fecha de scraping sea anterior (o nula)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        destino = os.path.join(tmp, "props.csv")
+        # La zona B termina primero con filas scrapeadas más tarde que las de la zona A
+        db.agregar_propiedades(_props(0, 5, "2024-01-01T12:00:00"))
+        assert exportar_csv(db.db_path, destino, incremental=True)["filas"] == 5
+
+        db.agregar_propiedades(_props(5, 8, "2024-01-01T10:00:00"))
+        conn = db._conectar()
+        conn.execute("INSERT INTO propiedades (id, zona) VALUES ('sin_fecha', 'Flores')")
+        conn.commit()
+        resultado = exportar_csv(db.db_path, destino, incremental=True)
+        assert resultado["filas"] == 4 and resultado["incremental"]
+        assert [f["id"] for f in _leer(destino)] == [f"p{i}" for i in range(8)] + ["sin_fecha"]
+        assert exportar_csv(db.db_path, destino, incremental=True)["filas"] == 0
+        db.cerrar_conexion()
+
+
+def test_parquet_con_proyeccion():
+    pq = pytest.importorskip("pyarrow.parquet")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        db.agregar_propiedades(_props(0, 12, "2024-01-01") + [{"id": "raro", "habitaciones": "tres"}])
+        destino = os.path.join(tmp, "props.parquet")
+        assert exportar_parquet(db.db_path, destino, columnas=["id", "habitaciones"], tamano_lote=5)["filas"] == 13
+        tabla = pq.read_table(destino)
+        assert tabla.column_names == ["id", "habitaciones"]
+        valores = dict(zip(tabla.column("id").to_pylist(), tabla.column("habitaciones").to_pylist()))
+        assert valores["p5"] == 1 and valores["raro"] is None
+        db.cerrar_conexion()
+
+
+if __name__ == "__main__":
+    test_csv_completo_e_incremental()
+    test_incremental_por_orden_de_escritura()
+    test_parquet_con_proyeccion()
+    print("✅ Exportación OK")
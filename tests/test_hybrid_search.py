@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test de búsqueda BM25 (FTS5) y fusión RRF con la búsqueda vectorial"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.hybrid_search import fusion_rrf, fusionar_resultados
+from src.query_parser import parsear_query
+from src.scrapers import PropertyDatabase
+
+PROPS = [
+    {"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "http://x/a",
+     "descripcion": "Casa con jardín y cocheras", "direccion": "Av. Almirante Brown 1200"},
+    {"id": "b", "tipo": "Departamento", "zona": "Palermo", "url": "http://x/b",
+     "descripcion": "Depto luminoso", "amenities": "Cochera, seguridad", "direccion": "Gorriti 4500"},
+    {"id": "c", "tipo": "PH", "zona": "Flores", "url": "http://x/c",
+     "descripcion": "PH reciclado con terraza", "direccion": "Rivadavia 7000"},
+]
+
+
+def test_bm25_se_mantiene_al_agregar_y_se_reconstruye():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        assert db.agregar_propiedades(PROPS) == 3
+
+        ids = [doc_id for doc_id, _ in db.buscar_bm25("cochera")]
+        assert set(ids) == {"a", "b"}
+        assert [doc_id for doc_id, _ in db.buscar_bm25("gorriti")] == ["b"]
+        assert db.buscar_bm25("de en") == []
+
+        # Un índice desalineado (p.ej. BD previa al FTS) se reconstruye al abrir en un proceso nuevo
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("DELETE FROM propiedades_fts")
+        conn.commit()
+        conn.close()
+        PropertyDatabase._inicializadas.clear()
+        db = PropertyDatabase(db_path=db.db_path)
+        assert [doc_id for doc_id, _ in db.buscar_bm25("rivadavia")] == ["c"]
+
+
+def test_bm25_respeta_los_criterios_de_la_query():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        db.agregar_propiedades(PROPS + [
+            {"id": "d", "tipo": "Departamento", "zona": "Palermo", "url": "http://x/d",
+             "descripcion": "Depto con pileta en el edificio", "pileta": True},
+            {"id": "e", "tipo": "Casa", "zona": "Temperley", "url": "http://x/e",
+             "descripcion": "Casa con pileta y quincho", "pileta": True, "habitaciones": 3},
+        ])
+        assert {doc_id for doc_id, _ in db.buscar_bm25("pileta")} == {"d", "e"}
+
+        query = "casa en Temperley con pileta"
+        criterios = parsear_query(query, ["temperley", "palermo", "flores"])
+        assert [doc_id for doc_id, _ in db.buscar_bm25(query, criterios=criterios)] == ["e"]
+        criterios = parsear_query("casa de 4 dormitorios con pileta", ["temperley", "palermo", "flores"])
+        assert db.buscar_bm25("casa con pileta", criterios=criterios) == []
+        db.cerrar_conexion()
+
+
+def test_fusion_rrf_premia_coincidencias_en_ambas_listas():
+    fusion = fusion_rrf([["a", "b", "c"], ["c", "d"]])
+    assert fusion[0][0] == "c" and [doc_id for doc_id, _ in fusion][1:] == ["a", "b", "d"]
+
+    registros = [{"id": "a", "zona": "Temperley"}, {"id": "c", "zona": "Flores"}]
+    resultados = fusionar_resultados(registros, ["c", "z"], n_results=2)
+    assert [r["id"] for r in resultados] == ["c", "a"] and "score_rrf" in resultados[0]
+
+
+if __name__ == "__main__":
+    test_bm25_se_mantiene_al_agregar_y_se_reconstruye()
+    test_bm25_respeta_los_criterios_de_la_query()
+    test_fusion_rrf_premia_coincidencias_en_ambas_listas()
+    print("✅ Búsqueda híbrida OK")
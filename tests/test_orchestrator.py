@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test del orquestador de descarga por zonas (scraper falso, BD temporal)"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.orchestrator import OrquestadorScraping
+from src.scrapers import PropertyDatabase
+
+
+def test_zonas_en_paralelo_con_un_escritor():
+    en_curso, maximo, lock = [0], [0], threading.Lock()
+
+    def scraper(zona, tipo, limit, debug, stop_flag):
+        with lock:
+            en_curso[0] += 1
+            maximo[0] = max(maximo[0], en_curso[0])
+        time.sleep(0.05)
+        with lock:
+            en_curso[0] -= 1
+        if zona == "Rota":
+            raise RuntimeError("portal caído")
+        return [{"id": f"{zona}-{i}", "url": f"http://x/{zona}/{i}", "zona": zona} for i in range(limit)]
+
+    zonas = ["Palermo", "Flores", "Rota", "Temperley", "Belgrano", "Palermo"]
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "props.db")
+        orquestador = OrquestadorScraping(zonas, limite=3, db_path=ruta, max_workers=3, scraper=scraper)
+        eventos = list(orquestador.ejecutar())
+
+        final = eventos[-1]
+        assert final.tipo == "fin" and final.zonas_completadas == final.total_zonas == 5
+        assert final.total_insertadas == 12 and len(final.ids) == 12
+        assert [e.zona for e in eventos if e.tipo == "error_zona"] == ["Rota"]
+        assert 1 < maximo[0] <= 3
+        assert PropertyDatabase(db_path=ruta).obtener_estadisticas()["total_propiedades"] == 12
+
+
+def test_detener_corta_zonas_pendientes():
+    detener = threading.Event()
+
+    def scraper(zona, tipo, limit, debug, stop_flag):
+        detener.set()
+        assert stop_flag.scraper_stop_flag
+        return [{"id": zona, "url": f"http://x/{zona}", "zona": zona}]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orquestador = OrquestadorScraping([f"Z{i}" for i in range(20)], db_path=os.path.join(tmp, "props.db"),
+                                          max_workers=1, scraper=scraper, detener=detener)
+        final = list(orquestador.ejecutar())[-1]
+        assert final.tipo == "fin" and final.zonas_completadas < 20
+
+
+def test_falla_del_escritor_se_informa():
+    def scraper(zona, tipo, limit, debug, stop_flag):
+        return [{"id": zona, "url": f"http://x/{zona}", "zona": zona}]
+
+    original = PropertyDatabase.__init__
+
+    def abrir_roto(self, db_path):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    PropertyDatabase.__init__ = abrir_roto
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            orquestador = OrquestadorScraping(["Palermo", "Flores"], db_path=os.path.join(tmp, "props.db"),
+                                              max_workers=1, scraper=scraper)
+            eventos = list(orquestador.ejecutar())
+    finally:
+        PropertyDatabase.__init__ = original
+
+    assert [e.tipo for e in eventos if e.tipo == "error_escritura"] == ["error_escritura"]
+    final = eventos[-1]
+    assert final.tipo == "fin" and final.error and "unable to open" in final.error
+    assert orquestador.detener.is_set()
+
+
+if __name__ == "__main__":
+    test_zonas_en_paralelo_con_un_escritor()
+    test_detener_corta_zonas_pendientes()
+    test_falla_del_escritor_se_informa()
+    print("✅ Orquestador OK")
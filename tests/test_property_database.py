@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Test del pool de conexiones por thread y la inicialización única de PropertyDatabase"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scrapers import MIGRACIONES, PropertyDatabase
+
+PROPS = [
+    {"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "http://x/a", "descripcion": "Casa con jardín"},
+    {"id": "b", "tipo": "PH", "zona": "Flores", "url": "http://x/b", "descripcion": "PH con terraza"},
+]
+
+
+def test_conexion_reutilizada_por_thread_y_en_wal():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        conn = db._conectar()
+        assert conn is db._conectar()
+        # Otra instancia sobre la misma BD comparte la conexión del thread
+        assert PropertyDatabase(db_path=db.db_path)._conectar() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+        otras = []
+        hilo = threading.Thread(target=lambda: otras.append(db._conectar()))
+        hilo.start()
+        hilo.join()
+        assert otras[0] is not conn
+        db.cerrar_conexion()
+
+
+def test_esquema_se_inicializa_una_vez_por_proceso():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "props.db")
+        db = PropertyDatabase(db_path=ruta)
+        with mock.patch.object(PropertyDatabase, "_init_db") as init:
+            for _ in range(5):
+                PropertyDatabase(db_path=ruta)
+            assert not init.called
+
+        # Escrituras y lecturas de varias instancias y threads sobre el pool
+        assert db.agregar_propiedades(PROPS) == 2
+
+        def feedback(i):
+            PropertyDatabase(db_path=ruta).guardar_feedback(f"p{i}", "positivo")
+
+        hilos = [threading.Thread(target=feedback, args=(i,)) for i in range(8)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        assert len(PropertyDatabase(db_path=ruta).obtener_feedback_por_tipo("positivo")) == 8
+        assert PropertyDatabase(db_path=ruta).obtener_estadisticas()["total_propiedades"] == 2
+        assert {p["id"] for p in db.obtener_todas()} == {"a", "b"}
+        db.cerrar_conexion()
+
+
+def test_migraciones_sobre_bd_previa_con_urls_duplicadas():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "vieja.db")
+        # Esquema anterior al sistema de migraciones: sin columnas nuevas ni índices
+        conn = sqlite3.connect(ruta)
+        conn.execute("CREATE TABLE propiedades (id TEXT PRIMARY KEY, tipo TEXT, zona TEXT, precio TEXT, "
+                     "precio_valor INTEGER, precio_moneda TEXT, habitaciones INTEGER, baños INTEGER, "
+                     "toilettes INTEGER, pileta INTEGER, metros_cubiertos REAL, metros_descubiertos REAL, "
+                     "orientacion TEXT, antiguedad INTEGER, descripcion TEXT, amenities TEXT, latitud REAL, "
+                     "longitud REAL, url TEXT, fuente TEXT, fecha_agregado TEXT)")
+        conn.execute("CREATE TABLE feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, propiedad_id TEXT NOT NULL, "
+                     "tipo TEXT NOT NULL, timestamp TEXT NOT NULL, UNIQUE(propiedad_id, tipo))")
+        conn.executemany("INSERT INTO propiedades (id, url, descripcion) VALUES (?, ?, ?)", [
+            ("v1", "http://x/1", "vieja"), ("v2", "http://x/1", "nueva"), ("v3", "", "sin url"), ("v4", "", "otra"),
+        ])
+        conn.execute("INSERT INTO feedback (propiedad_id, tipo, timestamp) VALUES ('v1', 'positivo', 't')")
+        conn.commit()
+        conn.close()
+
+        db = PropertyDatabase(db_path=ruta)
+        conn = db._conectar()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRACIONES[-1][0]
+        assert {"foto_portada", "direccion"} <= {r[1] for r in conn.execute("PRAGMA table_info(propiedades)")}
+        indices = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_propiedades_url", "idx_propiedades_zona", "idx_feedback_tipo"} <= indices
+
+        # Se conserva la última fila de cada url; las filas sin url no cuentan como duplicadas
+        assert sorted(p["id"] for p in db.obtener_todas()) == ["v2", "v3", "v4"]
+        assert [f["propiedad_id"] for f in db.obtener_feedback()] == ["v2"]
+        assert [doc_id for doc_id, _ in db.buscar_bm25("nueva")] == ["v2"]
+        try:
+            conn.execute("INSERT INTO propiedades (id, url) VALUES ('v5', 'http://x/1')")
+            assert False, "el índice único debería rechazar la url repetida"
+        except sqlite3.IntegrityError:
+            conn.rollback()
+        db.cerrar_conexion()
+
+
+def test_insertar_lote_con_upsert_por_url():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        stats = db.insertar_lote(PROPS + [{"id": "sin-url", "precio": "USD 120.000", "fotos": ["f1.jpg"]}])
+        assert (stats["insertadas"], stats["actualizadas"], stats["omitidas"]) == (3, 0, 0)
+
+        # Misma url con otro id: se actualiza la fila existente y conserva su id
+        lote = [
+            {"id": "a2", "url": "http://x/a", "tipo": "Casa", "descripcion": "Casa con quincho", "precio": "$ 90.000"},
+            {"id": "c", "url": "http://x/c", "descripcion": "Nueva"},
+            {"id": "c-dup", "url": "http://x/c", "descripcion": "Nueva repetida"},
+        ]
+        stats = db.insertar_lote(lote)
+        assert (stats["insertadas"], stats["actualizadas"], stats["omitidas"]) == (1, 1, 1)
+        assert sorted(stats["ids"]) == ["a", "c-dup"]
+
+        filas = {p["id"]: p for p in db.obtener_todas()}
+        assert set(filas) == {"a", "b", "c-dup", "sin-url"}
+        assert filas["a"]["descripcion"] == "Casa con quincho" and filas["a"]["precio_moneda"] == "$"
+        assert filas["sin-url"]["precio_valor"] == 120000 and filas["sin-url"]["fotos"] == '["f1.jpg"]'
+        assert [doc_id for doc_id, _ in db.buscar_bm25("quincho")] == ["a"]
+        assert db.buscar_bm25("jardín") == []
+
+        # agregar_propiedades mantiene su contrato: cantidad de propiedades nuevas
+        assert db.agregar_propiedades([{"id": "b", "url": "http://x/b"}]) == 0
+        db.cerrar_conexion()
+
+
+if __name__ == "__main__":
+    test_conexion_reutilizada_por_thread_y_en_wal()
+    test_esquema_se_inicializa_una_vez_por_proceso()
+    test_migraciones_sobre_bd_previa_con_urls_duplicadas()
+    test_insertar_lote_con_upsert_por_url()
+    print("✅ Pool de conexiones OK")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Test del cache de queries (LRU + TTL) y su invalidación al ingestar"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.query_cache import QueryCache, clave_query, obtener_cache_queries
+from src.query_parser import parsear_query
+from src.scrapers import PropertyDatabase
+
+
+def test_clave_normaliza_query_y_lru_ttl():
+    q1, q2 = "Depto  Palermo 2 ambientes", "depto palermo 2 ambientes"
+    assert clave_query(q1, parsear_query(q1), k=50) == clave_query(q2, parsear_query(q2), k=50)
+    assert clave_query(q1, parsear_query(q1), k=50) != clave_query(q1, parsear_query(q1), k=10)
+
+    cache = QueryCache(max_entradas=2, ttl=60)
+    cache.guardar("a", ["1"])
+    cache.guardar("b", ["2"])
+    assert cache.obtener("a") == ["1"]
+    cache.guardar("c", ["3"])  # desaloja "b" (el menos usado)
+    assert cache.obtener("b") is None and cache.obtener("c") == ["3"]
+
+    vencido = QueryCache(ttl=-1)
+    vencido.guardar("a", ["1"])
+    assert vencido.obtener("a") is None and len(vencido) == 0
+
+
+def test_se_invalida_al_agregar_propiedades():
+    cache = obtener_cache_queries()
+    cache.guardar("x", ["1"])
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        db.agregar_propiedades([])
+        assert cache.obtener("x") == ["1"]
+        db.agregar_propiedades([{"id": "p1", "url": "http://x/p1", "descripcion": "Casa"}])
+    assert cache.obtener("x") is None
+
+
+if __name__ == "__main__":
+    test_clave_normaliza_query_y_lru_ttl()
+    test_se_invalida_al_agregar_propiedades()
+    print("✅ Cache de queries OK")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test del cache de embeddings de queries y el micro-batching entre threads"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from src.query_embeddings import CodificadorQueries
+
+
+class ModeloLento:
+    def __init__(self):
+        self.llamadas = []
+
+    def encode(self, textos):
+        self.llamadas.append(list(textos))
+        time.sleep(0.01)
+        return np.array([[float(len(t)), 1.0] for t in textos])
+
+
+def test_cache_lru_con_contadores():
+    modelo = ModeloLento()
+    codificador = CodificadorQueries(modelo, max_entradas=2, ventana_ms=0)
+    assert codificador.encode(["casa"]).tolist() == [[4.0, 1.0]]
+    codificador.encode(["casa"])
+    codificador.encode(["ph", "loft"])  # desaloja "casa"
+    codificador.encode(["casa"])
+    stats = codificador.estadisticas()
+    assert stats["hits"] == 1 and stats["misses"] == 4 and stats["entradas"] == 2
+    assert sum(len(lote) for lote in modelo.llamadas) == 4
+
+
+def test_queries_concurrentes_en_un_solo_lote():
+    modelo = ModeloLento()
+    codificador = CodificadorQueries(modelo, ventana_ms=50)
+    resultados = {}
+    barrera = threading.Barrier(5)
+
+    def buscar(i):
+        barrera.wait()
+        resultados[i] = codificador.encode([f"query {i}" if i < 4 else "query 0"])
+
+    hilos = [threading.Thread(target=buscar, args=(i,)) for i in range(5)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert len(modelo.llamadas) == 1 and sorted(modelo.llamadas[0]) == [f"query {i}" for i in range(4)]
+    assert resultados[4].tolist() == resultados[0].tolist()
+
+
+if __name__ == "__main__":
+    test_cache_lru_con_contadores()
+    test_queries_concurrentes_en_un_solo_lote()
+    print("✅ Embeddings de queries OK")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Test del parser de queries compilado (vocabularios en un solo regex)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.query_parser import expandir_query, obtener_parser, parsear_query
+
+
+def test_parser_detecta_criterios_en_una_pasada():
+    criterios = parsear_query("Departamento moderno en Palermo Soho con cochera y balcón, 2 ambientes")
+    assert criterios.zona == "palermo"
+    assert criterios.tipo == "departamento" and criterios.tipo_categoria == "departamento"
+    assert set(criterios.amenities) >= {"garage", "cochera", "terraza", "balcón", "moderno"}
+    assert criterios.habitaciones == 2 and not criterios.pileta
+
+
+def test_terminos_contenidos_en_otros_tambien_cuentan():
+    # "cocina equipada" contiene "cocina"; "piscina" dispara amenity y expansión
+    criterios = parsear_query("casa con piscina y cocina equipada")
+    assert "cocina" in criterios.amenities and criterios.pileta
+    expandida = expandir_query("casa con piscina", parsear_query("casa con piscina"))
+    assert expandida.startswith("casa con piscina ") and "natatorio" in expandida
+
+
+def test_zonas_del_corpus_y_cache():
+    zonas = ("lomas de zamora", "temperley")
+    criterios = parsear_query("ph en lomas de zamora precio 150000", zonas)
+    assert criterios.zona == "lomas de zamora" and criterios.zona_keywords == ("lomas de zamora",)
+    assert criterios.precio_aprox == 150000
+    assert obtener_parser(zonas) is obtener_parser(zonas)
+    assert parsear_query("ph en lomas de zamora precio 150000", zonas) is criterios
+
+
+if __name__ == "__main__":
+    test_parser_detecta_criterios_en_una_pasada()
+    test_terminos_contenidos_en_otros_tambien_cuentan()
+    test_zonas_del_corpus_y_cache()
+    print("✅ Query parser OK")
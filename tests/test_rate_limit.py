@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test del token bucket por host y de la extracción de detalles en paralelo"""
+
+import os
+import random
+import sys
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.rate_limit import LimitadorPorHost, TokenBucket
+from src.scrapers import BuscadorPropScraper
+
+
+class Reloj:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_token_bucket_respeta_rafaga_y_tasa():
+    reloj = Reloj()
+    bucket = TokenBucket(tasa=2.0, capacidad=2, reloj=reloj)
+    # La ráfaga pasa sin esperar; después cada pedido se espacia 1/tasa
+    assert [bucket.reservar() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    reloj.t = 10.0
+    assert bucket.reservar() == 0.0
+
+
+def test_limitador_separa_hosts():
+    limitador = LimitadorPorHost(tasa=1000.0, rafaga=1)
+    assert limitador._bucket("https://www.argenprop.com/a") is limitador._bucket("https://WWW.argenprop.com/b")
+    assert limitador._bucket("https://www.argenprop.com/a") is not limitador._bucket("https://www.buscadorprop.com.ar/x")
+
+
+def test_detalles_en_paralelo_en_orden():
+    en_curso, maximo, lock = [0], [0], threading.Lock()
+
+    def detalles_falsos(url, debug=False, detener=None):
+        with lock:
+            en_curso[0] += 1
+            maximo[0] = max(maximo[0], en_curso[0])
+        time.sleep(random.uniform(0, 0.02))
+        with lock:
+            en_curso[0] -= 1
+        return {"direccion": url}
+
+    urls = [f"https://www.buscadorprop.com.ar/propiedad/{i}" for i in range(12)]
+    with mock.patch.object(BuscadorPropScraper, "extraer_detalles_propiedad", side_effect=detalles_falsos):
+        resultados = list(BuscadorPropScraper.extraer_detalles_en_paralelo(urls, max_workers=3))
+    assert [r["direccion"] for r in resultados] == urls
+    assert 1 < maximo[0] <= 3
+
+    class Flag:
+        scraper_stop_flag = False
+
+    flag = Flag()
+    with mock.patch.object(BuscadorPropScraper, "extraer_detalles_propiedad", side_effect=detalles_falsos):
+        parciales = []
+        for detalle in BuscadorPropScraper.extraer_detalles_en_paralelo(urls, stop_flag=flag, max_workers=2):
+            parciales.append(detalle)
+            flag.scraper_stop_flag = len(parciales) == 3
+    assert len(parciales) == 3
+
+
+def test_detener_corta_detalles_en_cola():
+    cargadas = []
+
+    def detalles_en_espera(url, debug=False, detener=None):
+        time.sleep(0.5)  # esperando su turno del rate limit o un driver libre
+        # Igual que extraer_detalles_propiedad: no pide la página si ya se pidió detener
+        if detener is not None and detener.is_set():
+            return {}
+        cargadas.append(url)
+        return {"direccion": url}
+
+    class Flag:
+        scraper_stop_flag = False
+
+    flag = Flag()
+    threading.Timer(0.1, lambda: setattr(flag, "scraper_stop_flag", True)).start()
+    urls = [f"https://www.buscadorprop.com.ar/propiedad/{i}" for i in range(10)]
+    with mock.patch.object(BuscadorPropScraper, "extraer_detalles_propiedad", side_effect=detalles_en_espera):
+        # El stop llega mientras el que llama espera el primer resultado
+        resultados = list(BuscadorPropScraper.extraer_detalles_en_paralelo(urls, stop_flag=flag, max_workers=4))
+        time.sleep(0.8)
+    assert resultados == [] and cargadas == []
+
+
+if __name__ == "__main__":
+    test_token_bucket_respeta_rafaga_y_tasa()
+    test_limitador_separa_hosts()
+    test_detalles_en_paralelo_en_orden()
+    test_detener_corta_detalles_en_cola()
+    print("✅ Rate limit y detalles en paralelo OK")
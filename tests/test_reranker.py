@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test del re-ranking vectorizado: mismo orden que el scoring original por diccionarios"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+
+from src.query_parser import AMENITIES_MAPPING, normalizar, parsear_query
+from src.reranker import MatrizFeatures, reranquear
+from src.search_index import construir_indice_ids
+
+
+def score_original(query, criterios, prop):
+    """Scoring fila a fila tal como lo hacía reranquear_propiedades_localmente()."""
+    score = 0
+    desc = str(prop.get('descripcion', '')).lower()
+    amenities = str(prop.get('amenities', '')).lower()
+    zona_prop = normalizar(prop.get('zona', ''))
+    tipo_prop = str(prop.get('tipo', '')).lower()
+    hab_prop = prop.get('habitaciones', '')
+    if criterios.zona:
+        score += 500 if any(kw in zona_prop for kw in criterios.zona_keywords) else -50
+    for amenity in criterios.amenities:
+        keywords = AMENITIES_MAPPING.get(amenity, [])
+        if amenity == 'pileta':
+            encontrado = prop.get('pileta') or any(kw in amenities for kw in keywords)
+            score += 100 if encontrado else -20
+        else:
+            encontrado = any(kw in amenities for kw in keywords) or any(kw in desc for kw in keywords)
+            score += 80 if encontrado else -20
+    if criterios.tipo:
+        score += 150 if criterios.tipo in tipo_prop else -30
+    if criterios.habitaciones:
+        hab_int = int(hab_prop) if hab_prop else 0
+        if hab_int == criterios.habitaciones:
+            score += 200
+        elif hab_int >= criterios.habitaciones:
+            score += 100
+        else:
+            score -= 40
+    for kw in [kw.strip() for kw in query.lower().split() if len(kw.strip()) > 2]:
+        if kw not in ['san', 'isidro', 'palermo', 'recoleta']:
+            score += 10 * (kw in desc) + 8 * (kw in amenities)
+    return score
+
+
+PROPIEDADES = [
+    {"id": "1", "tipo": "Casa", "zona": "Palermo", "habitaciones": 3, "pileta": 1,
+     "descripcion": "Casa moderna con jardín y parrilla", "amenities": "pileta, cochera"},
+    {"id": "2", "tipo": "Departamento", "zona": "Palermo Soho", "habitaciones": 2, "pileta": 0,
+     "descripcion": "Depto luminoso, balcón al frente", "amenities": "seguridad 24hs"},
+    {"id": "3", "tipo": "Casa", "zona": "Temperley", "habitaciones": 4, "pileta": 0,
+     "descripcion": "Amplia casa con piscina climatizada", "amenities": ""},
+    {"id": "4", "tipo": "PH", "zona": "Recoleta", "habitaciones": "", "pileta": 0,
+     "descripcion": "PH reciclado con terraza propia", "amenities": "parrilla"},
+]
+
+
+def test_mismo_orden_y_scores_que_el_original():
+    df = pd.DataFrame(PROPIEDADES)
+    features, indice = MatrizFeatures(df), construir_indice_ids(df)
+    for query in ["casa en palermo con pileta 3 dormitorios", "departamento luminoso con balcón",
+                  "ph con terraza en recoleta", "algo amplio con piscina, 4 ambientes"]:
+        criterios = parsear_query(query)
+        esperados = [score_original(query, criterios, p) for p in PROPIEDADES]
+        obtenidos = features.puntuar(query, criterios, list(range(len(PROPIEDADES))))
+        assert list(obtenidos) == esperados, query
+
+        orden_original = [p["id"] for p, _ in sorted(zip(PROPIEDADES, esperados), key=lambda x: x[1], reverse=True)]
+        assert [p["id"] for p in reranquear(query, criterios, PROPIEDADES, features, indice)] == orden_original
+
+
+def test_candidatos_fuera_del_indice_se_puntuan_igual():
+    df = pd.DataFrame(PROPIEDADES[:2])
+    query = "casa con piscina en temperley"
+    criterios = parsear_query(query, ("temperley",))
+    ranking = reranquear(query, criterios, PROPIEDADES, MatrizFeatures(df), construir_indice_ids(df))
+    assert ranking[0]["id"] == "3" and len(ranking) == len(PROPIEDADES)
+
+
+if __name__ == "__main__":
+    test_mismo_orden_y_scores_que_el_original()
+    test_candidatos_fuera_del_indice_se_puntuan_igual()
+    print("✅ Re-ranking vectorizado OK")
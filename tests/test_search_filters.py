@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test de extracción de criterios y pre-filtrado con relajación (colección simulada)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.query_parser import derivar_tipo_categoria, parsear_query
+from src.search_filters import consultar_con_filtros, construir_filtros
+
+
+def test_extraer_criterios_con_zona_del_corpus():
+    criterios = parsear_query("Casa en Temperley con pileta 3 dormitorios", ("temperley",))
+    assert criterios.zona == "temperley"
+    assert criterios.tipo == "casa" and criterios.tipo_categoria == "casa"
+    assert criterios.habitaciones == 3 and criterios.pileta
+    filtros = construir_filtros(criterios)
+    assert filtros["zona"] == {"zona_norm": {"$in": ["temperley"]}}
+    assert set(filtros) == {"zona", "tipo", "habitaciones", "pileta"}
+
+
+def test_tipo_categoria_desde_titulos():
+    assert derivar_tipo_categoria("Departamento venta Cañitas, cochera y baulera") == "departamento"
+    assert derivar_tipo_categoria("Venta cochera en Flores") == "cochera"
+    assert derivar_tipo_categoria("EXCELENTE UBICACION !!!!! APTO CREDITO BANCARIO") == ""
+
+
+class ColeccionFalsa:
+    """Solo conoce 2 casas en Temperley; el resto aparece sin filtro."""
+
+    def __init__(self):
+        self.wheres = []
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        self.wheres.append(where)
+        ids = ["t1", "t2"] if where else ["x1", "t1", "x2", "x3"]
+        ids = ids[:n_results]
+        return {"ids": [ids], "metadatas": [[{} for _ in ids]], "distances": [[0.1] * len(ids)]}
+
+
+def test_relajacion_completa_sin_duplicados():
+    coleccion = ColeccionFalsa()
+    criterios = parsear_query("casa en temperley", ("temperley",))
+    resultados = consultar_con_filtros(coleccion, [[0.0]], criterios, n_results=4)
+    assert resultados["ids"][0] == ["t1", "t2", "x1", "x2"]
+    assert coleccion.wheres[-1] is None and len(coleccion.wheres) == 3
+
+
+def test_sin_relajar_si_alcanza_el_minimo():
+    # n_results es el tamaño del pedido: con 2 hits filtrados y mínimo 2 no se vuelve a consultar
+    coleccion = ColeccionFalsa()
+    criterios = parsear_query("casa en temperley", ("temperley",))
+    resultados = consultar_con_filtros(coleccion, [[0.0]], criterios, n_results=50, min_resultados=2)
+    assert resultados["ids"][0] == ["t1", "t2"] and len(coleccion.wheres) == 1
+    assert coleccion.wheres[0] is not None
+
+
+if __name__ == "__main__":
+    test_extraer_criterios_con_zona_del_corpus()
+    test_tipo_categoria_desde_titulos()
+    test_relajacion_completa_sin_duplicados()
+    test_sin_relajar_si_alcanza_el_minimo()
+    print("✅ Pre-filtrado OK")
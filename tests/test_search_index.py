@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Test del índice id -> fila usado para hidratar resultados de búsqueda"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+
+from src.search_index import construir_indice_ids, hidratar, registros_desde_metadatos
+
+
+def test_hidratar_preserva_orden_e_ignora_ids_desconocidos():
+    df = pd.DataFrame({"id": ["a", "b", "c"], "zona": ["Palermo", "Flores", "Temperley"]})
+    indice = construir_indice_ids(df)
+    registros = hidratar(df, indice, ["c", "x", "a"])
+    assert [r["zona"] for r in registros] == ["Temperley", "Palermo"]
+    assert hidratar(pd.DataFrame(), construir_indice_ids(pd.DataFrame()), ["a"]) == []
+
+
+def test_registros_desde_metadatos_completa_solo_columnas_faltantes():
+    df = pd.DataFrame({"id": ["a", "b"], "zona": ["Palermo", "Flores"], "url": ["u-a", "u-b"]})
+    metadatas = [{"zona": "Palermo", "url": "u-a", "text_hash": "x"}, {"zona": "Flores"}]
+    registros = registros_desde_metadatos(
+        ["a", "b"], metadatas, [0.0, 1.0],
+        columnas=df.columns, df=df, indice=construir_indice_ids(df),
+    )
+    assert "text_hash" not in registros[0]
+    assert registros[0]["score"] == 1.0 and registros[1]["score"] == 0.5
+    assert registros[1]["url"] == "u-b"
+
+
+if __name__ == "__main__":
+    test_hidratar_preserva_orden_e_ignora_ids_desconocidos()
+    test_registros_desde_metadatos_completa_solo_columnas_faltantes()
+    print("✅ Índice de hidratación OK")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Test de la actualización en el lugar del sistema de búsqueda tras una descarga"""
+
+import functools
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pandas as pd
+
+from falsos import ColeccionFalsa, ModeloFalso
+from src.query_cache import obtener_cache_queries
+from src.query_parser import parsear_query
+from src.reranker import MatrizFeatures
+from src.scrapers import PropertyDatabase
+from src.search_system import SistemaBusqueda
+from src.snapshot import cargar_snapshot, guardar_snapshot, huella_bd
+from src.vector_sync import construir_textos, huella_sincronizada, marcar_sincronizada
+
+
+def _snapshot_en(directorio):
+    """El snapshot en segundo plano se escribe en el directorio temporal del test, no en data/."""
+    return mock.patch("src.snapshot.guardar_snapshot", functools.partial(guardar_snapshot, directorio=directorio))
+
+
+def test_aplicar_nuevas_propiedades_sin_recargar():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PropertyDatabase(db_path=os.path.join(tmp, "props.db"))
+        db.agregar_propiedades([{"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "http://x/a"}])
+        df = db.obtener_df()
+        df["text"] = construir_textos(df)
+
+        modelo, coleccion = ModeloFalso(), ColeccionFalsa()
+        sistema = SistemaBusqueda(modelo, coleccion, df)
+        _, _, df_antes, _, _ = sistema.estado()
+
+        db.agregar_propiedades([
+            {"id": "a", "tipo": "Casa reciclada", "zona": "Temperley", "url": "http://x/a2"},
+            {"id": "b", "tipo": "PH", "zona": "Lomas de Zamora", "url": "http://x/b"},
+        ])
+        stats = sistema.aplicar_nuevas_propiedades(db.obtener_por_ids(["a", "b", "inexistente"]))
+        assert stats == {"agregadas": 1, "actualizadas": 1, "errores": 0}
+
+        _, _, df_nuevo, indice, features = sistema.estado()
+        assert sorted(df_nuevo["id"]) == ["a", "b"] and len(df_antes) == 1
+        assert set(indice) == {"a", "b"} and features.n == 2
+        assert set(coleccion.docs) == {"a", "b"} and len(modelo.textos_codificados) == 2
+        assert "lomas de zamora" in sistema.zonas_conocidas
+        assert sistema.aplicar_nuevas_propiedades([])["agregadas"] == 0
+
+
+def test_features_incrementales_y_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "props.db")
+        db = PropertyDatabase(db_path=db_path)
+        db.agregar_propiedades([
+            {"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "http://x/a", "descripcion": "con pileta",
+             "habitaciones": 3, "pileta": True},
+            {"id": "b", "tipo": "Departamento", "zona": "Palermo", "url": "http://x/b", "amenities": "balcón"},
+        ])
+        df = db.obtener_df()
+        df["text"] = construir_textos(df)
+        sistema = SistemaBusqueda(ModeloFalso(), ColeccionFalsa(), df, db_path=db_path, modelo_id="m")
+
+        cache = obtener_cache_queries()
+        cache.guardar("casa con pileta", ["a"])
+        db.agregar_propiedades([
+            {"id": "a", "tipo": "PH", "zona": "Temperley", "url": "http://x/a", "descripcion": "con terraza"},
+            {"id": "c", "tipo": "Casa", "zona": "Adrogué", "url": "http://x/c", "descripcion": "jardín y pileta",
+             "habitaciones": 4},
+        ])
+        # Una búsqueda de otra sesión vuelve a cachear antes de que se publiquen las filas nuevas
+        cache.guardar("casa con pileta", ["a"])
+        with _snapshot_en(os.path.join(tmp, "snapshot")):
+            sistema.aplicar_nuevas_propiedades(db.obtener_por_ids(["a", "c"]))
+            sistema._carga_snapshot.esperar(timeout=10)
+        assert cache.obtener("casa con pileta") is None
+
+        # Las features extendidas puntúan igual que las recalculadas sobre todo el DataFrame
+        _, _, df_nuevo, _, features = sistema.estado()
+        completas = MatrizFeatures(df_nuevo)
+        posiciones = np.arange(len(df_nuevo))
+        for query in ("casa con pileta en temperley", "ph con terraza", "departamento 3 ambientes balcón"):
+            criterios = parsear_query(query)
+            assert (features.puntuar(query, criterios, posiciones) ==
+                    completas.puntuar(query, criterios, posiciones)).all(), query
+
+        # Sin huella leída junto con las filas, la versión nueva no se guarda como snapshot
+        assert sistema._carga_snapshot.error is None and sistema.huella is None
+        assert not os.path.exists(os.path.join(tmp, "snapshot"))
+        db.cerrar_conexion()
+
+
+def test_cambios_de_otros_procesos_y_huella_del_snapshot():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, destino = os.path.join(tmp, "props.db"), os.path.join(tmp, "snapshot")
+        db = PropertyDatabase(db_path=db_path)
+        db.agregar_propiedades([{"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "http://x/a"}])
+        df, huella = db.obtener_df_con_huella()
+        df["text"] = construir_textos(df)
+        coleccion = ColeccionFalsa()
+        marcar_sincronizada(coleccion, huella)
+        sistema = SistemaBusqueda(ModeloFalso(), coleccion, df, db_path=db_path, modelo_id="m", huella=huella)
+
+        # La descarga escribe "b"; otro proceso (orquestador por CLI) escribe "c" y actualiza "a"
+        db.agregar_propiedades([{"id": "b", "tipo": "PH", "zona": "Flores", "url": "http://x/b"}])
+        db.agregar_propiedades([
+            {"id": "c", "tipo": "Casa", "zona": "Adrogué", "url": "http://x/c"},
+            {"id": "a", "tipo": "Casa reciclada", "zona": "Temperley", "url": "http://x/a"},
+        ])
+        with _snapshot_en(destino):
+            stats = sistema.aplicar_cambios_bd(["b"])
+            sistema._carga_snapshot.esperar(timeout=10)
+        assert stats == {"agregadas": 2, "actualizadas": 1, "errores": 0}
+        assert sorted(sistema.df["id"]) == ["a", "b", "c"] and sistema.huella == db.huella()
+        assert huella_sincronizada(coleccion) == sistema.huella and "version_escritura" not in coleccion.docs["a"]
+        # La BD del sistema es una sola instancia sobre su db_path (la usa también la búsqueda BM25)
+        assert sistema.db is sistema.db and sistema.db.db_path == db_path
+        assert [doc_id for doc_id, _ in sistema.db.buscar_bm25("reciclada")] == ["a"]
+
+        # El snapshot lleva la huella de lo publicado: una escritura posterior lo deja vencido
+        assert cargar_snapshot(huella_bd(db_path), "m", destino).df["id"].tolist() == list(sistema.df["id"])
+        db.agregar_propiedades([{"id": "d", "tipo": "PH", "zona": "Flores", "url": "http://x/d"}])
+        sistema._version_snapshot = 0
+        with _snapshot_en(destino):
+            sistema._guardar_snapshot()
+        assert cargar_snapshot(huella_bd(db_path), "m", destino) is None
+        assert cargar_snapshot(sistema.huella, "m", destino) is not None
+        db.cerrar_conexion()
+
+
+if __name__ == "__main__":
+    test_aplicar_nuevas_propiedades_sin_recargar()
+    test_features_incrementales_y_cache()
+    test_cambios_de_otros_procesos_y_huella_del_snapshot()
+    print("✅ Sistema de búsqueda OK")
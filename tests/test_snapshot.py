@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Test del snapshot del sistema (escritura atómica, huella de la BD y carga con mmap)"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pandas as pd
+
+from falsos import ModeloFalso
+from src.reranker import MatrizFeatures
+from src.scrapers import PropertyDatabase
+from src.snapshot import cargar_snapshot, guardar_snapshot, huella_bd
+from src.vector_sync import construir_textos
+
+
+def _df():
+    df = pd.DataFrame([
+        {"id": "a", "tipo": "Casa", "zona": "Temperley", "descripcion": "con pileta"},
+        {"id": "b", "tipo": "PH", "zona": "Flores", "descripcion": "con terraza"},
+    ])
+    df["text"] = construir_textos(df)
+    return df
+
+
+def test_snapshot_ida_y_vuelta_y_huella():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "props.db")
+        db = PropertyDatabase(db_path=db_path)
+        db.insertar_lote([
+            {"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "https://x/a"},
+            {"id": "b", "tipo": "PH", "zona": "Flores", "url": "https://x/b"},
+        ])
+        destino = os.path.join(tmp, "snapshot")
+        df, huella = _df(), huella_bd(db_path)
+        embeddings = ModeloFalso().encode(df["text"].tolist())
+
+        assert cargar_snapshot(huella, "m", destino) is None
+        guardar_snapshot(df, embeddings, MatrizFeatures(df), huella, "m", destino)
+        guardar_snapshot(df, embeddings, MatrizFeatures(df), huella, "m", destino)
+        assert len([e for e in os.listdir(destino) if e.startswith("v-")]) == 1
+
+        # Otro proceso: se cierra la conexión (checkpoint del WAL) y se vuelve a abrir la BD
+        db.cerrar_conexion()
+        PropertyDatabase._inicializadas.clear()
+        db = PropertyDatabase(db_path=db_path)
+        db.guardar_feedback("a", "positivo")
+        assert huella_bd(db_path) == huella
+
+        snapshot = cargar_snapshot(huella_bd(db_path), "m", destino)
+        assert snapshot.df["id"].tolist() == ["a", "b"] and list(snapshot.indice) == ["a", "b"]
+        assert isinstance(snapshot.embeddings, np.memmap) and snapshot.features.n == 2
+        assert cargar_snapshot(huella, "otro-modelo", destino) is None
+
+        # Sincronizar desde el snapshot no pasa por el modelo salvo para textos nuevos
+        modelo = ModeloFalso()
+        envuelto = snapshot.envolver(modelo)
+        assert envuelto.encode(df["text"].tolist()).shape == (2, 2) and modelo.textos_codificados == []
+        envuelto.encode(["texto nuevo", df["text"][0]])
+        assert modelo.textos_codificados == ["texto nuevo"]
+
+        # Una actualización (misma cantidad de filas y fecha de alta) deja el snapshot vencido
+        db.insertar_lote([{"id": "a", "tipo": "Casa", "zona": "Temperley", "url": "https://x/a", "precio": "USD 1"}])
+        assert cargar_snapshot(huella_bd(db_path), "m", destino) is None
+        db.cerrar_conexion()
+
+
+if __name__ == "__main__":
+    test_snapshot_ida_y_vuelta_y_huella()
+    print("✅ Snapshot OK")
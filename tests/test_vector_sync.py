@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test de sincronización incremental BD -> ChromaDB (colección y modelo simulados)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+
+from falsos import ColeccionFalsa, ModeloFalso
+from src.vector_sync import CAMPO_HASH, construir_textos, ingestar_en_lotes, sanear_metadatos, sincronizar_coleccion
+
+
+def _df(filas):
+    df = pd.DataFrame(filas)
+    df['text'] = construir_textos(df)
+    return df
+
+
+def test_sincronizacion_incremental():
+    coleccion, modelo = ColeccionFalsa(), ModeloFalso()
+    filas = [
+        {"id": "a", "tipo": "Casa", "zona": "Temperley", "descripcion": "con pileta"},
+        {"id": "b", "tipo": "Depto", "zona": "Palermo", "descripcion": "luminoso"},
+    ]
+    stats = sincronizar_coleccion(coleccion, _df(filas), modelo)
+    assert stats["nuevos"] == 2 and len(modelo.textos_codificados) == 2
+    assert CAMPO_HASH in coleccion.docs["a"]
+
+    # Sin cambios: no se vuelve a embeber nada
+    modelo.textos_codificados.clear()
+    stats = sincronizar_coleccion(coleccion, _df(filas), modelo)
+    assert stats["sin_cambios"] == 2 and modelo.textos_codificados == []
+
+    # Una propiedad nueva, una modificada y una eliminada
+    filas = [
+        {"id": "a", "tipo": "Casa", "zona": "Temperley", "descripcion": "con pileta y jardín"},
+        {"id": "c", "tipo": "PH", "zona": "Flores", "descripcion": "patio"},
+    ]
+    stats = sincronizar_coleccion(coleccion, _df(filas), modelo)
+    assert stats == {"nuevos": 1, "actualizados": 1, "eliminados": 1, "sin_cambios": 0, "errores": 0}
+    assert len(modelo.textos_codificados) == 2
+    assert set(coleccion.docs) == {"a", "c"}
+
+
+def test_ingesta_en_lotes_reporta_errores_por_lote():
+    coleccion = ColeccionFalsa()
+    ids = [f"p{i}" for i in range(5)] + ["roto"]
+    df = pd.DataFrame({"id": ids, "precio_valor": [1.0, None, 3.0, 4.0, 5.0, 6.0]})
+    metadatas = sanear_metadatos(df)
+    assert metadatas[1]["precio_valor"] == ""
+
+    reporte = ingestar_en_lotes(coleccion, ids, ids, [[0.0]] * 6, metadatas, batch_size=2)
+    assert coleccion.llamadas == 3 and reporte["lotes"] == 3
+    assert reporte["ingestados"] == 4
+    assert reporte["errores"][0]["desde"] == 4 and reporte["errores"][0]["hasta"] == 6
+
+
+if __name__ == "__main__":
+    test_sincronizacion_incremental()
+    test_ingesta_en_lotes_reporta_errores_por_lote()
+    print("✅ Sincronización incremental OK")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test de las esperas adaptativas con un driver falso (sin Chrome)"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.waits import (
+    RegistroEsperas, esperar_condicion, esperar_elementos_estables, esperar_imagenes,
+    obtener_registro_esperas, scroll_hasta_estable,
+)
+
+
+class DriverFalso:
+    """Las tarjetas van apareciendo con el tiempo y cada scroll agrega más hasta un tope."""
+
+    def __init__(self, tarjetas_por_tiempo, tope_scroll=0, imagenes=0):
+        self.inicio = time.monotonic()
+        self.tarjetas_por_tiempo = tarjetas_por_tiempo
+        self.extra = 0
+        self.tope_scroll = tope_scroll
+        self.imagenes = imagenes
+
+    def execute_script(self, script, *args):
+        if "scrollTo" in script:
+            self.extra = min(self.extra + 5, self.tope_scroll)
+            return None
+        if "naturalWidth" in script:
+            # Solo cuentan las fotos de la galería pedida, no el resto de las imágenes de la página
+            return self.imagenes if args == (".galeria img",) else 1
+        if "querySelectorAll" in script:
+            return self.tarjetas_por_tiempo(time.monotonic() - self.inicio) + self.extra
+        raise AssertionError(script)
+
+
+def test_condicion_registra_duracion_y_timeouts():
+    registro = RegistroEsperas()
+    assert esperar_condicion(None, "rapida", lambda d: 42, timeout=1, registro=registro) == 42
+    assert not esperar_condicion(None, "nunca", lambda d: False, timeout=0.15, intervalo=0.05, registro=registro)
+    stats = registro.estadisticas()
+    assert stats["rapida"]["n"] == 1 and stats["rapida"]["max"] < 0.1 and stats["rapida"]["timeouts"] == 0
+    assert stats["nunca"]["timeouts"] == 1 and stats["nunca"]["max"] >= 0.15
+
+
+def test_tarjetas_estables_antes_del_sleep_fijo():
+    # 10 tarjetas a los 0.2s y no cambian más: listo bastante antes de los 2s del sleep anterior
+    driver = DriverFalso(lambda t: 10 if t > 0.2 else 0)
+    inicio = time.monotonic()
+    assert esperar_elementos_estables(driver, ".card", "test.tarjetas", timeout=5, estable_por=0.2) == 10
+    assert time.monotonic() - inicio < 1.5
+    assert "test.tarjetas" in obtener_registro_esperas().estadisticas()
+
+
+def test_scroll_corta_cuando_no_agrega_y_imagenes():
+    driver = DriverFalso(lambda t: 10, tope_scroll=5, imagenes=3)
+    assert scroll_hasta_estable(driver, ".card", "test.scroll", max_scrolls=5, timeout=1) == 15
+    assert esperar_imagenes(driver, ".galeria img", "test.fotos", timeout=0.5, minimo=2) == 3
+    assert esperar_imagenes(driver, ".galeria img", "test.fotos", timeout=0.2, minimo=5) == 0
+    assert esperar_imagenes(DriverFalso(lambda t: 0), ".galeria img", "test.fotos", timeout=0.2) == 0
+
+
+if __name__ == "__main__":
+    test_condicion_registra_duracion_y_timeouts()
+    test_tarjetas_estables_antes_del_sleep_fijo()
+    test_scroll_corta_cuando_no_agrega_y_imagenes()
+    print("✅ Esperas adaptativas OK")